@@ -0,0 +1,136 @@
+import os
+import pandas as pd
+import numpy as np
+
+try:
+    from tools.parallel import run_in_pool
+except ImportError:  # outside this repository (e.g. inside Zerve): no process pool
+    def run_in_pool(fn, task_args, n_jobs):
+        return [fn(*args) for args in task_args]
+
+# Bootstrap confidence intervals for credit lifts and tier means
+print("🎲 BOOTSTRAP CONFIDENCE INTERVALS")
+print("=" * 80)
+
+bootstrap_replicates = int(os.environ.get('BOOTSTRAP_REPLICATES', 2000))
+bootstrap_jobs = int(os.environ.get('BOOTSTRAP_JOBS', os.cpu_count() or 1))
+bootstrap_seed = 42
+bootstrap_confidence = 0.95
+bootstrap_chunk_cells = 5_000_000       # replicates x users held in one weight matrix
+unstable_relative_width = 0.5           # CI wider than 50% of the estimate is flagged
+unstable_min_users = 30
+
+
+def bootstrap_chunk(seed_sequence, n_replicates):
+    """
+    Resampled column sums of the design matrix for one chunk of replicates.
+
+    Each replicate resamples n user indices with replacement and counts them
+    with one bincount over the whole chunk (offset per replicate), so a
+    resample is a row of the (replicates x users) weight matrix and every group
+    count and metric sum is a single float64 matrix product with
+    `bootstrap_design` (read from the block globals, which forked workers share
+    without pickling).
+    """
+    rng = np.random.default_rng(seed_sequence)
+    n_users = bootstrap_design.shape[0]
+    resampled = rng.integers(0, n_users, size=(n_replicates, n_users))
+    resampled += np.arange(n_replicates)[:, None] * n_users
+    weights = np.bincount(resampled.ravel(), minlength=n_replicates * n_users).reshape(n_replicates, n_users)
+    return weights.astype(np.float64) @ bootstrap_design
+
+
+# Design matrix: per group an indicator column and one masked column per metric,
+# so a replicate's group mean is (weights @ metric*mask) / (weights @ mask)
+bootstrap_metrics = ['composite_success_score', 'days_active']
+_credits = user_segments_credit['total_credits_used'].to_numpy()
+bootstrap_groups = {
+    'credits: zero': _credits == 0,
+    'credits: any (>0)': _credits > 0,
+    'credits: ≥1': _credits >= 1,
+    'credits: ≥10': _credits >= 10,
+}
+for _tier in tier_col_order:
+    bootstrap_groups[f'tier: {_tier}'] = (user_segments_credit['success_tier'] == _tier).to_numpy()
+
+_design_columns = []
+for _group, _mask in bootstrap_groups.items():
+    _design_columns.append(_mask.astype(np.float64))
+    for _metric in bootstrap_metrics:
+        _design_columns.append(np.where(_mask, user_segments_credit[_metric].to_numpy(), 0).astype(np.float64))
+bootstrap_design = np.column_stack(_design_columns)
+_columns_per_group = 1 + len(bootstrap_metrics)
+
+# Split replicates into memory-bounded chunks with independent seed streams
+_chunk_size = max(1, min(
+    -(-bootstrap_replicates // max(bootstrap_jobs, 1)), bootstrap_chunk_cells // max(len(bootstrap_design), 1)
+))
+_chunk_sizes = [min(_chunk_size, bootstrap_replicates - _start) for _start in range(0, bootstrap_replicates, _chunk_size)]
+_seed_sequences = np.random.SeedSequence(bootstrap_seed).spawn(len(_chunk_sizes))
+
+print(f"Users: {len(bootstrap_design):,} | Replicates: {bootstrap_replicates:,} in {len(_chunk_sizes)} chunks | "
+      f"Workers: {bootstrap_jobs}")
+replicate_sums = np.vstack(run_in_pool(bootstrap_chunk, list(zip(_seed_sequences, _chunk_sizes)), bootstrap_jobs))
+
+
+def group_means(column_sums):
+    """{(group, metric): means} from (replicates x design columns) or (design columns,) sums"""
+    column_sums = np.atleast_2d(column_sums)
+    means = {}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for g, group in enumerate(bootstrap_groups):
+            counts = column_sums[:, g * _columns_per_group]
+            for m, metric in enumerate(bootstrap_metrics):
+                means[(group, metric)] = column_sums[:, g * _columns_per_group + 1 + m] / counts
+    return means
+
+
+_point_means = group_means(bootstrap_design.sum(axis=0))
+_replicate_means = group_means(replicate_sums)
+
+# Statistics: every group mean plus success-score lift of each credit group over zero credits
+_statistics = {}
+for (_group, _metric), _values in _replicate_means.items():
+    _statistics[(f'mean {_metric}', _group)] = (_point_means[(_group, _metric)][0], _values)
+_zero_point = _point_means[('credits: zero', 'composite_success_score')][0]
+_zero_replicates = _replicate_means[('credits: zero', 'composite_success_score')]
+for _group in ['credits: any (>0)', 'credits: ≥1', 'credits: ≥10']:
+    with np.errstate(invalid='ignore', divide='ignore'):
+        _statistics[('success lift % vs zero', _group)] = (
+            (_point_means[(_group, 'composite_success_score')][0] - _zero_point) / _zero_point * 100,
+            (_replicate_means[(_group, 'composite_success_score')] - _zero_replicates) / _zero_replicates * 100,
+        )
+
+_alpha = (1 - bootstrap_confidence) / 2
+_rows = []
+for (_statistic, _group), (_estimate, _values) in _statistics.items():
+    _ci_low, _ci_high = np.nanquantile(_values, [_alpha, 1 - _alpha]) if np.isfinite(_values).any() else (np.nan, np.nan)
+    _rows.append({
+        'statistic': _statistic,
+        'group': _group,
+        'estimate': _estimate,
+        'ci_low': _ci_low,
+        'ci_high': _ci_high,
+        'n_users': int(bootstrap_groups[_group].sum()),
+    })
+bootstrap_ci_df = pd.DataFrame(_rows)
+bootstrap_ci_df['ci_width'] = bootstrap_ci_df['ci_high'] - bootstrap_ci_df['ci_low']
+
+# Unstable: too few users, CI spanning zero for a lift, or CI wide relative to the estimate
+_is_lift = bootstrap_ci_df['statistic'].str.startswith('success lift')
+bootstrap_ci_df['unstable'] = (
+    (bootstrap_ci_df['n_users'] < unstable_min_users)
+    | bootstrap_ci_df['ci_width'].isna()
+    | (_is_lift & (bootstrap_ci_df['ci_low'] <= 0) & (bootstrap_ci_df['ci_high'] >= 0))
+    | (bootstrap_ci_df['ci_width'] > unstable_relative_width * bootstrap_ci_df['estimate'].abs())
+)
+
+print(f"\n📏 {bootstrap_confidence:.0%} BOOTSTRAP CONFIDENCE INTERVALS:")
+print("-" * 80)
+for _, _row in bootstrap_ci_df.iterrows():
+    _flag = '⚠️ unstable' if _row['unstable'] else ''
+    print(f"  {_row['statistic']:32s} {_row['group']:24s} {_row['estimate']:9.2f} "
+          f"[{_row['ci_low']:9.2f}, {_row['ci_high']:9.2f}]  n={_row['n_users']:6,} {_flag}")
+
+print(f"\n💾 Output: bootstrap_ci_df with {len(bootstrap_ci_df)} statistics, "
+      f"{int(bootstrap_ci_df['unstable'].sum())} flagged unstable")
@@ -0,0 +1,91 @@
+import os
+import time
+import pandas as pd
+import numpy as np
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# Pre-aggregated cube behind the HTML dashboard (tools/serve_dashboard.py)
+print("🧊 BUILDING DASHBOARD AGGREGATE CUBE")
+print("=" * 80)
+
+dashboard_cube_path = os.environ.get('DASHBOARD_CUBE_PATH', 'dashboard_cube.parquet')
+if pyarrow is None and dashboard_cube_path.endswith('.parquet'):
+    # Same cube as CSV when no Parquet engine is installed; the dashboard server reads either
+    dashboard_cube_path = dashboard_cube_path[:-len('.parquet')] + '.csv'
+cube_all = 'All'
+
+# Cube grain: tier x credit band x event week x event category.
+# Tier and credit band are per-user attributes (every user is in exactly one cell), so
+# distinct-user measures add up across them. Week and category are per-event, so a user
+# active in two weeks must not be counted twice: those two dimensions are materialised
+# as grouping sets, with `All` rows holding the exact rolled-up distinct counts.
+cube_dimensions = ['success_tier', 'credit_band', 'week', 'event_category']
+cube_measures = ['users', 'events', 'credits_used', 'success_score_sum', 'days_active_sum']
+
+_cube_start = time.perf_counter()
+_cube_users = user_segments[['user_id', 'success_tier', 'total_credits_used', 'composite_success_score', 'days_active']]
+_cube_credit_totals = _cube_users['total_credits_used'].fillna(0).to_numpy()
+_cube_users = _cube_users.assign(credit_band=np.select(
+    [_cube_credit_totals == 0, _cube_credit_totals < 1, _cube_credit_totals < 10, _cube_credit_totals < 50],
+    credit_band_labels[:4], credit_band_labels[4]
+))
+
+# Event category per event name: categorize_event mapped once per distinct name, as in the bitmap index
+_cube_events = df_features[['user_id', 'timestamp', 'event', 'prop_credits_used']]
+_cube_category_map = {_event_name: categorize_event(_event_name) for _event_name in _cube_events['event'].dropna().unique()}
+_cube_timestamps = _cube_events['timestamp'].dt.tz_localize(None) if _cube_events['timestamp'].dt.tz else _cube_events['timestamp']
+# Week codes per event; only the distinct weeks are formatted as their Monday's date
+_cube_week_codes, _cube_weeks = pd.factorize(_cube_timestamps.dt.to_period('W-SUN'))
+_cube_week_labels = pd.Categorical.from_codes(_cube_week_codes, _cube_weeks.start_time.strftime('%Y-%m-%d'))
+
+# (user, week, category) cells first: every grouping set below is an aggregate of these
+_cube_cells = pd.DataFrame({
+    'user_id': _cube_events['user_id'].to_numpy(),
+    'week': np.asarray(_cube_week_labels, dtype=object),
+    'event_category': _cube_events['event'].map(_cube_category_map).fillna('other').to_numpy(),
+    'credits_used': _cube_events['prop_credits_used'].fillna(0).to_numpy(),
+}).groupby(['user_id', 'week', 'event_category'], sort=False).agg(
+    events=('credits_used', 'size'), credits_used=('credits_used', 'sum')
+).reset_index().merge(_cube_users.drop(columns='total_credits_used'), on='user_id', how='inner')
+
+
+def cube_grouping_set(cells, keep):
+    """Aggregate the (user, week, category) cells to tier x band x `keep`; other dimensions become `All`"""
+    keys = ['success_tier', 'credit_band'] + keep
+    per_user = cells.groupby(keys + ['user_id'], sort=False, observed=True).agg(
+        events=('events', 'sum'), credits_used=('credits_used', 'sum'),
+        composite_success_score=('composite_success_score', 'first'), days_active=('days_active', 'first'),
+    ).reset_index()
+    grouped = per_user.groupby(keys, sort=False, observed=True).agg(
+        users=('user_id', 'size'), events=('events', 'sum'), credits_used=('credits_used', 'sum'),
+        success_score_sum=('composite_success_score', 'sum'), days_active_sum=('days_active', 'sum'),
+    ).reset_index()
+    for _dimension in ('week', 'event_category'):
+        if _dimension not in keep:
+            grouped[_dimension] = cube_all
+    return grouped[cube_dimensions + cube_measures]
+
+
+dashboard_cube = pd.concat(
+    [cube_grouping_set(_cube_cells, _keep) for _keep in (['week', 'event_category'], ['week'], ['event_category'], [])],
+    ignore_index=True
+).sort_values(cube_dimensions, ignore_index=True)
+_cube_seconds = time.perf_counter() - _cube_start
+
+_cube_tmp_path = f'{dashboard_cube_path}.{os.getpid()}.tmp'
+if dashboard_cube_path.endswith('.parquet'):
+    dashboard_cube.to_parquet(_cube_tmp_path, index=False)
+else:
+    dashboard_cube.to_csv(_cube_tmp_path, index=False)
+os.replace(_cube_tmp_path, dashboard_cube_path)
+
+print(f"Cells: {len(dashboard_cube):,} rows from {len(_cube_events):,} events and {len(_cube_users):,} users "
+      f"in {_cube_seconds:.2f}s")
+for _dimension in cube_dimensions:
+    print(f"  {_dimension:16s}: {dashboard_cube.loc[dashboard_cube[_dimension] != cube_all, _dimension].nunique():4,} values")
+print(f"\n💾 Output: {dashboard_cube_path} ({os.path.getsize(dashboard_cube_path) / 1024:.0f} KB)")
+print(f"   Serve with: python -m tools.serve_dashboard --cube {dashboard_cube_path}")
@@ -0,0 +1,126 @@
+import pandas as pd
+import numpy as np
+
+# Cohort retention: share of each signup-week cohort active N weeks later
+print("📅 COHORT RETENTION MATRIX BY SIGNUP WEEK")
+print("=" * 80)
+
+retention_max_weeks = 64        # week offsets tracked per user (one uint64 bitmap)
+retention_display_weeks = 12
+
+
+class RetentionMatrix:
+    """
+    Incremental cohort x week-offset retention built from (user, day) activity.
+
+    Every user holds a cohort week (first active week) and a uint64 bitmap whose
+    bit k is set when the user was active k weeks after their cohort week. New
+    days of activity are OR-ed into the bitmaps, so the matrix can be refreshed
+    without rescanning history; counts come from bincounts over the set bits.
+    """
+
+    # Weeks start on Monday; 1970-01-05 is the first Monday after the epoch
+    epoch_monday = np.datetime64('1970-01-05', 'D')
+
+    def __init__(self, max_weeks=retention_max_weeks):
+        self.max_weeks = max_weeks
+        self.user_index = pd.Index([])
+        self.cohort_week = np.empty(0, dtype=np.int64)
+        self.bitmaps = np.empty(0, dtype=np.uint64)
+        self.last_week = None
+
+    def add_activity(self, user_ids, days):
+        """Add (user, day) activity pairs; days are datetime64[D] values"""
+        weeks = (np.asarray(days, dtype='datetime64[D]') - self.epoch_monday).astype(np.int64) // 7
+        user_ids = np.asarray(user_ids)
+        if len(weeks) == 0:
+            return self
+
+        # Deduplicate to the (user, week) activity set
+        activity = pd.DataFrame({'user_id': user_ids, 'week': weeks}).drop_duplicates()
+
+        # Register unseen users, with cohort at their first active week
+        new_users = pd.Index(activity['user_id'].unique()).difference(self.user_index)
+        if len(new_users) > 0:
+            self.user_index = self.user_index.append(new_users)
+            self.cohort_week = np.append(self.cohort_week, np.full(len(new_users), np.iinfo(np.int64).max))
+            self.bitmaps = np.append(self.bitmaps, np.zeros(len(new_users), dtype=np.uint64))
+
+        rows = self.user_index.get_indexer(activity['user_id'])
+        batch_first_week = pd.Series(activity['week'].to_numpy()).groupby(rows).min()
+
+        # Late-arriving earlier activity moves a cohort back; shift its bitmap to match
+        earlier = batch_first_week.to_numpy() < self.cohort_week[batch_first_week.index]
+        if earlier.any():
+            moved = batch_first_week.index[earlier]
+            known = self.cohort_week[moved] != np.iinfo(np.int64).max
+            shift = np.where(known, self.cohort_week[moved] - batch_first_week.to_numpy()[earlier], 0)
+            self.bitmaps[moved] = np.where(
+                shift < self.max_weeks, self.bitmaps[moved] << shift.astype(np.uint64), np.uint64(0)
+            )
+            self.cohort_week[moved] = batch_first_week.to_numpy()[earlier]
+
+        offsets = activity['week'].to_numpy() - self.cohort_week[rows]
+        in_range = offsets < self.max_weeks
+        bits = np.left_shift(np.uint64(1), offsets[in_range].astype(np.uint64))
+        np.bitwise_or.at(self.bitmaps, rows[in_range], bits)
+
+        batch_last_week = int(activity['week'].max())
+        self.last_week = batch_last_week if self.last_week is None else max(self.last_week, batch_last_week)
+        return self
+
+    def counts(self):
+        """(cohorts x week offsets) active-user counts and cohort sizes"""
+        cohorts, cohort_codes = np.unique(self.cohort_week, return_inverse=True)
+        bit_matrix = np.unpackbits(
+            self.bitmaps.astype('<u8').view(np.uint8).reshape(-1, 8), axis=1, bitorder='little'
+        )[:, :self.max_weeks]
+        active = np.stack(
+            [np.bincount(cohort_codes, weights=bit_matrix[:, k], minlength=len(cohorts)) for k in range(self.max_weeks)],
+            axis=1
+        )
+        return cohorts, np.bincount(cohort_codes, minlength=len(cohorts)), active
+
+    def to_frame(self, n_weeks=None):
+        """Retention % per cohort; offsets not yet observable for a cohort are NaN"""
+        n_weeks = n_weeks or self.max_weeks
+        cohorts, sizes, active = self.counts()
+        retention = active[:, :n_weeks] / sizes[:, None] * 100
+        observable = (self.last_week - cohorts)[:, None] >= np.arange(n_weeks)[None, :]
+        retention = np.where(observable, retention, np.nan)
+        frame = pd.DataFrame(retention, columns=[f'week_{k}' for k in range(n_weeks)])
+        frame.insert(0, 'cohort_size', sizes)
+        frame.index = pd.Index(self.epoch_monday + (cohorts * 7).astype('timedelta64[D]'), name='cohort_week')
+        return frame
+
+
+# Build the (user, day) activity set from the event store
+_event_days = df_features['timestamp'].dt.tz_localize(None) if df_features['timestamp'].dt.tz is not None else df_features['timestamp']
+_event_days = _event_days.to_numpy().astype('datetime64[D]')
+_user_days = pd.DataFrame({'user_id': df_features['user_id'].to_numpy(), 'day': _event_days}).drop_duplicates()
+
+retention_matrix = RetentionMatrix().add_activity(_user_days['user_id'], _user_days['day'])
+cohort_retention_df = retention_matrix.to_frame()
+
+print(f"Users: {len(retention_matrix.user_index):,} | (user, day) activity pairs: {len(_user_days):,}")
+print(f"Signup-week cohorts: {len(cohort_retention_df):,}")
+
+_display = cohort_retention_df[['cohort_size'] + [f'week_{k}' for k in range(retention_display_weeks)]].copy()
+_display.index = _display.index.strftime('%Y-%m-%d')
+print(f"\n📊 RETENTION (% of cohort active in week N after signup):")
+print(_display.round(1).to_string())
+
+# Size-weighted average retention curve across cohorts
+_weights = cohort_retention_df['cohort_size'].to_numpy()[:, None]
+_retention_values = cohort_retention_df[[f'week_{k}' for k in range(retention_display_weeks)]].to_numpy()
+_observed = ~np.isnan(_retention_values)
+average_retention_curve = pd.Series(
+    np.nansum(_retention_values * _weights, axis=0) / np.maximum((_observed * _weights).sum(axis=0), 1),
+    index=[f'week_{k}' for k in range(retention_display_weeks)]
+)
+print(f"\n📉 AVERAGE RETENTION CURVE (cohort-size weighted):")
+for _week, _pct in average_retention_curve.items():
+    print(f"  {_week:8s}: {_pct:5.1f}%")
+
+print(f"\n💾 Output: cohort_retention_df with {len(cohort_retention_df):,} cohorts x {retention_matrix.max_weeks} week offsets")
+print(f"   Output: retention_matrix (call .add_activity(user_ids, days) to append new days)")
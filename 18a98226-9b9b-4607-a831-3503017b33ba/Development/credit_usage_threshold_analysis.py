@@ -9,20 +9,58 @@ print("=" * 80)
 # Segment by credit usage
 user_segments_credit = user_segments.copy()
 
-# Categorize by credit usage
-def categorize_credit_usage(credits):
-    if credits == 0:
-        return 'Zero Credits'
-    elif credits < 1:
-        return 'Low (<1)'
-    elif credits < 10:
-        return 'Medium (1-10)'
-    elif credits < 50:
-        return 'High (10-50)'
-    else:
-        return 'Very High (50+)'
-
-user_segments_credit['credit_category'] = user_segments_credit['total_credits_used'].apply(categorize_credit_usage)
+
+class CreditThresholdEngine:
+    """
+    Mean metrics above/below any credit threshold from one sort of the users.
+
+    Users are sorted by total credits once and every metric is turned into a
+    prefix sum, so the count and mean above a threshold is a searchsorted plus
+    two lookups: a full threshold curve over all distinct credit values costs
+    O(n log n) in total instead of one frame scan per threshold.
+    """
+
+    def __init__(self, credits, metrics):
+        order = np.argsort(credits, kind='stable')
+        self.credits = np.asarray(credits, dtype=np.float64)[order]
+        self.metric_names = list(metrics)
+        self.prefix = {
+            name: np.concatenate([[0.0], np.cumsum(np.asarray(values, dtype=np.float64)[order])])
+            for name, values in metrics.items()
+        }
+
+    def _summarize(self, thresholds, lo, hi):
+        users = hi - lo
+        summary = pd.DataFrame({'threshold': thresholds, 'users': users})
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for name in self.metric_names:
+                summary[f'avg_{name}'] = (self.prefix[name][hi] - self.prefix[name][lo]) / np.where(users > 0, users, np.nan)
+        return summary
+
+    def above(self, thresholds):
+        """Users with credits >= each threshold"""
+        thresholds = np.atleast_1d(np.asarray(thresholds, dtype=np.float64))
+        lo = np.searchsorted(self.credits, thresholds, side='left')
+        return self._summarize(thresholds, lo, np.full_like(lo, len(self.credits)))
+
+    def below(self, thresholds, inclusive=False):
+        """Users with credits < (or <= when inclusive) each threshold"""
+        thresholds = np.atleast_1d(np.asarray(thresholds, dtype=np.float64))
+        hi = np.searchsorted(self.credits, thresholds, side='right' if inclusive else 'left')
+        return self._summarize(thresholds, np.zeros_like(hi), hi)
+
+    def curve(self):
+        """Continuous threshold curve: stats above every distinct credit value"""
+        curve = self.above(np.unique(self.credits))
+        curve['pct_users_above'] = curve['users'] / max(len(self.credits), 1) * 100
+        return curve
+
+
+# Categorize by credit usage (vectorized; same bands as the activity index)
+_credits = user_segments_credit['total_credits_used']
+user_segments_credit['credit_category'] = np.select(
+    [_credits == 0, _credits < 1, _credits < 10, _credits < 50], credit_band_labels[:4], credit_band_labels[4]
+)
 
 # Analyze relationship between credits and success
 credit_analysis = user_segments_credit.groupby('credit_category').agg({
@@ -61,74 +99,105 @@ print("\n\n🎯 SUCCESS TIER DISTRIBUTION BY CREDIT USAGE (%):")
 print("=" * 80)
 print(credit_tier_crosstab.round(1).to_string())
 
+# Threshold engine: one sort, then cumulative sums for every threshold
+credit_engine = CreditThresholdEngine(
+    _credits.to_numpy(),
+    {'success_score': user_segments_credit['composite_success_score'], 'days_active': user_segments_credit['days_active']}
+)
+threshold_curve = credit_engine.curve()
+
 # Find optimal threshold
-users_with_credits = user_segments_credit[user_segments_credit['total_credits_used'] > 0]
+_positive_credits = _credits[_credits > 0]
 percentiles = [10, 25, 50, 75, 90, 95]
 
 print(f"\n\n📈 CREDIT USAGE PERCENTILES (Users with Credits > 0):")
 print("=" * 80)
-print(f"Total users with credits > 0: {len(users_with_credits):,} ({len(users_with_credits)/len(user_segments_credit)*100:.1f}%)")
+print(f"Total users with credits > 0: {len(_positive_credits):,} ({len(_positive_credits)/len(user_segments_credit)*100:.1f}%)")
 print(f"\nPercentile Distribution:")
 
-threshold_stats = []
-for _p in percentiles:
-    threshold = users_with_credits['total_credits_used'].quantile(_p/100)
-    users_above = (users_with_credits['total_credits_used'] >= threshold).sum()
-    avg_success_above = users_with_credits[users_with_credits['total_credits_used'] >= threshold]['composite_success_score'].mean()
-    avg_days_above = users_with_credits[users_with_credits['total_credits_used'] >= threshold]['days_active'].mean()
-    
-    print(f"  {_p:3d}th percentile: {threshold:8.2f} credits ({users_above:4,} users above, avg success score: {avg_success_above:.2f})")
-    
-    threshold_stats.append({
-        'percentile': _p,
-        'threshold': threshold,
-        'users_above': users_above,
-        'avg_success_score': avg_success_above,
-        'avg_days_active': avg_days_above
-    })
-
-threshold_df = pd.DataFrame(threshold_stats)
+# Percentile thresholds of positive credits are > 0, so "above" over all users equals above over users with credits
+threshold_df = credit_engine.above(_positive_credits.quantile(np.array(percentiles) / 100).to_numpy()).rename(
+    columns={'users': 'users_above'}
+)
+threshold_df.insert(0, 'percentile', percentiles)
+for _, _row in threshold_df.iterrows():
+    print(f"  {int(_row['percentile']):3d}th percentile: {_row['threshold']:8.2f} credits "
+          f"({int(_row['users_above']):4,} users above, avg success score: {_row['avg_success_score']:.2f})")
+
+print(f"\n📉 CONTINUOUS THRESHOLD CURVE ({len(threshold_curve):,} distinct credit values):")
+_curve_sample = threshold_curve.iloc[np.unique(np.linspace(0, len(threshold_curve) - 1, 10).astype(int))] if len(threshold_curve) else threshold_curve
+for _, _row in _curve_sample.iterrows():
+    print(f"  ≥{_row['threshold']:10.2f} credits: {int(_row['users']):6,} users ({_row['pct_users_above']:5.1f}%), "
+          f"avg success {_row['avg_success_score']:6.2f}, avg days {_row['avg_days_active']:5.2f}")
 
 # Identify key threshold that separates serious from casual users
 # Look at where success score significantly increases
 print(f"\n\n🎪 KEY CREDIT USAGE THRESHOLDS:")
 print("=" * 80)
 
-# Compare zero credits vs any credits
-zero_credit_success = user_segments_credit[user_segments_credit['total_credits_used'] == 0]['composite_success_score'].mean()
-any_credit_success = user_segments_credit[user_segments_credit['total_credits_used'] > 0]['composite_success_score'].mean()
+# Threshold segment sizes are unions of credit-band bitmaps from the activity index
+zero_credit_users = activity_index.count(activity_index.get('credit_band', 'Zero Credits'))
+any_credit_users = activity_index.count(activity_index.any_of('credit_band', credit_band_labels[1:]))
+one_credit_users = activity_index.count(activity_index.any_of('credit_band', credit_band_labels[2:]))
+ten_credit_users = activity_index.count(activity_index.any_of('credit_band', credit_band_labels[3:]))
+
+# Zero vs any credits, ≥1 and ≥10 all read from the engine
+_zero_stats = credit_engine.below(0, inclusive=True).iloc[0]
+_any_stats = credit_engine.above(np.nextafter(0, 1)).iloc[0]
+_one_stats = credit_engine.above(1).iloc[0]
+_ten_stats = credit_engine.above(10).iloc[0]
+zero_credit_success = _zero_stats['avg_success_score']
+any_credit_success = _any_stats['avg_success_score']
+one_credit_success = _one_stats['avg_success_score']
+ten_credit_success = _ten_stats['avg_success_score']
 
 print(f"\nZero Credits:")
-print(f"  Users: {(user_segments_credit['total_credits_used'] == 0).sum():,}")
+print(f"  Users: {zero_credit_users:,}")
 print(f"  Avg Success Score: {zero_credit_success:.2f}")
-print(f"  Avg Days Active: {user_segments_credit[user_segments_credit['total_credits_used'] == 0]['days_active'].mean():.2f}")
+print(f"  Avg Days Active: {_zero_stats['avg_days_active']:.2f}")
 
 print(f"\nAny Credits (>0):")
-print(f"  Users: {(user_segments_credit['total_credits_used'] > 0).sum():,}")
+print(f"  Users: {any_credit_users:,}")
 print(f"  Avg Success Score: {any_credit_success:.2f}")
-print(f"  Avg Days Active: {users_with_credits['days_active'].mean():.2f}")
+print(f"  Avg Days Active: {_any_stats['avg_days_active']:.2f}")
 print(f"  Success Score Lift: {((any_credit_success - zero_credit_success) / zero_credit_success * 100):.1f}%")
 
-# Analyze 1 credit threshold
-one_credit_success = user_segments_credit[user_segments_credit['total_credits_used'] >= 1]['composite_success_score'].mean()
-one_credit_users = (user_segments_credit['total_credits_used'] >= 1).sum()
-
 print(f"\n≥1 Credit (Serious Usage Threshold):")
 print(f"  Users: {one_credit_users:,}")
 print(f"  Avg Success Score: {one_credit_success:.2f}")
-print(f"  Avg Days Active: {user_segments_credit[user_segments_credit['total_credits_used'] >= 1]['days_active'].mean():.2f}")
+print(f"  Avg Days Active: {_one_stats['avg_days_active']:.2f}")
 print(f"  Success Score Lift vs Zero: {((one_credit_success - zero_credit_success) / zero_credit_success * 100):.1f}%")
 
-# Analyze 10 credit threshold (high engagement)
-ten_credit_success = user_segments_credit[user_segments_credit['total_credits_used'] >= 10]['composite_success_score'].mean()
-ten_credit_users = (user_segments_credit['total_credits_used'] >= 10).sum()
-
 print(f"\n≥10 Credits (Power User Threshold):")
 print(f"  Users: {ten_credit_users:,}")
 print(f"  Avg Success Score: {ten_credit_success:.2f}")
-print(f"  Avg Days Active: {user_segments_credit[user_segments_credit['total_credits_used'] >= 10]['days_active'].mean():.2f}")
+print(f"  Avg Days Active: {_ten_stats['avg_days_active']:.2f}")
 print(f"  Success Score Lift vs Zero: {((ten_credit_success - zero_credit_success) / zero_credit_success * 100):.1f}%")
 
+# Compound credit segments answered by bitmap AND/OR over the activity index
+print(f"\n\n🗂️ CREDIT SEGMENTS FROM THE ACTIVITY INDEX:")
+print("=" * 80)
+
+_used_credits = activity_index.any_of('credit_band', credit_band_labels[1:])
+_zero_credits = activity_index.get('credit_band', 'Zero Credits')
+_invoked_tool = activity_index.get('flag', 'invoked_tool')
+_week1_regular = activity_index.at_least('day_since_first', 3, values=range(7))
+credit_segment_queries = {
+    'Invoked a tool AND used credits': _invoked_tool & _used_credits,
+    'Invoked a tool AND zero credits': _invoked_tool & _zero_credits,
+    '≥3 days active in week 1 AND invoked a tool AND used credits': _week1_regular & _invoked_tool & _used_credits,
+    '≥3 days active in week 1 AND zero credits': _week1_regular & _zero_credits,
+    'Executed blocks AND zero credits': activity_index.get('event_category', 'execution') & _zero_credits,
+}
+for _tier in tier_col_order:
+    credit_segment_queries[f'{_tier} AND used credits'] = activity_index.get('tier', _tier) & _used_credits
+
+credit_segment_counts = pd.Series(
+    {_name: activity_index.count(_bitmap) for _name, _bitmap in credit_segment_queries.items()}, name='users'
+)
+for _name, _count in credit_segment_counts.items():
+    print(f"  {_name:62s}: {_count:6,} users ({_count / max(activity_index.n_users, 1) * 100:5.1f}%)")
+
 # Correlation between credits and other metrics
 print(f"\n\n📉 CREDIT USAGE CORRELATIONS:")
 print("=" * 80)
@@ -145,4 +214,6 @@ for _metric, _corr in correlations.items():
     print(f"  {_metric:25s}: r = {_corr:.3f}")
 
 print(f"\n💾 Output: credit_analysis with credit usage segmentation")
-print(f"   Output: threshold_df with {len(threshold_df)} threshold analyses")
\ No newline at end of file
+print(f"   Output: threshold_df with {len(threshold_df)} threshold analyses")
+print(f"   Output: threshold_curve with {len(threshold_curve):,} thresholds (credit_engine.above/below for any other)")
+print(f"   Output: credit_segment_counts with {len(credit_segment_counts)} bitmap segment queries")
\ No newline at end of file
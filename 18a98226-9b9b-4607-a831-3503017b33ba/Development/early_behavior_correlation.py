@@ -3,7 +3,7 @@ import numpy as np
 from scipy import stats
 
 # Analyze correlation between early behaviors and long-term success
-# Define "early" as first week (7 days)
+# Define "early" as the first 24 hours, 3 days and week after a user's first event
 
 # Get users with at least 7 days of data to measure early vs sustained
 sustained_users = user_segments[user_segments['time_span_days'] >= 7].copy()
@@ -13,50 +13,90 @@ print("=" * 80)
 print(f"\nAnalyzing {len(sustained_users):,} users with ≥7 days of activity")
 print(f"Total user base: {len(user_segments):,} users")
 
-# Calculate early activity rate (events in first week / days active in first week)
-# Using avg_events_per_day as proxy for activity intensity
-sustained_users['early_activity_intensity'] = sustained_users['avg_events_per_day']
-
-# Key metrics to correlate with success
+# Attach genuine early-window behaviour (first 24h / 3 days / week) from early_window_features
+sustained_users = sustained_users.merge(early_window_df, on='user_id', how='left')
+
+# Key metrics to correlate with success: each behaviour measured in every early window
+early_window_labels = {'24h': 'first 24h', '3d': 'first 3 days', '7d': 'first week'}
+early_behavior_labels = {
+    'events_per_active_day': 'Activity Intensity',
+    'event_types': 'Event Type Diversity',
+    'execution_rate': 'Execution Rate',
+    'executions': 'Executions',
+    'tool_invocations': 'Tool Usage',
+    'sessions': 'Sessions',
+    'active_days': 'Days Active',
+    'canvases': 'Canvas Exploration',
+    'messages': 'Agent Messages',
+}
 early_metrics = {
-    'avg_events_per_day': 'Early Activity Intensity',
-    'unique_event_types': 'Event Type Diversity',
-    'execution_event_rate': 'Execution Rate',
-    'event_diversity_score': 'Workflow Diversity',
-    'tool_invocation_count': 'Tool Usage',
-    'sessions_with_diverse_events': 'Complete Sessions',
-    'max_canvas_revisits': 'Canvas Revisit Pattern',
-    'unique_canvases': 'Canvas Exploration'
+    f'{_name}_{_window}': f'{_label} ({early_window_labels[_window]})'
+    for _window in early_windows for _name, _label in early_behavior_labels.items()
 }
 
+def pairwise_correlation_matrices(features, outcomes):
+    """
+    Pearson and Spearman matrices (features x outcomes) with p-values, as matrix products.
+
+    Missing values are handled with pairwise masks: every sum (n, Σx, Σy, Σx², Σy², Σxy)
+    is a product of masked, mean-shifted columns, so each (feature, outcome) pair uses
+    exactly the rows where both are present. Spearman is Pearson over ranks; each column
+    is ranked once (average ties) over its non-missing values, which is exact whenever the
+    pair keeps every row of both columns. Pairs that lose rows to the other column's
+    missing values are re-ranked on their joint mask. p-values are two-sided from the t
+    distribution with n - 2 degrees of freedom.
+    """
+    def pearson(x, y):
+        x_mask, y_mask = ~np.isnan(x), ~np.isnan(y)
+        x0 = np.where(x_mask, x - np.nanmean(x, axis=0), 0.0)
+        y0 = np.where(y_mask, y - np.nanmean(y, axis=0), 0.0)
+        x_mask, y_mask = x_mask.astype(np.float64), y_mask.astype(np.float64)
+        n = x_mask.T @ y_mask
+        sum_x, sum_y = x0.T @ y_mask, x_mask.T @ y0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = x0.T @ y0 - sum_x * sum_y / n
+            var_x = (x0 ** 2).T @ y_mask - sum_x ** 2 / n
+            var_y = x_mask.T @ (y0 ** 2) - sum_y ** 2 / n
+            r = np.clip(cov / np.sqrt(var_x * var_y), -1.0, 1.0)
+            dof = n - 2
+            t = r * np.sqrt(dof / np.maximum(1.0 - r ** 2, 1e-300))
+            p = np.where(dof > 0, 2 * stats.t.sf(np.abs(t), np.maximum(dof, 1)), np.nan)
+        return r, p, n
+
+    x = features.to_numpy(dtype=np.float64)
+    y = outcomes.to_numpy(dtype=np.float64)
+    pearson_r, pearson_p, n = pearson(x, y)
+    spearman_r, spearman_p, _ = pearson(
+        features.rank(method='average').to_numpy(dtype=np.float64), outcomes.rank(method='average').to_numpy(dtype=np.float64)
+    )
+    x_valid, y_valid = ~np.isnan(x), ~np.isnan(y)
+    partial = (n < x_valid.sum(axis=0)[:, None]) | (n < y_valid.sum(axis=0)[None, :])
+    for i, j in zip(*np.nonzero(partial)):
+        pair = x_valid[:, i] & y_valid[:, j]
+        if pair.sum() > 2:
+            spearman_r[i, j], spearman_p[i, j] = stats.spearmanr(x[pair, i], y[pair, j])
+    return {
+        name: pd.DataFrame(values, index=features.columns, columns=outcomes.columns)
+        for name, values in [('pearson_r', pearson_r), ('pearson_p', pearson_p), ('spearman_r', spearman_r),
+                             ('spearman_p', spearman_p), ('sample_size', n.astype(int))]
+    }
+
+
 # Calculate correlations with success metrics
 success_indicators = ['composite_success_score', 'days_active', 'weeks_active', 'total_credits_used']
 
 print(f"\n📊 CORRELATION WITH SUCCESS (Sustained Users Only):")
 print("=" * 80)
 
-correlation_results = []
-
-for metric, label in early_metrics.items():
-    for success_metric in success_indicators:
-        # Filter out zeros if needed for certain metrics
-        valid_data = sustained_users[[metric, success_metric]].dropna()
-        
-        if len(valid_data) > 10:
-            pearson_r, pearson_p = stats.pearsonr(valid_data[metric], valid_data[success_metric])
-            spearman_r, spearman_p = stats.spearmanr(valid_data[metric], valid_data[success_metric])
-            
-            correlation_results.append({
-                'early_behavior': label,
-                'success_metric': success_metric,
-                'pearson_r': pearson_r,
-                'pearson_p': pearson_p,
-                'spearman_r': spearman_r,
-                'spearman_p': spearman_p,
-                'sample_size': len(valid_data)
-            })
-
-correlation_df = pd.DataFrame(correlation_results)
+# One call correlates every early metric against every success indicator
+correlation_matrices = pairwise_correlation_matrices(
+    sustained_users[list(early_metrics)], sustained_users[success_indicators]
+)
+correlation_df = pd.concat(
+    {name: matrix.stack() for name, matrix in correlation_matrices.items()}, axis=1
+).rename_axis(['early_behavior', 'success_metric']).reset_index()
+correlation_df['early_behavior'] = correlation_df['early_behavior'].map(early_metrics)
+correlation_df = correlation_df[correlation_df['sample_size'] > 10].reset_index(drop=True)
 
 # Focus on composite success score correlations
 composite_corr = correlation_df[correlation_df['success_metric'] == 'composite_success_score'].copy()
@@ -64,9 +104,9 @@ composite_corr = composite_corr.sort_values('pearson_r', ascending=False)
 
 print("\n🎯 TOP PREDICTORS OF COMPOSITE SUCCESS SCORE:")
 print("-" * 80)
-for _, row in composite_corr.iterrows():
+for _, row in composite_corr.head(12).iterrows():
     sig = "***" if row['pearson_p'] < 0.001 else "**" if row['pearson_p'] < 0.01 else "*" if row['pearson_p'] < 0.05 else ""
-    print(f"{row['early_behavior']:30s}: r={row['pearson_r']:6.3f} {sig:3s} (p={row['pearson_p']:.4f}, n={row['sample_size']:,})")
+    print(f"{row['early_behavior']:40s}: r={row['pearson_r']:6.3f} {sig:3s} (p={row['pearson_p']:.4f}, n={row['sample_size']:,})")
 
 # Correlations with days active (sustained usage)
 days_corr = correlation_df[correlation_df['success_metric'] == 'days_active'].copy()
@@ -76,7 +116,7 @@ print("\n📆 TOP PREDICTORS OF SUSTAINED USAGE (Days Active):")
 print("-" * 80)
 for _, row in days_corr.head(8).iterrows():
     sig = "***" if row['pearson_p'] < 0.001 else "**" if row['pearson_p'] < 0.01 else "*" if row['pearson_p'] < 0.05 else ""
-    print(f"{row['early_behavior']:30s}: r={row['pearson_r']:6.3f} {sig:3s} (p={row['pearson_p']:.4f})")
+    print(f"{row['early_behavior']:40s}: r={row['pearson_r']:6.3f} {sig:3s} (p={row['pearson_p']:.4f})")
 
 # Credit usage correlation
 credit_corr = correlation_df[correlation_df['success_metric'] == 'total_credits_used'].copy()
@@ -86,13 +126,14 @@ print("\n💳 TOP PREDICTORS OF CREDIT USAGE (Serious Engagement):")
 print("-" * 80)
 for _, row in credit_corr.head(8).iterrows():
     sig = "***" if row['pearson_p'] < 0.001 else "**" if row['pearson_p'] < 0.01 else "*" if row['pearson_p'] < 0.05 else ""
-    print(f"{row['early_behavior']:30s}: r={row['pearson_r']:6.3f} {sig:3s} (p={row['pearson_p']:.4f})")
+    print(f"{row['early_behavior']:40s}: r={row['pearson_r']:6.3f} {sig:3s} (p={row['pearson_p']:.4f})")
 
-# Compare early behaviors across success tiers
-print("\n\n🎪 EARLY BEHAVIORS BY SUCCESS TIER:")
+# Compare first-week behaviors across success tiers
+print("\n\n🎪 FIRST-WEEK BEHAVIORS BY SUCCESS TIER:")
 print("=" * 80)
 
-tier_comparison = sustained_users.groupby('success_tier')[list(early_metrics.keys())].mean().round(2)
+_first_week_metrics = [_metric for _metric in early_metrics if _metric.endswith('_7d')]
+tier_comparison = sustained_users.groupby('success_tier')[_first_week_metrics].mean().round(2)
 tier_comparison = tier_comparison.reindex(['Power Users', 'Active Users', 'Regular Users', 'Casual Users', 'Trial Users'])
 
 # Rename columns for readability
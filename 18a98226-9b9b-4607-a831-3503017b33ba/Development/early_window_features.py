@@ -0,0 +1,85 @@
+import pandas as pd
+import numpy as np
+
+# Early-behaviour features over the first 24 hours, 3 days and week of every user
+print("⏳ EARLY WINDOW FEATURES")
+print("=" * 80)
+
+# Nested windows measured from each user's first event
+early_windows = {'24h': 1, '3d': 3, '7d': 7}
+early_execution_keywords = ['run', 'execute', 'block_', 'agent_']
+
+
+def compute_early_window_features(events, windows):
+    """
+    Counts, sums and distinct counts per user for every nested early window, in one pass.
+
+    `events` must be sorted by (user_id, timestamp). Each event gets the index of
+    the smallest window containing it (len(windows) when outside all of them);
+    per-(user, bucket) totals come from one bincount and a cumulative sum across
+    buckets turns them into nested-window totals. Distinct counts use the
+    first-occurrence trick: only the first (user, value) event adds 1, in the
+    bucket where the value was first seen, so the same cumulative sum yields
+    the number of distinct values inside each window.
+    """
+    user_codes, user_ids = pd.factorize(events['user_id'])
+    n_users, n_buckets = len(user_ids), len(windows) + 1
+    # Offsets through Timedelta, whatever the datetime unit (ns or pandas 3's us)
+    seconds = (events['timestamp'] - events['timestamp'].min()).dt.total_seconds().to_numpy()
+    first_seen = np.full(n_users, np.inf)
+    np.minimum.at(first_seen, user_codes, seconds)
+    offset_days = (seconds - first_seen[user_codes]) / 86400
+
+    window_names = list(windows)
+    buckets = np.searchsorted(np.array(list(windows.values()), dtype=np.float64), offset_days, side='left')
+    cell = user_codes * n_buckets + buckets
+
+    def nested_totals(weights):
+        totals = np.bincount(cell, weights=weights, minlength=n_users * n_buckets).reshape(n_users, n_buckets)
+        return np.cumsum(totals, axis=1)[:, :len(windows)]
+
+    def first_occurrence(values):
+        keys = pd.DataFrame({'user': user_codes, 'value': np.asarray(values)})
+        return (~keys.duplicated() & keys['value'].notna()).to_numpy(dtype=np.float64)
+
+    execution_mask = events['event'].str.contains('|'.join(early_execution_keywords), case=False, na=False)
+    totals = {
+        'events': nested_totals(None),
+        'executions': nested_totals(execution_mask.to_numpy(dtype=np.float64)),
+        'tool_invocations': nested_totals(events['prop_tool_name'].notna().to_numpy(dtype=np.float64)),
+        'messages': nested_totals(events['prop_message_id'].notna().to_numpy(dtype=np.float64)),
+        'credits_used': nested_totals(events['prop_credits_used'].fillna(0).to_numpy(dtype=np.float64)),
+        'active_days': nested_totals(first_occurrence(np.floor(offset_days))),
+        'sessions': nested_totals(first_occurrence(events['session_id'])),
+        'event_types': nested_totals(first_occurrence(events['event'])),
+        'canvases': nested_totals(first_occurrence(events['prop_$pathname'])),
+    }
+    with np.errstate(invalid='ignore', divide='ignore'):
+        totals['execution_rate'] = np.where(totals['events'] > 0, totals['executions'] / totals['events'], 0.0)
+        totals['events_per_active_day'] = np.where(
+            totals['active_days'] > 0, totals['events'] / totals['active_days'], 0.0
+        )
+
+    features = pd.DataFrame({'user_id': user_ids})
+    for w, window in enumerate(window_names):
+        for name, values in totals.items():
+            features[f'{name}_{window}'] = values[:, w]
+    return features
+
+
+early_window_df = compute_early_window_features(df_features, early_windows)
+early_window_feature_cols = [_col for _col in early_window_df.columns if _col != 'user_id']
+
+print(f"Users: {len(early_window_df):,} | Events scanned: {len(df_features):,} | "
+      f"Windows: {', '.join(early_windows)} | Features: {len(early_window_feature_cols)}")
+
+print(f"\n📋 MEDIAN PER USER BY WINDOW:")
+print("-" * 80)
+_window_medians = pd.DataFrame({
+    _window: early_window_df[[f'{_name}_{_window}' for _name in ['events', 'active_days', 'sessions', 'event_types',
+                                                                  'executions', 'tool_invocations']]].median().to_numpy()
+    for _window in early_windows
+}, index=['events', 'active_days', 'sessions', 'event_types', 'executions', 'tool_invocations'])
+print(_window_medians.round(1).to_string())
+
+print(f"\n💾 Output: early_window_df with {len(early_window_df):,} users x {len(early_window_feature_cols)} windowed features")
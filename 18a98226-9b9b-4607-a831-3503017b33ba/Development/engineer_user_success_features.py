@@ -1,6 +1,29 @@
+import contextlib
+import os
+import shutil
+import tempfile
 import pandas as pd
 import numpy as np
 
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+try:
+    from tools.parallel import run_in_pool
+except ImportError:  # outside this repository (e.g. inside Zerve): no process pool
+    def run_in_pool(fn, task_args, n_jobs):
+        return [fn(*args) for args in task_args]
+
+# Sub-stage timer injected by the headless runner (tools/run_canvas.py); a no-op on the canvas
+_profile_stage = globals().get('profile_stage', contextlib.nullcontext)
+
 # Parse timestamps
 df_features = filtered_df.copy()
 df_features['timestamp'] = pd.to_datetime(df_features['timestamp'], errors='coerce')
@@ -24,87 +47,242 @@ print(f"  4. End-to-end workflows (events per session, completeness)")
 print(f"  5. Serious usage (credits used, tool invocations)")
 print(f"\n" + "=" * 80)
 
+# ==================== SESSION RECONSTRUCTION ====================
+# Client session ids (prop_$session_id / prop_session_id) are often null. On the
+# (user, timestamp)-sorted array a new activity burst starts whenever the user
+# changes or the inactivity gap exceeds session_gap_minutes. Events without a
+# client id inherit the client session of their burst, otherwise the burst
+# itself becomes an inferred session, so no event is dropped from session stats.
+session_gap_minutes = float(os.environ.get('SESSION_GAP_MINUTES', '30'))
+
+
+def reconstruct_sessions(events, gap_minutes):
+    """(events sorted by user and timestamp with session_source/session_id, per-session stats)"""
+    events = events.sort_values(['user_id', 'timestamp'], kind='stable').reset_index(drop=True)
+
+    new_burst = (
+        events['user_id'].ne(events['user_id'].shift())
+        | (events['timestamp'].diff() > pd.Timedelta(minutes=gap_minutes))
+    )
+    burst_number = new_burst.cumsum()
+    client_session = events['prop_$session_id'].fillna(events['prop_session_id'])
+    burst_session = client_session.groupby(burst_number).ffill()
+    burst_session = burst_session.fillna(burst_session.groupby(burst_number).bfill())
+
+    events['session_source'] = np.select(
+        [client_session.notna(), burst_session.notna()], ['client', 'inherited'], default='inferred'
+    )
+    events['session_id'] = burst_session.fillna('inferred-' + burst_number.astype(str))
+
+    # Session durations and sizes in one grouped pass
+    sessions = events.groupby(['user_id', 'session_id'], sort=False).agg(
+        event_count=('event', 'size'),
+        unique_events=('event', 'nunique'),
+        session_start=('timestamp', 'min'),
+        session_end=('timestamp', 'max')
+    ).reset_index()
+    sessions['duration_minutes'] = (sessions['session_end'] - sessions['session_start']).dt.total_seconds() / 60
+    sessions['diverse_session'] = sessions['unique_events'] > 3
+    return events, sessions
+
+
+def summarize_sessions(sessions):
+    """Per-user session features, indexed by user_id"""
+    return sessions.groupby('user_id').agg(
+        avg_events_per_session=('event_count', 'mean'),
+        max_events_per_session=('event_count', 'max'),
+        unique_sessions=('session_id', 'size'),
+        sessions_with_diverse_events=('diverse_session', 'sum'),
+        avg_session_duration_minutes=('duration_minutes', 'mean'),
+        max_session_duration_minutes=('duration_minutes', 'max')
+    )
+
+
+with _profile_stage('session_reconstruction'):
+    df_features, session_stats = reconstruct_sessions(df_features, session_gap_minutes)
+    # Per-user session features, joined onto the event features below
+    user_session_features = summarize_sessions(session_stats)
+
+_session_source_share = df_features['session_source'].value_counts(normalize=True) * 100
+print(f"\n🧩 SESSION RECONSTRUCTION (inactivity gap: {session_gap_minutes:.0f} min)")
+print(f"  Events with client session id: {_session_source_share.get('client', 0):.1f}%")
+print(f"  Events inheriting a client session: {_session_source_share.get('inherited', 0):.1f}%")
+print(f"  Events in inferred sessions: {_session_source_share.get('inferred', 0):.1f}%")
+print(f"  Sessions reconstructed: {len(session_stats):,}")
+print(f"\n" + "=" * 80)
+
 # ==================== FEATURE ENGINEERING ====================
+# Per-user features are grouped aggregations over each user's events. With
+# FEATURE_SHARDS > 1 users are hash-partitioned into shard files on disk and every
+# shard is computed in its own process (a user's events always land in one shard,
+# so shard results simply concatenate). FEATURE_BACKEND=polars computes the same
+# features as one lazy Polars query (multithreaded group-by) instead; the pandas
+# implementation is the reference. Sharding is opt-in (FEATURE_SHARDS defaults to 1).
+feature_backend = os.environ.get('FEATURE_BACKEND', 'pandas')
+if feature_backend == 'polars' and pl is None:
+    print("⚠️ FEATURE_BACKEND=polars but polars is not installed; using pandas")
+    feature_backend = 'pandas'
+feature_shards = int(os.environ.get('FEATURE_SHARDS', 1))
+feature_shard_dir = os.environ.get('FEATURE_SHARD_DIR', 'feature_shards')
+feature_columns = ['user_id', 'timestamp', 'event', 'prop_$pathname', 'prop_credits_used', 'prop_credit_amount',
+                   'prop_tool_name', 'prop_message_id']
+feature_order = ['days_active', 'time_span_days', 'weeks_active', 'avg_events_per_day', 'unique_event_types',
+                 'event_diversity_score', 'total_events', 'execution_event_count', 'execution_event_rate',
+                 'max_canvas_revisits', 'unique_canvases', 'avg_events_per_session', 'max_events_per_session',
+                 'unique_sessions', 'sessions_with_diverse_events', 'avg_session_duration_minutes',
+                 'max_session_duration_minutes', 'total_credits_used', 'total_credit_amount', 'tool_invocation_count',
+                 'unique_tools_used', 'message_count']
+
+
+def compute_user_features(events):
+    """Event-derived features of every user in `events` (all of each user's events), indexed by user_id"""
+    timestamps = events['timestamp']
+    keyed = events.assign(
+        day=timestamps.dt.floor('D'),
+        year_week=timestamps.dt.year * 100 + timestamps.dt.isocalendar().week.astype('int64'),
+        is_execution=events['event'].str.contains('run|execute|block_|agent_', case=False, na=False),
+    )
+    features = keyed.groupby('user_id').agg(
+        days_active=('day', 'nunique'),
+        first_event=('timestamp', 'min'),
+        last_event=('timestamp', 'max'),
+        weeks_active=('year_week', 'nunique'),
+        unique_event_types=('event', 'nunique'),
+        total_events=('event', 'size'),
+        execution_event_count=('is_execution', 'sum'),
+        unique_canvases=('prop_$pathname', 'nunique'),
+        total_credits_used=('prop_credits_used', 'sum'),
+        total_credit_amount=('prop_credit_amount', 'sum'),
+        tool_invocation_count=('prop_tool_name', 'count'),
+        unique_tools_used=('prop_tool_name', 'nunique'),
+        message_count=('prop_message_id', 'count'),
+    )
+    features['time_span_days'] = (features.pop('last_event') - features.pop('first_event')).dt.total_seconds() / 86400
+    features['avg_events_per_day'] = features['total_events'] / features['days_active'].clip(lower=1)
+    features['execution_event_rate'] = features['execution_event_count'] / features['total_events'].clip(lower=1)
+
+    # Shannon entropy of each user's event mix (log2 with a 1e-10 guard)
+    event_counts = events.groupby(['user_id', 'event']).size()
+    event_probs = event_counts / event_counts.groupby(level='user_id').transform('sum')
+    features['event_diversity_score'] = (-(event_probs * np.log2(event_probs + 1e-10))).groupby(level='user_id').sum()
+
+    # Canvas re-runs: most events on any one canvas
+    canvas_counts = events.groupby(['user_id', 'prop_$pathname']).size()
+    features['max_canvas_revisits'] = canvas_counts.groupby(level='user_id').max().reindex(features.index, fill_value=0)
+    return features
+
+
+def write_frame(frame, path):
+    """Parquet when pyarrow is installed, pickle otherwise; returns the path written"""
+    if pyarrow is not None:
+        frame.to_parquet(path)
+    else:
+        path = path.replace('.parquet', '.pkl')
+        frame.to_pickle(path)
+    return path
+
+
+def read_frame(path):
+    return pd.read_parquet(path) if path.endswith('.parquet') else pd.read_pickle(path)
+
+
+def compute_feature_shard(shard_path):
+    """Worker: features of one shard file, written next to it; returns the result path"""
+    return write_frame(compute_user_features(read_frame(shard_path)), shard_path.replace('events-', 'features-'))
+
+
+def sharded_user_features(events, n_shards, shard_root):
+    """
+    compute_user_features over `n_shards` hash partitions of the users.
+
+    Every distinct user id is hashed once (a stable hash, so shard membership
+    does not depend on the process or the row order), events are written to
+    one file per shard, and the shards are computed in parallel processes that
+    hand their results back through files as well.
+    """
+    user_codes, user_ids = pd.factorize(events['user_id'])
+    user_shard = pd.util.hash_pandas_object(pd.Series(user_ids), index=False).to_numpy() % np.uint64(n_shards)
+    event_shard = user_shard.astype(np.int64)[user_codes]
+    order = np.argsort(event_shard, kind='stable')
+    boundaries = np.searchsorted(event_shard[order], np.arange(1, n_shards))
+
+    os.makedirs(shard_root, exist_ok=True)
+    shard_dir = tempfile.mkdtemp(prefix='user_features_', dir=shard_root)
+    try:
+        shard_paths = [
+            write_frame(events.iloc[rows], os.path.join(shard_dir, f'events-{shard:04d}-of-{n_shards:04d}.parquet'))
+            for shard, rows in enumerate(np.split(order, boundaries)) if len(rows)
+        ]
+        result_paths = run_in_pool(compute_feature_shard, [(path,) for path in shard_paths], n_shards)
+        return pd.concat([read_frame(path) for path in result_paths]).sort_index()
+    finally:
+        shutil.rmtree(shard_dir, ignore_errors=True)
+        with contextlib.suppress(OSError):
+            os.rmdir(shard_root)  # only when no other run is still using it
+
+
+def polars_user_features(events, sessions):
+    """compute_user_features plus the session features as a lazy Polars query"""
+    events = pl.from_pandas(events[feature_columns]).lazy()
+    is_execution = pl.col('event').str.contains('(?i)run|execute|block_|agent_').fill_null(False)
+    per_user = events.group_by('user_id').agg(
+        days_active=pl.col('timestamp').dt.date().n_unique(),
+        time_span_days=(pl.col('timestamp').max() - pl.col('timestamp').min()).dt.total_nanoseconds() / 1e9 / 86400,
+        weeks_active=pl.struct(year=pl.col('timestamp').dt.year(), week=pl.col('timestamp').dt.week()).n_unique(),
+        unique_event_types=pl.col('event').drop_nulls().n_unique(),
+        total_events=pl.len(),
+        execution_event_count=is_execution.sum(),
+        unique_canvases=pl.col('prop_$pathname').drop_nulls().n_unique(),
+        total_credits_used=pl.col('prop_credits_used').sum(),
+        total_credit_amount=pl.col('prop_credit_amount').sum(),
+        tool_invocation_count=pl.col('prop_tool_name').is_not_null().sum(),
+        unique_tools_used=pl.col('prop_tool_name').drop_nulls().n_unique(),
+        message_count=pl.col('prop_message_id').is_not_null().sum(),
+    )
+    # Shannon entropy of each user's event mix, as in the loop (log2 with a 1e-10 guard)
+    event_share = (events.drop_nulls('event').group_by('user_id', 'event').len()
+                   .with_columns(share=pl.col('len') / pl.col('len').sum().over('user_id')))
+    diversity = event_share.group_by('user_id').agg(
+        event_diversity_score=-(pl.col('share') * (pl.col('share') + 1e-10).log(2)).sum()
+    )
+    canvas_revisits = (events.drop_nulls('prop_$pathname').group_by('user_id', 'prop_$pathname').len()
+                       .group_by('user_id').agg(max_canvas_revisits=pl.col('len').max()))
+    session_features = pl.from_pandas(
+        sessions[['user_id', 'session_id', 'event_count', 'duration_minutes', 'diverse_session']]
+    ).lazy().group_by('user_id').agg(
+        avg_events_per_session=pl.col('event_count').mean(),
+        max_events_per_session=pl.col('event_count').max(),
+        unique_sessions=pl.len(),
+        sessions_with_diverse_events=pl.col('diverse_session').sum(),
+        avg_session_duration_minutes=pl.col('duration_minutes').mean(),
+        max_session_duration_minutes=pl.col('duration_minutes').max(),
+    )
+    features = (
+        per_user.join(diversity, on='user_id', how='left')
+        .join(canvas_revisits, on='user_id', how='left')
+        .join(session_features, on='user_id', how='left')
+        .with_columns(
+            avg_events_per_day=pl.col('total_events') / pl.max_horizontal(pl.col('days_active'), 1),
+            execution_event_rate=pl.col('execution_event_count') / pl.max_horizontal(pl.col('total_events'), 1),
+            max_canvas_revisits=pl.col('max_canvas_revisits').fill_null(0),
+        )
+        .select('user_id', *feature_order)
+        .sort('user_id')
+        .collect()
+    )
+    return features.with_columns(pl.col(pl.UInt32, pl.UInt64).cast(pl.Int64)).to_pandas()
+
 
-# Group by user
-user_features = []
-
-for user_id, user_df in df_features.groupby('user_id'):
-    features = {'user_id': user_id}
-    
-    # === 1. SUSTAINED USAGE ===
-    # Days active
-    features['days_active'] = user_df['timestamp'].dt.date.nunique()
-    
-    # Time span between first and last event (in days)
-    first_event = user_df['timestamp'].min()
-    last_event = user_df['timestamp'].max()
-    features['time_span_days'] = (last_event - first_event).total_seconds() / 86400
-    
-    # Weekly activity pattern - number of unique weeks active
-    user_df_copy = user_df.copy()
-    user_df_copy['week'] = user_df_copy['timestamp'].dt.isocalendar().week
-    user_df_copy['year'] = user_df_copy['timestamp'].dt.year
-    features['weeks_active'] = len(user_df_copy.groupby(['year', 'week']).size())
-    
-    # Average events per active day
-    features['avg_events_per_day'] = len(user_df) / max(features['days_active'], 1)
-    
-    # === 2. WORKFLOW DEPTH ===
-    # Unique event types per user
-    features['unique_event_types'] = user_df['event'].nunique()
-    
-    # Event diversity score (Shannon entropy)
-    event_counts = user_df['event'].value_counts()
-    event_probs = event_counts / event_counts.sum()
-    features['event_diversity_score'] = -np.sum(event_probs * np.log2(event_probs + 1e-10))
-    
-    # Total events
-    features['total_events'] = len(user_df)
-    
-    # === 3. REPRODUCIBILITY ===
-    # Execution-related events (block runs, code execution)
-    execution_keywords = ['run', 'execute', 'block_', 'agent_']
-    execution_events = user_df[user_df['event'].str.contains('|'.join(execution_keywords), case=False, na=False)]
-    features['execution_event_count'] = len(execution_events)
-    features['execution_event_rate'] = len(execution_events) / max(len(user_df), 1)
-    
-    # Canvas re-runs (multiple events on same canvas)
-    canvas_counts = user_df['prop_$pathname'].value_counts()
-    features['max_canvas_revisits'] = canvas_counts.max() if len(canvas_counts) > 0 else 0
-    features['unique_canvases'] = user_df['prop_$pathname'].nunique()
-    
-    # === 4. END-TO-END WORKFLOWS ===
-    # Consolidate session ID
-    user_df_session = user_df.copy()
-    user_df_session['session_id'] = user_df_session['prop_$session_id'].fillna(user_df_session['prop_session_id'])
-    
-    # Events per session
-    session_event_counts = user_df_session[user_df_session['session_id'].notna()].groupby('session_id').size()
-    features['avg_events_per_session'] = session_event_counts.mean() if len(session_event_counts) > 0 else 0
-    features['max_events_per_session'] = session_event_counts.max() if len(session_event_counts) > 0 else 0
-    features['unique_sessions'] = user_df_session['session_id'].nunique()
-    
-    # Session completeness - sessions with multiple event types
-    session_diversity = user_df_session[user_df_session['session_id'].notna()].groupby('session_id')['event'].nunique()
-    features['sessions_with_diverse_events'] = (session_diversity > 3).sum()
-    
-    # === 5. SERIOUS USAGE ===
-    # Total credits used
-    features['total_credits_used'] = user_df['prop_credits_used'].sum()
-    features['total_credit_amount'] = user_df['prop_credit_amount'].sum()
-    
-    # Tool invocation counts
-    features['tool_invocation_count'] = user_df['prop_tool_name'].notna().sum()
-    features['unique_tools_used'] = user_df['prop_tool_name'].nunique()
-    
-    # Message/interaction count
-    features['message_count'] = user_df['prop_message_id'].notna().sum()
-    
-    user_features.append(features)
-
-# Create feature dataframe
-user_success_df = pd.DataFrame(user_features)
+if feature_backend == 'polars':
+    with _profile_stage('per_user_polars'):
+        user_success_df = polars_user_features(df_features, session_stats)
+else:
+    with _profile_stage('per_user_features'):
+        if feature_shards > 1:
+            user_event_features = sharded_user_features(df_features[feature_columns], feature_shards, feature_shard_dir)
+        else:
+            user_event_features = compute_user_features(df_features[feature_columns])
+    user_success_df = user_event_features.join(user_session_features)[feature_order].rename_axis('user_id').reset_index()
 
 # Handle any NaN/inf values
 user_success_df = user_success_df.replace([np.inf, -np.inf], np.nan)
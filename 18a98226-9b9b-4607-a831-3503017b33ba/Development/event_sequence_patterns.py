@@ -1,7 +1,13 @@
+import os
 import pandas as pd
 import numpy as np
 from collections import Counter
 
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
 # Analyze event sequence patterns to identify end-to-end workflows
 print("🔄 EVENT SEQUENCE PATTERN ANALYSIS")
 print("=" * 80)
@@ -19,22 +25,162 @@ user_event_sequences = user_event_sequences.sort_values(['user_id', 'timestamp']
 print(f"Analyzing {len(active_power_users):,} high-performing users")
 print(f"Total events: {len(user_event_sequences):,}")
 
-# Extract common event patterns (2-grams and 3-grams)
-sequence_patterns = []
-
-for user_id, user_events in user_event_sequences.groupby('user_id'):
-    events = user_events['event'].tolist()
-    
-    # Skip users with very few events
-    if len(events) < 3:
-        continue
-    
-    # 2-gram patterns
-    for _i in range(len(events) - 1):
-        sequence_patterns.append((events[_i], events[_i + 1]))
-
-# Count pattern frequencies
-pattern_counts = Counter(sequence_patterns)
+# ==================== N-GRAM MINING ENGINE ====================
+# N-grams are counted directly over integer-coded, (user, timestamp)-sorted event
+# arrays: consecutive codes are combined into one int64 key per window, windows that
+# cross a user boundary are masked out, and keys are counted per chunk so memory is
+# bounded by the chunk size. 'sketch' mode swaps exact counting for a Count-Min
+# sketch with a bounded heavy-hitter candidate set for very long tails.
+ngram_sizes = (2, 3, 4)
+success_tiers = ['Power Users', 'Active Users', 'Regular Users', 'Casual Users', 'Trial Users']
+ngram_top_k = 30
+ngram_mode = 'exact'            # 'exact' or 'sketch'
+ngram_chunk_size = 5_000_000    # n-gram windows processed per chunk
+ngram_min_user_events = 3       # skip users with very few events
+sketch_width = 2 ** 20
+sketch_depth = 4
+
+
+class CountMinTopK:
+    """Count-Min sketch that keeps a bounded set of heavy-hitter candidate keys"""
+
+    def __init__(self, top_k, width=sketch_width, depth=sketch_depth, seed=42):
+        rng = np.random.default_rng(seed)
+        self.top_k = top_k
+        self.capacity = top_k * 8
+        self.shift = np.uint64(64 - int(np.log2(width)))
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        # Odd multipliers for multiply-shift hashing
+        self.hash_a = rng.integers(1, 2 ** 63, size=depth, dtype=np.uint64) | np.uint64(1)
+        self.hash_b = rng.integers(0, 2 ** 63, size=depth, dtype=np.uint64)
+        self.candidates = np.empty(0, dtype=np.int64)
+
+    def _buckets(self, keys, row):
+        hashed = keys.astype(np.uint64) * self.hash_a[row] + self.hash_b[row]
+        return (hashed >> self.shift).astype(np.int64)
+
+    def estimate(self, keys):
+        return np.min([self.table[row, self._buckets(keys, row)] for row in range(len(self.table))], axis=0)
+
+    def update(self, keys):
+        if len(keys) == 0:
+            return
+        unique_keys, counts = np.unique(keys, return_counts=True)
+        for row in range(len(self.table)):
+            np.add.at(self.table[row], self._buckets(unique_keys, row), counts)
+        pool = np.union1d(self.candidates, unique_keys)
+        estimates = self.estimate(pool)
+        if len(pool) > self.capacity:
+            pool = pool[np.argpartition(-estimates, self.capacity)[:self.capacity]]
+        self.candidates = pool
+
+    def most_common(self):
+        estimates = self.estimate(self.candidates)
+        order = np.argsort(-estimates, kind='stable')[:self.top_k]
+        return self.candidates[order], estimates[order]
+
+
+def iter_ngram_keys(event_codes, user_codes, eligible, n, vocab_size, chunk_size=ngram_chunk_size):
+    """Yield int64 n-gram keys chunk by chunk, skipping windows that span two users or hold a missing (-1) event"""
+    if vocab_size ** n >= 2 ** 63:
+        raise ValueError(f"Vocabulary of {vocab_size:,} events is too large to key {n}-grams in int64")
+    n_windows = len(event_codes) - n + 1
+    for start in range(0, max(n_windows, 0), chunk_size):
+        stop = min(start + chunk_size, n_windows)
+        valid = (user_codes[start:stop] == user_codes[start + n - 1:stop + n - 1]) & eligible[start:stop]
+        keys = np.zeros(stop - start, dtype=np.int64)
+        for offset in range(n):
+            codes = event_codes[start + offset:stop + offset]
+            valid &= codes >= 0
+            keys = keys * vocab_size + codes
+        yield keys[valid]
+
+
+def ngram_counts(event_codes, user_codes, eligible, n, vocab_size):
+    """Exact (keys, counts) of every n-gram starting at an eligible position, keys ascending"""
+    partial_keys, partial_counts = [], []
+    for keys in iter_ngram_keys(event_codes, user_codes, eligible, n, vocab_size):
+        if vocab_size ** n <= 2 ** 22:
+            chunk_counts = np.bincount(keys, minlength=vocab_size ** n)
+            chunk_keys = np.flatnonzero(chunk_counts)
+            chunk_counts = chunk_counts[chunk_keys]
+        else:
+            chunk_keys, chunk_counts = np.unique(keys, return_counts=True)
+        partial_keys.append(chunk_keys)
+        partial_counts.append(chunk_counts)
+    return merge_ngram_counts(list(zip(partial_keys, partial_counts)))
+
+
+def merge_ngram_counts(partials):
+    """Sum (keys, counts) pairs counted over disjoint windows (chunks, or partitions of the users)"""
+    if not partials:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    keys, inverse = np.unique(np.concatenate([keys for keys, _ in partials]), return_inverse=True)
+    counts = np.bincount(inverse, weights=np.concatenate([counts for _, counts in partials]), minlength=len(keys))
+    return keys, counts.astype(np.int64)
+
+
+def top_ngrams(keys, counts, top_k=ngram_top_k):
+    """The top_k (keys, counts) by count; ties keep ascending key order"""
+    order = np.argsort(-counts, kind='stable')[:top_k]
+    return keys[order], counts[order]
+
+
+def count_ngrams(event_codes, user_codes, eligible, n, vocab_size, top_k=ngram_top_k, mode=ngram_mode):
+    """Return the top_k (keys, counts) for n-grams starting at eligible positions"""
+    if mode == 'sketch':
+        sketch = CountMinTopK(top_k)
+        for keys in iter_ngram_keys(event_codes, user_codes, eligible, n, vocab_size):
+            sketch.update(keys)
+        return sketch.most_common()
+    return top_ngrams(*ngram_counts(event_codes, user_codes, eligible, n, vocab_size), top_k)
+
+
+def decode_ngram(key, n, vocab):
+    """Turn an int64 n-gram key back into a tuple of event names"""
+    codes = []
+    for _ in range(n):
+        key, code = divmod(int(key), len(vocab))
+        codes.append(vocab[code])
+    return tuple(reversed(codes))
+
+
+# Integer-code the (user, timestamp)-sorted event store once, across all tiers. The
+# vocabulary is sorted, so keys (and the order of tied counts) do not depend on row order
+ngram_events = df_features[['user_id', 'timestamp', 'event']].sort_values(['user_id', 'timestamp'], kind='stable')
+ngram_event_codes, ngram_vocab = pd.factorize(ngram_events['event'], sort=True)
+ngram_user_codes, ngram_users = pd.factorize(ngram_events['user_id'])
+ngram_event_codes = ngram_event_codes.astype(np.int64)
+_user_tier_codes = pd.Categorical(
+    user_segments.set_index('user_id')['success_tier'].reindex(ngram_users), categories=success_tiers
+).codes
+_event_tier_codes = _user_tier_codes[ngram_user_codes]
+# Missing events stay coded -1, and iter_ngram_keys drops every window that holds one
+ngram_eligible = np.bincount(ngram_user_codes)[ngram_user_codes] >= ngram_min_user_events
+ngram_vocab = list(ngram_vocab)
+
+ngram_results = []
+for _tier_code, _tier in enumerate(success_tiers):
+    for _n in ngram_sizes:
+        _keys, _counts = count_ngrams(
+            ngram_event_codes, ngram_user_codes, ngram_eligible & (_event_tier_codes == _tier_code),
+            _n, len(ngram_vocab)
+        )
+        for _rank, (_key, _count) in enumerate(zip(_keys, _counts), 1):
+            ngram_results.append({
+                'success_tier': _tier,
+                'n': _n,
+                'rank': _rank,
+                'pattern': decode_ngram(_key, _n, ngram_vocab),
+                'count': int(_count),
+            })
+ngram_df = pd.DataFrame(ngram_results, columns=['success_tier', 'n', 'rank', 'pattern', 'count'])
+
+# Exact counts of every 2-gram across high-performing users
+_pair_keys, _pair_counts = ngram_counts(
+    ngram_event_codes, ngram_user_codes, ngram_eligible & (_event_tier_codes <= 1), 2, len(ngram_vocab)
+)
+pattern_counts = Counter({decode_ngram(_key, 2, ngram_vocab): int(_count) for _key, _count in zip(_pair_keys, _pair_counts)})
 top_patterns = pattern_counts.most_common(30)
 
 print(f"\n🎯 TOP 30 EVENT SEQUENCE PATTERNS (2-grams):")
@@ -49,6 +195,13 @@ for rank, (pattern, count) in enumerate(top_patterns, 1):
     e2 = event2[:37] + '...' if len(event2) > 40 else event2
     print(f"{rank:<6}{e1:<40}{e2:<40}{count:>8,}")
 
+print(f"\n🧬 TOP N-GRAMS BY SUCCESS TIER ({ngram_mode} counting):")
+print("=" * 80)
+for (_tier, _n), _tier_ngrams in ngram_df[ngram_df['rank'] <= 3].groupby(['success_tier', 'n'], sort=False):
+    print(f"\n{_tier} — {_n}-grams:")
+    for _, _row in _tier_ngrams.iterrows():
+        print(f"  {' → '.join(_row['pattern'])[:70]:<70}{_row['count']:>8,}")
+
 # Identify workflow indicators
 workflow_keywords = {
     'data_loading': ['load', 'import', 'read', 'fetch', 'query'],
@@ -69,23 +222,73 @@ def categorize_event(event_name):
                 return category
     return 'other'
 
-user_event_sequences['event_category'] = user_event_sequences['event'].apply(categorize_event)
+# FEATURE_BACKEND=polars builds workflow_df and session_event_patterns as lazy Polars
+# queries; the pandas implementation below is the reference
+feature_backend = os.environ.get('FEATURE_BACKEND', 'pandas')
+if feature_backend == 'polars' and pl is None:
+    print("⚠️ FEATURE_BACKEND=polars but polars is not installed; using pandas")
+    feature_backend = 'pandas'
 
-# Analyze workflow completeness - users who show end-to-end patterns
-workflow_progression_patterns = []
 
-for user_id, user_events in user_event_sequences.groupby('user_id'):
-    categories = user_events['event_category'].unique()
-    workflow_progression_patterns.append({
-        'user_id': user_id,
-        'has_execution': 'execution' in categories,
-        'has_visualization': 'visualization' in categories,
-        'has_analysis': 'analysis' in categories,
-        'category_count': len([c for c in categories if c != 'other']),
-        'categories': set(categories)
-    })
+def polars_workflow_tables(sequences):
+    """(workflow_df, session_event_patterns) from the high-performer events, matching the pandas implementation"""
+    category_map = {name: categorize_event(name) for name in sequences['event'].unique()}
+    events = pl.from_pandas(sequences[['user_id', 'session_id', 'event']]).lazy().with_columns(
+        event_category=pl.col('event').replace_strict(category_map, return_dtype=pl.String)
+    )
+    workflows = (
+        events.group_by('user_id').agg(categories=pl.col('event_category').unique())
+        .with_columns(
+            has_execution=pl.col('categories').list.contains('execution'),
+            has_visualization=pl.col('categories').list.contains('visualization'),
+            has_analysis=pl.col('categories').list.contains('analysis'),
+            category_count=pl.col('categories').list.set_difference(['other']).list.len().cast(pl.Int64),
+        )
+        .select('user_id', 'has_execution', 'has_visualization', 'has_analysis', 'category_count', 'categories')
+        .sort('user_id')
+    )
+    sessions = (
+        events.group_by('user_id', 'session_id').agg(
+            event_count=pl.col('event').count(),
+            unique_events=pl.col('event').drop_nulls().n_unique(),
+            workflow_categories=pl.col('event_category').filter(pl.col('event_category') != 'other').n_unique(),
+        )
+        .sort('user_id', 'session_id')
+    )
+    workflows, sessions = pl.collect_all([workflows, sessions])
+    workflows = workflows.to_pandas()
+    workflows['categories'] = workflows['categories'].map(set)
+    return workflows, sessions.with_columns(pl.col(pl.UInt32, pl.UInt64).cast(pl.Int64)).to_pandas()
 
-workflow_df = pd.DataFrame(workflow_progression_patterns)
+
+if feature_backend == 'polars':
+    workflow_df, session_event_patterns = polars_workflow_tables(user_event_sequences)
+else:
+    user_event_sequences['event_category'] = user_event_sequences['event'].apply(categorize_event)
+
+    # Analyze workflow completeness - users who show end-to-end patterns
+    workflow_progression_patterns = []
+
+    for user_id, user_events in user_event_sequences.groupby('user_id'):
+        categories = user_events['event_category'].unique()
+        workflow_progression_patterns.append({
+            'user_id': user_id,
+            'has_execution': 'execution' in categories,
+            'has_visualization': 'visualization' in categories,
+            'has_analysis': 'analysis' in categories,
+            'category_count': len([c for c in categories if c != 'other']),
+            'categories': set(categories)
+        })
+
+    workflow_df = pd.DataFrame(workflow_progression_patterns)
+
+    # Session-level analysis - events per session patterns (reconstructed sessions)
+    session_event_patterns = user_event_sequences.groupby(['user_id', 'session_id']).agg({
+        'event': ['count', 'nunique'],
+        'event_category': lambda x: len(set(x) - {'other'})
+    }).reset_index()
+
+    session_event_patterns.columns = ['user_id', 'session_id', 'event_count', 'unique_events', 'workflow_categories']
 
 # Calculate workflow completeness scores
 complete_workflows = workflow_df[
@@ -112,16 +315,6 @@ for combo, count in combination_counts.most_common(15):
         pct = count / len(workflow_df) * 100
         print(f"{combo_str:50s}: {count:5,} users ({pct:5.1f}%)")
 
-# Session-level analysis - events per session patterns
-session_event_patterns = user_event_sequences[
-    user_event_sequences['prop_$session_id'].notna()
-].groupby(['user_id', 'prop_$session_id']).agg({
-    'event': ['count', 'nunique'],
-    'event_category': lambda x: len(set(x) - {'other'})
-}).reset_index()
-
-session_event_patterns.columns = ['user_id', 'session_id', 'event_count', 'unique_events', 'workflow_categories']
-
 print(f"\n\n📊 SESSION-LEVEL WORKFLOW PATTERNS:")
 print("=" * 80)
 print(f"Sessions analyzed: {len(session_event_patterns):,}")
@@ -137,4 +330,5 @@ print(f"  Sessions with 2+ categories: {(session_event_patterns['workflow_catego
 print(f"  Sessions with 3+ categories: {(session_event_patterns['workflow_categories'] >= 3).sum():,} ({(session_event_patterns['workflow_categories'] >= 3).mean()*100:.1f}%)")
 
 print(f"\n💾 Output: workflow_df with {len(workflow_df):,} user workflow patterns")
+print(f"   Output: ngram_df with top {ngram_top_k} {'/'.join(map(str, ngram_sizes))}-grams for every success tier")
 print(f"   Output: session_event_patterns with {len(session_event_patterns):,} session analyses")
\ No newline at end of file
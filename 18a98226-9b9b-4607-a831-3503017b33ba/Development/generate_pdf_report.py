@@ -1,11 +1,47 @@
-import matplotlib.pyplot as plt
+import os
+import dis
+import hashlib
+import io
+import json
+import pickle
+import tempfile
+import time
+import types
+import matplotlib
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_pdf import PdfPages
 import pandas as pd
 import numpy as np
+from dataclasses import asdict, dataclass, field, fields, is_dataclass
 from datetime import datetime
 
+try:
+    from pypdf import PdfWriter
+except ImportError:
+    PdfWriter = None
+
+try:
+    from tools.parallel import run_in_pool
+except ImportError:  # outside this repository (e.g. inside Zerve): no process pool
+    def run_in_pool(fn, task_args, n_jobs):
+        return [fn(*args) for args in task_args]
+
 # PDF Report Generation
-report_filename = f'zerve_user_success_analysis_report_{datetime.now().strftime("%Y%m%d")}.pdf'
+# Every page is built by its own function into a standalone Figure, so pages can
+# be rendered concurrently in forked workers (one figure per worker, drawn with
+# the PDF backend) and merged afterwards; pages already built by the
+# visualisation blocks are saved as they are instead of being redrawn.
+# Rendered pages are cached under a hash of their template and input data, so
+# a refresh only redraws the pages whose inputs changed. The cache lives in the
+# system temp directory unless REPORT_PAGE_CACHE_DIR points elsewhere; being
+# content-addressed it is shared by every run, and renders are only evicted once
+# no run has used them for REPORT_PAGE_CACHE_MAX_AGE_DAYS.
+report_date = datetime.now().date()
+report_filename = f'zerve_user_success_analysis_report_{report_date.strftime("%Y%m%d")}.pdf'
+report_jobs = int(os.environ.get('REPORT_JOBS', os.cpu_count() or 1))
+report_page_cache_dir = os.environ.get('REPORT_PAGE_CACHE_DIR',
+                                       os.path.join(tempfile.gettempdir(), 'zerve_report_page_cache'))
+report_page_cache_max_age_days = float(os.environ.get('REPORT_PAGE_CACHE_MAX_AGE_DAYS', 7))
 
 # Zerve design system colors
 bg_color = '#1D1D20'
@@ -16,14 +52,150 @@ highlight = '#ffd400'
 success_color = '#17b26a'
 warning_color = '#f04438'
 
-# Convert timestamps for date range calculation - use ISO8601 format
-filtered_df_ts = filtered_df.copy()
-filtered_df_ts['timestamp'] = pd.to_datetime(filtered_df_ts['timestamp'], format='ISO8601')
+report_snapshot_dir = os.environ.get('REPORT_SNAPSHOT_DIR', 'report_snapshot')
+report_from_snapshot = os.environ.get('REPORT_FROM_SNAPSHOT')  # snapshot directory to rebuild from
+
+
+@dataclass
+class ReportSnapshot:
+    """
+    Every number, label and table the report quotes, looked up by name.
 
-with PdfPages(report_filename) as pdf:
-    # ========== PAGE 1: TITLE & EXECUTIVE SUMMARY ==========
-    fig = plt.figure(figsize=(11, 8.5))
+    Built once from the analysis outputs (or loaded from disk), so the pages do
+    not depend on the row order of upstream frames and the report can be
+    rebuilt from a saved snapshot without re-running any analysis.
+    """
+    n_users: int
+    n_events: int
+    first_event_date: str
+    last_event_date: str
+    date_range_days: int
+    tier_order: list
+    tier_user_counts: dict
+    credit_order: list
+    credit_user_counts: dict
+    credit_success_means: dict
+    zero_credit_success: float
+    any_credit_success: float
+    threshold_curve: list                 # rows of percentile, threshold, users_above, avg_success_score
+    any_credit_lift_ci: dict              # estimate, ci_low, ci_high, unstable
+    bootstrap_replicates: int
+    bootstrap_estimates: int
+    bootstrap_unstable: int
+    success_correlations: dict            # early metric -> r with composite_success_score
+    active_power_users: int
+    mean_success_score: float
+    mean_days_active: float
+    median_days_active: float
+    churned_users: int
+    churn_rate_pct: float
+    rf_test_acc: float
+    rf_auc: float
+    workflow_labels: list
+    workflow_share_pct: dict
+    complete_workflow_pct: float
+    sustained_mean_days_active: float
+    figure_names: list = field(default_factory=list)
+
+    def threshold_at(self, percentile):
+        """Threshold-curve row of a credit percentile"""
+        return next(row for row in self.threshold_curve if row['percentile'] == percentile)
+
+    def save(self, directory, figures):
+        """Write the snapshot as JSON and the prebuilt figures as a pickle next to it"""
+        os.makedirs(directory, exist_ok=True)
+        self.figure_names = list(figures)
+        with open(os.path.join(directory, 'report_snapshot.json'), 'w', encoding='utf-8') as handle:
+            json.dump(asdict(self), handle, indent=2)
+        with open(os.path.join(directory, 'report_figures.pkl'), 'wb') as handle:
+            pickle.dump(figures, handle, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, directory):
+        """(snapshot, {page name: prebuilt figure}) saved by `save`"""
+        with open(os.path.join(directory, 'report_snapshot.json'), encoding='utf-8') as handle:
+            snapshot = cls(**json.load(handle))
+        with open(os.path.join(directory, 'report_figures.pkl'), 'rb') as handle:
+            figures = pickle.load(handle)
+        return snapshot, figures
+
+
+def build_report_snapshot():
+    """Collect the report's inputs from the analysis outputs by label, never by position"""
+    timestamps = pd.to_datetime(filtered_df['timestamp'], format='ISO8601')
+    tier_counts = tier_stats['user_count'].reindex(tier_order).fillna(0)
+    credit_counts = user_segments_credit['credit_category'].value_counts().reindex(credit_order, fill_value=0)
+    lift = bootstrap_ci_df[
+        (bootstrap_ci_df['statistic'] == 'success lift % vs zero') & (bootstrap_ci_df['group'] == 'credits: any (>0)')
+    ].iloc[0]
+    workflow_share = workflow_dist.reindex(workflow_labels) / workflow_dist.sum() * 100
+    return ReportSnapshot(
+        n_users=len(user_segments),
+        n_events=len(filtered_df),
+        first_event_date=timestamps.min().strftime('%Y-%m-%d'),
+        last_event_date=timestamps.max().strftime('%Y-%m-%d'),
+        date_range_days=int((timestamps.max() - timestamps.min()).days),
+        tier_order=list(tier_order),
+        tier_user_counts={tier: int(count) for tier, count in tier_counts.items()},
+        credit_order=list(credit_order),
+        credit_user_counts={category: int(count) for category, count in credit_counts.items()},
+        credit_success_means={category: float(credit_analysis['composite_success_score_mean'].get(category, np.nan))
+                              for category in credit_order},
+        zero_credit_success=float(zero_credit_success),
+        any_credit_success=float(any_credit_success),
+        threshold_curve=[
+            {key: float(row[key]) for key in ['percentile', 'threshold', 'users_above', 'avg_success_score']}
+            for _, row in threshold_df.iterrows()
+        ],
+        any_credit_lift_ci={'estimate': float(lift['estimate']), 'ci_low': float(lift['ci_low']),
+                            'ci_high': float(lift['ci_high']), 'unstable': bool(lift['unstable'])},
+        bootstrap_replicates=int(bootstrap_replicates),
+        bootstrap_estimates=len(bootstrap_ci_df),
+        bootstrap_unstable=int(bootstrap_ci_df['unstable'].sum()),
+        success_correlations={metric: float(r) for metric, r in corr_matrix['composite_success_score'].items()},
+        active_power_users=len(active_power_users),
+        mean_success_score=float(user_segments['composite_success_score'].mean()),
+        mean_days_active=float(user_segments['days_active'].mean()),
+        median_days_active=float(user_segments['days_active'].median()),
+        churned_users=int(churn_counts.get(1, 0)),
+        churn_rate_pct=float(churn_counts.get(1, 0) / len(churn_data) * 100),
+        rf_test_acc=float(rf_test_acc),
+        rf_auc=float(rf_auc),
+        workflow_labels=list(workflow_labels),
+        workflow_share_pct={label: float(share) for label, share in workflow_share.items()},
+        complete_workflow_pct=len(complete_workflows) / len(workflow_df) * 100,
+        sustained_mean_days_active=float(sustained_users['days_active'].mean()),
+    )
+
+
+if report_from_snapshot:
+    report_snapshot, report_figures = ReportSnapshot.load(report_from_snapshot)
+    print(f"📦 Rebuilding the report from the snapshot in {report_from_snapshot}")
+else:
+    report_snapshot = build_report_snapshot()
+    report_figures = {
+        'early_behavior_correlations': early_corr_fig,
+        'metrics_by_tier': metrics_by_tier_fig,
+        'cohort_retention': retention_heatmap_fig,
+        'feature_importance': feature_importance_fig,
+        'roc_curves': roc_fig,
+    }
+    report_snapshot.save(report_snapshot_dir, report_figures)
+
+
+def new_report_page():
+    """Blank letter-landscape page with the report background"""
+    fig = Figure(figsize=(11, 8.5))
     fig.patch.set_facecolor(bg_color)
+    return fig
+
+
+def page_title_summary():
+    """Page 1: title and executive summary"""
+    snapshot = report_snapshot
+    power_user_count = snapshot.tier_user_counts.get('Power Users', 0)
+    power_user_pct = power_user_count / snapshot.n_users * 100
+    fig = new_report_page()
     ax = fig.add_subplot(111)
     ax.axis('off')
     
@@ -32,23 +204,14 @@ with PdfPages(report_filename) as pdf:
             ha='center', va='top', fontsize=28, fontweight='bold', color=text_primary)
     ax.text(0.5, 0.80, 'Zerve Platform User Behavior & Engagement Study', 
             ha='center', va='top', fontsize=14, color=text_secondary)
-    ax.text(0.5, 0.76, f'Generated: {datetime.now().strftime("%B %d, %Y")}', 
+    ax.text(0.5, 0.76, f'Generated: {report_date.strftime("%B %d, %Y")}', 
             ha='center', va='top', fontsize=10, color=text_secondary)
     
     # Executive Summary Box
     ax.text(0.5, 0.68, 'EXECUTIVE SUMMARY', 
             ha='center', va='top', fontsize=16, fontweight='bold', color=highlight)
     
-    # tier_stats has numeric index, use iloc to access by position
-    power_user_count = int(tier_stats.iloc[0]['user_count'])  # First row = Power Users
-    power_user_pct = (power_user_count / len(user_segments)) * 100
-    
-    # corr_matrix also uses numeric index - access by iloc
-    # Row 4 = sessions_with_diverse_events, Row 2 = execution_event_rate
-    session_diversity_corr = corr_matrix.iloc[4, 0]  # sessions_with_diverse_events vs composite_success_score
-    execution_corr = corr_matrix.iloc[2, 0]  # execution_event_rate vs composite_success_score
-    
-    summary_text = f"""Our analysis of {len(user_segments):,} Zerve platform users reveals critical insights into 
+    summary_text = f"""Our analysis of {snapshot.n_users:,} Zerve platform users reveals critical insights into 
 user success drivers and engagement patterns. We've identified clear behavioral 
 markers that distinguish highly successful users from those at risk of churn.
 
@@ -59,27 +222,28 @@ KEY FINDINGS:
   Power User status through sustained, multi-dimensional platform engagement.
 
 • Credit Usage Impact: A dramatic success gap exists between users with and 
-  without credit access. Users with ANY credits show {any_credit_success/zero_credit_success:.1f}× higher 
-  success scores than those without ({any_credit_success:.1f} vs {zero_credit_success:.1f}). The optimal 
-  threshold appears around {threshold_df['threshold'].iloc[2]:.1f} credits for maximum effectiveness.
+  without credit access. Users with ANY credits show {snapshot.any_credit_success/snapshot.zero_credit_success:.1f}× higher 
+  success scores than those without ({snapshot.any_credit_success:.1f} vs {snapshot.zero_credit_success:.1f}). The optimal 
+  threshold appears around {snapshot.threshold_at(50)['threshold']:.1f} credits for maximum effectiveness.
 
-• Predictive Power: Our machine learning models achieve {rf_test_acc*100:.1f}% accuracy 
-  (AUC: {rf_auc:.3f}) in predicting user retention using only first-week behavior, 
+• Predictive Power: Our machine learning models achieve {snapshot.rf_test_acc*100:.1f}% accuracy 
+  (AUC: {snapshot.rf_auc:.3f}) in predicting user retention using only first-week behavior, 
   enabling early intervention strategies.
 
 • Behavioral Patterns: Success correlates most strongly with session diversity 
-  (r={session_diversity_corr:.3f}), canvas execution events (r={execution_corr:.3f}), and sustained 
+  (r={snapshot.success_correlations['sessions_with_diverse_events']:.3f}), canvas execution events (r={snapshot.success_correlations['execution_event_rate']:.3f}), and sustained 
   multi-day engagement patterns over the first week."""
     
     ax.text(0.08, 0.64, summary_text, ha='left', va='top', fontsize=9.5, 
             color=text_primary, linespacing=1.6, family='monospace')
-    
-    pdf.savefig(fig, facecolor=bg_color)
-    plt.close()
-    
-    # ========== PAGE 2: DATA OVERVIEW ==========
-    fig = plt.figure(figsize=(11, 8.5))
-    fig.patch.set_facecolor(bg_color)
+
+    return fig
+
+
+def page_data_overview():
+    """Page 2: dataset composition, tier and credit distributions, key metrics"""
+    snapshot = report_snapshot
+    fig = new_report_page()
     
     # Create layout
     gs = fig.add_gridspec(3, 2, hspace=0.35, wspace=0.3, top=0.92, bottom=0.08, left=0.08, right=0.95)
@@ -94,13 +258,12 @@ KEY FINDINGS:
     ax1.text(0.5, 0.9, 'DATASET COMPOSITION', ha='center', va='top', 
              fontsize=14, fontweight='bold', color=highlight)
     
-    date_range_days = (filtered_df_ts['timestamp'].max() - filtered_df_ts['timestamp'].min()).days
     dataset_stats = f"""
-    Total Events Analyzed: {len(filtered_df):,}
-    Unique Users: {len(user_segments):,}
-    Average Events per User: {len(filtered_df)/len(user_segments):.1f}
-    Date Range: {filtered_df_ts['timestamp'].min().strftime('%Y-%m-%d')} to {filtered_df_ts['timestamp'].max().strftime('%Y-%m-%d')}
-    Analysis Period: {date_range_days} days
+    Total Events Analyzed: {snapshot.n_events:,}
+    Unique Users: {snapshot.n_users:,}
+    Average Events per User: {snapshot.n_events/snapshot.n_users:.1f}
+    Date Range: {snapshot.first_event_date} to {snapshot.last_event_date}
+    Analysis Period: {snapshot.date_range_days} days
     """
     ax1.text(0.5, 0.65, dataset_stats, ha='center', va='top', fontsize=11, 
              color=text_primary, family='monospace', linespacing=1.8)
@@ -108,11 +271,10 @@ KEY FINDINGS:
     # Success Tier Distribution
     ax2 = fig.add_subplot(gs[1, 0])
     ax2.set_facecolor(bg_color)
-    # Use iloc to access tier_stats by position
-    tier_counts_ordered = [int(tier_stats.iloc[i]['user_count']) for i in range(len(tier_order))]
-    bars = ax2.barh(range(len(tier_order)), tier_counts_ordered, color=colors[:5])
-    ax2.set_yticks(range(len(tier_order)))
-    ax2.set_yticklabels(tier_order, color=text_primary, fontsize=10)
+    tier_counts_ordered = [snapshot.tier_user_counts[tier] for tier in snapshot.tier_order]
+    bars = ax2.barh(range(len(snapshot.tier_order)), tier_counts_ordered, color=colors[:5])
+    ax2.set_yticks(range(len(snapshot.tier_order)))
+    ax2.set_yticklabels(snapshot.tier_order, color=text_primary, fontsize=10)
     ax2.set_xlabel('Number of Users', color=text_primary, fontsize=10)
     ax2.set_title('User Distribution by Success Tier', color=text_primary, fontsize=12, fontweight='bold', pad=10)
     ax2.tick_params(colors=text_primary)
@@ -125,16 +287,15 @@ KEY FINDINGS:
     
     # Add value labels
     for i, val in enumerate(tier_counts_ordered):
-        pct = (val / len(user_segments)) * 100
+        pct = (val / snapshot.n_users) * 100
         ax2.text(val + 50, i, f'{val:,} ({pct:.1f}%)', 
                 va='center', color=text_primary, fontsize=9)
     
     # Credit Usage Distribution
     ax3 = fig.add_subplot(gs[1, 1])
     ax3.set_facecolor(bg_color)
-    credit_dist = user_segments_credit['credit_category'].value_counts()
-    credit_order_plot = credit_order
-    credit_values = [credit_dist.get(c, 0) for c in credit_order_plot]
+    credit_order_plot = snapshot.credit_order
+    credit_values = [snapshot.credit_user_counts[c] for c in credit_order_plot]
     bars2 = ax3.barh(range(len(credit_order_plot)), credit_values, color=colors[2:7])
     ax3.set_yticks(range(len(credit_order_plot)))
     ax3.set_yticklabels(credit_order_plot, color=text_primary, fontsize=8.5)
@@ -149,22 +310,18 @@ KEY FINDINGS:
     for i, val in enumerate(credit_values):
         ax3.text(val + 50, i, f'{val:,}', va='center', color=text_primary, fontsize=9)
     
-    # Key Metrics Table - use iloc to access churn_counts by position
+    # Key Metrics Table
     ax4 = fig.add_subplot(gs[2, :])
     ax4.axis('off')
     ax4.text(0.5, 0.95, 'KEY PERFORMANCE METRICS', ha='center', va='top', 
              fontsize=14, fontweight='bold', color=highlight)
     
-    # churn_counts has integer index (0, 1) not boolean (False, True)
-    churned_count = churn_counts.iloc[1]  # index 1 = churned
-    churn_rate = (churned_count / len(churn_data) * 100)
-    
     metrics_data = [
-        ['Active Power Users', f'{len(active_power_users):,}', 'Users with sustained engagement'],
-        ['Average Success Score', f'{user_segments["composite_success_score"].mean():.2f}', 'Out of 100'],
-        ['Median Active Days', f'{user_segments["days_active"].median():.0f}', 'Days'],
-        ['Churn Rate', f'{churn_rate:.1f}%', 'Week 1 to Week 2+'],
-        ['Model Accuracy', f'{rf_test_acc*100:.1f}%', 'Churn prediction'],
+        ['Active Power Users', f'{snapshot.active_power_users:,}', 'Users with sustained engagement'],
+        ['Average Success Score', f'{snapshot.mean_success_score:.2f}', 'Out of 100'],
+        ['Median Active Days', f'{snapshot.median_days_active:.0f}', 'Days'],
+        ['Churn Rate', f'{snapshot.churn_rate_pct:.1f}%', 'Week 1 to Week 2+'],
+        ['Model Accuracy', f'{snapshot.rf_test_acc*100:.1f}%', 'Churn prediction'],
     ]
     
     table_text = ""
@@ -173,13 +330,15 @@ KEY FINDINGS:
     
     ax4.text(0.5, 0.70, table_text, ha='center', va='top', fontsize=10, 
              color=text_primary, family='monospace', linespacing=2.0)
-    
-    pdf.savefig(fig, facecolor=bg_color)
-    plt.close()
-    
-    # ========== PAGE 3: CREDIT USAGE INSIGHTS ==========
-    fig = plt.figure(figsize=(11, 8.5))
-    fig.patch.set_facecolor(bg_color)
+
+    return fig
+
+
+def page_credit_usage():
+    """Page 3: credit usage patterns and their impact on success"""
+    snapshot = report_snapshot
+    median_threshold = snapshot.threshold_at(50)
+    fig = new_report_page()
     gs = fig.add_gridspec(2, 2, hspace=0.3, wspace=0.3, top=0.92, bottom=0.08, left=0.08, right=0.95)
     
     fig.text(0.5, 0.96, 'Credit Usage Patterns & Impact', 
@@ -188,10 +347,8 @@ KEY FINDINGS:
     # Credit Impact on Success
     ax1 = fig.add_subplot(gs[0, :])
     ax1.set_facecolor(bg_color)
-    credit_categories_ordered = credit_order
-    # Use iloc to access credit_analysis by position
-    credit_success_vals = [credit_analysis.iloc[i]['composite_success_score_mean'] 
-                           for i in range(len(credit_categories_ordered))]
+    credit_categories_ordered = snapshot.credit_order
+    credit_success_vals = [snapshot.credit_success_means[c] for c in credit_categories_ordered]
     bars = ax1.bar(range(len(credit_categories_ordered)), credit_success_vals, color=colors[:5], width=0.6)
     ax1.set_xticks(range(len(credit_categories_ordered)))
     ax1.set_xticklabels(credit_categories_ordered, color=text_primary, fontsize=8.5, rotation=15)
@@ -211,7 +368,8 @@ KEY FINDINGS:
     # Threshold Analysis
     ax2 = fig.add_subplot(gs[1, 0])
     ax2.set_facecolor(bg_color)
-    ax2.plot(threshold_df['threshold'], threshold_df['avg_success_score'], 
+    ax2.plot([row['threshold'] for row in snapshot.threshold_curve],
+             [row['avg_success_score'] for row in snapshot.threshold_curve],
              marker='o', linewidth=2.5, markersize=8, color=colors[0])
     ax2.set_xlabel('Credit Threshold', color=text_primary, fontsize=10)
     ax2.set_ylabel('Avg Success Score', color=text_primary, fontsize=10)
@@ -227,20 +385,26 @@ KEY FINDINGS:
     ax3.text(0.5, 0.95, 'KEY INSIGHTS', ha='center', va='top', 
              fontsize=13, fontweight='bold', color=highlight)
     
+    # Bootstrap CI of the any-credit lift; unstable findings are flagged on the page
+    any_credit_lift_ci = snapshot.any_credit_lift_ci
+    lift_flag = '  ⚠ UNSTABLE - interpret with care' if any_credit_lift_ci['unstable'] else ''
+
     insights_text = f"""
 Credit access is the single strongest 
 driver of user success on the platform.
 
 Users WITHOUT credits:
-  Avg Success: {zero_credit_success:.1f}
+  Avg Success: {snapshot.zero_credit_success:.1f}
   
 Users WITH credits:
-  Avg Success: {any_credit_success:.1f}
-  Multiplier: {any_credit_success/zero_credit_success:.1f}×
+  Avg Success: {snapshot.any_credit_success:.1f}
+  Multiplier: {snapshot.any_credit_success/snapshot.zero_credit_success:.1f}×
+  Lift 95% CI: {any_credit_lift_ci['ci_low']:.0f}% to {any_credit_lift_ci['ci_high']:.0f}%
+{lift_flag}
 
-Optimal threshold: ~{threshold_df['threshold'].iloc[2]:.0f} credits
-  Users above: {threshold_df['users_above'].iloc[2]:.0f}
-  Avg Success: {threshold_df['avg_success_score'].iloc[2]:.1f}
+Optimal threshold: ~{median_threshold['threshold']:.0f} credits
+  Users above: {median_threshold['users_above']:.0f}
+  Avg Success: {median_threshold['avg_success_score']:.1f}
 
 RECOMMENDATION: Providing even small 
 credit allocations (1-10 credits) can 
@@ -250,17 +414,14 @@ and platform adoption success.
     
     ax3.text(0.05, 0.85, insights_text, ha='left', va='top', fontsize=9.5, 
              color=text_primary, family='monospace', linespacing=1.7)
-    
-    pdf.savefig(fig, facecolor=bg_color)
-    plt.close()
-    
-    # ========== PAGE 4: SUCCESS DRIVER ANALYSIS ==========
-    pdf.savefig(early_corr_fig, facecolor=bg_color)
-    pdf.savefig(metrics_by_tier_fig, facecolor=bg_color)
-    
-    # ========== PAGE 5: BEHAVIORAL PATTERNS ==========
-    fig = plt.figure(figsize=(11, 8.5))
-    fig.patch.set_facecolor(bg_color)
+
+    return fig
+
+
+def page_behavioral_patterns():
+    """Page 5: workflow completion and behavioural insights"""
+    snapshot = report_snapshot
+    fig = new_report_page()
     gs = fig.add_gridspec(2, 1, hspace=0.3, top=0.92, bottom=0.08, left=0.08, right=0.95)
     
     fig.text(0.5, 0.96, 'User Behavioral Patterns & Workflows', 
@@ -269,10 +430,10 @@ and platform adoption success.
     # Workflow Completion Distribution
     ax1 = fig.add_subplot(gs[0, 0])
     ax1.set_facecolor(bg_color)
-    workflow_pcts = (workflow_dist / workflow_dist.sum() * 100)
-    bars = ax1.bar(range(len(workflow_labels)), workflow_pcts, color=colors[:4], width=0.6)
-    ax1.set_xticks(range(len(workflow_labels)))
-    ax1.set_xticklabels(workflow_labels, color=text_primary, fontsize=10)
+    workflow_pcts = [snapshot.workflow_share_pct[label] for label in snapshot.workflow_labels]
+    bars = ax1.bar(range(len(snapshot.workflow_labels)), workflow_pcts, color=colors[:4], width=0.6)
+    ax1.set_xticks(range(len(snapshot.workflow_labels)))
+    ax1.set_xticklabels(snapshot.workflow_labels, color=text_primary, fontsize=10)
     ax1.set_ylabel('Percentage of Users (%)', color=text_primary, fontsize=11)
     ax1.set_title('Workflow Completion Patterns', color=text_primary, fontsize=13, fontweight='bold', pad=15)
     ax1.tick_params(colors=text_primary)
@@ -291,22 +452,20 @@ and platform adoption success.
     ax2.text(0.5, 0.95, 'BEHAVIORAL PATTERN INSIGHTS', ha='center', va='top', 
              fontsize=14, fontweight='bold', color=highlight)
     
-    complete_workflow_pct = (len(complete_workflows) / len(workflow_df) * 100)
-    
     behavior_text = f"""
 WORKFLOW ENGAGEMENT:
 
-• {complete_workflow_pct:.1f}% of active users demonstrate complete end-to-end workflow engagement 
+• {snapshot.complete_workflow_pct:.1f}% of active users demonstrate complete end-to-end workflow engagement 
   (data loading → transformation → execution → visualization)
 
 • Session diversity is the strongest early predictor of long-term success
-  (correlation: {session_diversity_corr:.3f})
+  (correlation: {snapshot.success_correlations['sessions_with_diverse_events']:.3f})
 
-• Users who execute code (canvas execution events) show {execution_corr:.3f} correlation 
+• Users who execute code (canvas execution events) show {snapshot.success_correlations['execution_event_rate']:.3f} correlation 
   with composite success scores
 
 • Multi-day engagement in the first week is critical - sustained users average 
-  {sustained_users['days_active'].mean():.1f} active days vs {user_segments['days_active'].mean():.1f} overall
+  {snapshot.sustained_mean_days_active:.1f} active days vs {snapshot.mean_days_active:.1f} overall
 
 COMMON PATTERNS:
 
@@ -322,17 +481,13 @@ multiple sessions show dramatically higher retention and success rates.
     
     ax2.text(0.05, 0.88, behavior_text, ha='left', va='top', fontsize=9.5, 
              color=text_primary, family='monospace', linespacing=1.65)
-    
-    pdf.savefig(fig, facecolor=bg_color)
-    plt.close()
-    
-    # ========== PAGE 6: MODEL PERFORMANCE ==========
-    pdf.savefig(feature_importance_fig, facecolor=bg_color)
-    pdf.savefig(roc_fig, facecolor=bg_color)
-    
-    # ========== PAGE 7: RECOMMENDATIONS ==========
-    fig = plt.figure(figsize=(11, 8.5))
-    fig.patch.set_facecolor(bg_color)
+
+    return fig
+
+
+def page_recommendations():
+    """Page 7: strategic recommendations and action plan"""
+    fig = new_report_page()
     ax = fig.add_subplot(111)
     ax.axis('off')
     
@@ -386,13 +541,14 @@ IMPLEMENTATION TIMELINE: 90 days across 3 phases
     
     ax.text(0.06, 0.83, recommendations_text, ha='left', va='top', fontsize=9.5, 
             color=text_primary, family='monospace', linespacing=1.6)
-    
-    pdf.savefig(fig, facecolor=bg_color)
-    plt.close()
-    
-    # ========== PAGE 8: CONCLUSIONS ==========
-    fig = plt.figure(figsize=(11, 8.5))
-    fig.patch.set_facecolor(bg_color)
+
+    return fig
+
+
+def page_conclusions():
+    """Page 8: conclusions and next steps"""
+    snapshot = report_snapshot
+    fig = new_report_page()
     ax = fig.add_subplot(111)
     ax.axis('off')
     
@@ -403,7 +559,7 @@ IMPLEMENTATION TIMELINE: 90 days across 3 phases
             fontsize=14, fontweight='bold', color=highlight)
     
     conclusions_text = f"""
-This comprehensive analysis of {len(user_segments):,} Zerve platform users has revealed 
+This comprehensive analysis of {snapshot.n_users:,} Zerve platform users has revealed 
 critical insights into the drivers of user success and engagement. Our findings 
 provide a clear roadmap for dramatically improving user outcomes.
 
@@ -430,9 +586,10 @@ CORE INSIGHTS:
 
 DATA-DRIVEN CONFIDENCE:
 
-• Random Forest Model: {rf_test_acc*100:.1f}% accuracy, {rf_auc:.3f} AUC
-• Analysis of {len(filtered_df):,} events across {len(user_segments):,} users
+• Random Forest Model: {snapshot.rf_test_acc*100:.1f}% accuracy, {snapshot.rf_auc:.3f} AUC
+• Analysis of {snapshot.n_events:,} events across {snapshot.n_users:,} users
 • Statistical significance confirmed across all key correlations (p < 0.001)
+• Bootstrap 95% CIs ({snapshot.bootstrap_replicates:,} replicates): {snapshot.bootstrap_unstable} of {snapshot.bootstrap_estimates} estimates flagged unstable
 
 
 NEXT STEPS:
@@ -455,19 +612,205 @@ By acting on these insights, Zerve can expect to see:
     
     ax.text(0.5, 0.06, '― End of Report ―', 
             ha='center', va='bottom', fontsize=11, color=text_secondary, style='italic')
-    
-    pdf.savefig(fig, facecolor=bg_color)
-    plt.close()
+
+    return fig
+
+
+# Page order; figures built upstream are included as they are
+report_pages = [
+    ('title_summary', page_title_summary),
+    ('data_overview', page_data_overview),
+    ('credit_usage', page_credit_usage),
+    ('early_behavior_correlations', report_figures['early_behavior_correlations']),
+    ('metrics_by_tier', report_figures['metrics_by_tier']),
+    ('cohort_retention', report_figures['cohort_retention']),
+    ('behavioral_patterns', page_behavioral_patterns),
+    ('feature_importance', report_figures['feature_importance']),
+    ('roc_curves', report_figures['roc_curves']),
+    ('recommendations', page_recommendations),
+    ('conclusions', page_conclusions),
+]
+
+
+def build_page(page_index):
+    """Figure of one report page"""
+    _, source = report_pages[page_index]
+    return source() if callable(source) else source
+
+
+def render_page(page_index, path):
+    """Draw one page into its own single-page PDF at `path` (written atomically)"""
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    build_page(page_index).savefig(tmp_path, format='pdf', facecolor=bg_color)
+    os.replace(tmp_path, path)
+    return path
+
+
+def figure_fingerprint(fig, digest):
+    """
+    Feed what a figure draws into `digest`: its SVG rendering with a fixed id salt
+    and no date, so data, styles, colormaps, limits and fonts all count (figure
+    pickles are not byte-stable, so they cannot be hashed).
+    """
+    buffer = io.BytesIO()
+    with matplotlib.rc_context({'svg.hashsalt': 'zerve-report-page'}):
+        fig.savefig(buffer, format='svg', facecolor=bg_color, metadata={'Date': None})
+    digest.update(buffer.getvalue())
+
+
+def canonical_repr(value):
+    """repr that does not depend on set iteration order (string hashing is salted per process)"""
+    if isinstance(value, (set, frozenset)):
+        return '{' + ', '.join(sorted(canonical_repr(item) for item in value)) + '}'
+    if isinstance(value, (list, tuple)):
+        return repr(type(value)(canonical_repr(item) for item in value))
+    return repr(value)
+
+
+def value_fingerprint(value, digest):
+    """Feed a page input into `digest` by content"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        labels = value.columns.tolist() if isinstance(value, pd.DataFrame) else value.name
+        digest.update(repr((type(value).__name__, value.shape, labels)).encode())
+        try:
+            digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        except TypeError:  # unhashable cells (lists, sets): hash their canonical repr instead
+            canonical = (value.apply(lambda column: column.map(canonical_repr)) if isinstance(value, pd.DataFrame)
+                         else value.map(canonical_repr))
+            digest.update(pd.util.hash_pandas_object(canonical, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(repr((value.dtype, value.shape)).encode() + np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, Figure):
+        figure_fingerprint(value, digest)
+    elif isinstance(value, dict):
+        for key in sorted(value, key=repr):
+            digest.update(repr(key).encode())
+            value_fingerprint(value[key], digest)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            value_fingerprint(item, digest)
+    elif isinstance(value, (set, frozenset)):
+        digest.update(canonical_repr(value).encode())
+    else:
+        try:
+            digest.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except (pickle.PicklingError, TypeError, AttributeError):
+            digest.update(repr(value).encode())
+
+
+def code_names(code):
+    """Global and attribute names used by a code object and the code nested in it"""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= code_names(const)
+    return names
+
+
+def dataclass_fingerprint(value, names, digest):
+    """Feed only the fields (and methods, with what they read) of a dataclass that `names` mentions"""
+    names = set(names)
+    for method_name in sorted(names & set(dir(type(value)))):
+        method = getattr(type(value), method_name)
+        if isinstance(method, types.FunctionType):
+            digest.update(method.__code__.co_code)
+            names |= code_names(method.__code__)
+    for value_field in fields(value):
+        if value_field.name in names:
+            digest.update(value_field.name.encode())
+            value_fingerprint(getattr(value, value_field.name), digest)
+
+
+def code_fingerprint(code, namespace, digest, seen):
+    """Feed a page function's bytecode, constants and every global it reads (recursively) into `digest`"""
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            code_fingerprint(const, namespace, digest, seen)
+        else:
+            digest.update(repr(const).encode())
+    # Only names loaded as globals; co_names also holds attribute names (e.g. `snapshot.credit_order`)
+    loaded_globals = [ins.argval for ins in dis.get_instructions(code) if ins.opname in ('LOAD_GLOBAL', 'LOAD_NAME')]
+    for name in loaded_globals:
+        if name in seen or name not in namespace:
+            continue
+        seen.add(name)
+        value = namespace[name]
+        digest.update(name.encode())
+        if isinstance(value, types.FunctionType):
+            code_fingerprint(value.__code__, namespace, digest, seen)
+        elif is_dataclass(value) and not isinstance(value, type):
+            # e.g. the report snapshot: a page depends only on the fields it reads
+            dataclass_fingerprint(value, code_names(code), digest)
+        elif not isinstance(value, (types.ModuleType, type, types.BuiltinFunctionType)):
+            value_fingerprint(value, digest)
+
+
+def page_digest(page_index):
+    """Content hash of one page: its template (code or figure), its inputs and the matplotlib version"""
+    page_name, source = report_pages[page_index]
+    digest = hashlib.sha256(f'{page_name}|{matplotlib.__version__}|{bg_color}'.encode())
+    if callable(source):
+        code_fingerprint(source.__code__, source.__globals__, digest, set())
+    else:
+        figure_fingerprint(source, digest)
+    return digest.hexdigest()[:24]
+
+
+_render_started = time.perf_counter()
+if PdfWriter is not None:
+    # Only pages whose digest has no cached PDF are drawn (in parallel); pypdf concatenates them in order
+    os.makedirs(report_page_cache_dir, exist_ok=True)
+    _page_paths = [
+        os.path.join(report_page_cache_dir, f'{page_name}-{page_digest(i)}.pdf')
+        for i, (page_name, _) in enumerate(report_pages)
+    ]
+    report_stale_pages = [report_pages[i][0] for i, _path in enumerate(_page_paths) if not os.path.exists(_path)]
+    run_in_pool(render_page, [(i, _path) for i, _path in enumerate(_page_paths) if not os.path.exists(_path)],
+                report_jobs)
+    for _path in _page_paths:
+        os.utime(_path)  # mark as used, so age-based eviction keeps it
+    _writer = PdfWriter()
+    for _path in _page_paths:
+        _writer.append(_path)
+    if hasattr(_writer, 'compress_identical_objects'):
+        # Every page embeds its own copy of the fonts; keep one
+        _writer.compress_identical_objects(remove_identicals=True, remove_orphans=True)
+    with open(report_filename, 'wb') as _handle:
+        _writer.write(_handle)
+
+    # Evict renders no run has used recently; other runs' current pages are recent, so they stay
+    _evict_before = time.time() - report_page_cache_max_age_days * 86400
+    for _entry in os.scandir(report_page_cache_dir):
+        try:
+            if _entry.name.endswith('.pdf') and _entry.stat().st_mtime < _evict_before:
+                os.remove(_entry.path)
+        except FileNotFoundError:  # evicted by a concurrent run
+            pass
+    report_render_mode = (f'{len(report_stale_pages)} of {len(report_pages)} pages re-rendered '
+                          f'({min(report_jobs, max(len(report_stale_pages), 1))} workers), merged with pypdf')
+else:
+    # Without a PDF merger all pages are drawn into one PdfPages in this process
+    report_stale_pages = [page_name for page_name, _ in report_pages]
+    with PdfPages(report_filename) as pdf:
+        for _page_index in range(len(report_pages)):
+            pdf.savefig(build_page(_page_index), facecolor=bg_color)
+    report_render_mode = 'serial, no page cache (install pypdf for parallel, incremental rendering)'
+report_render_seconds = time.perf_counter() - _render_started
 
 print(f"✅ PDF Report generated successfully: {report_filename}")
 print(f"\nReport includes:")
 print("  • Executive Summary with key findings")
 print("  • Data Overview with dataset statistics")
 print("  • Credit Usage Analysis with impact insights")
-print("  • Success Driver correlations and visualizations")
+print("  • Success Driver correlations, visualizations and cohort retention")
 print("  • Behavioral Pattern analysis")
 print("  • Machine Learning model performance")
 print("  • Strategic Recommendations")
 print("  • Conclusions and Next Steps")
-print(f"\nTotal pages: 8")
+print(f"\nTotal pages: {len(report_pages)}")
+print(f"Rendering: {report_render_mode} in {report_render_seconds:.2f}s")
+if report_stale_pages and len(report_stale_pages) < len(report_pages):
+    print(f"Re-rendered pages: {', '.join(report_stale_pages)}")
 print(f"File size: Available in workspace as '{report_filename}'")
\ No newline at end of file
@@ -0,0 +1,187 @@
+import os
+from collections import defaultdict
+import pandas as pd
+import numpy as np
+
+try:
+    from tools.parallel import run_in_pool
+except ImportError:  # outside this repository (e.g. inside Zerve): no process pool
+    def run_in_pool(fn, task_args, n_jobs):
+        return [fn(*args) for args in task_args]
+
+# Discover gapped end-to-end workflows (e.g. load → transform → run → visualize)
+# with PrefixSpan-style sequential pattern mining over session-level sequences
+print("🧭 SEQUENTIAL WORKFLOW MINING")
+print("=" * 80)
+
+# Mining parameters
+workflow_min_support = 0.02       # fraction of a tier's sessions that must contain the pattern
+workflow_max_gap = 3              # next pattern item must occur within this many positions
+workflow_max_length = 5           # longest workflow reported
+workflow_min_session_length = 2   # sessions shorter than this cannot hold a workflow
+workflow_jobs = int(os.environ.get('WORKFLOW_MINING_JOBS', os.cpu_count() or 1))
+workflow_shards_per_job = 2
+
+
+def mine_prefixspan(sequences, min_count, max_gap, max_length, allowed=None):
+    """
+    PrefixSpan with a max-gap constraint over integer sequences.
+
+    The projected database keeps every end position of the current prefix in
+    each sequence (not only the first), so gapped extensions are never missed.
+    When `allowed` is given, only patterns in that set are grown and counted.
+    Returns {pattern tuple: number of sequences containing it}.
+    """
+    patterns = {}
+
+    def grow(prefix, projections):
+        extensions = defaultdict(dict)
+        for seq_idx, ends in projections.items():
+            sequence = sequences[seq_idx]
+            for end in ends:
+                for pos in range(end + 1, min(end + 1 + max_gap, len(sequence))):
+                    extensions[sequence[pos]].setdefault(seq_idx, set()).add(pos)
+        for item, occurrences in extensions.items():
+            pattern = prefix + (item,)
+            if len(occurrences) < min_count or (allowed is not None and pattern not in allowed):
+                continue
+            patterns[pattern] = len(occurrences)
+            if len(pattern) < max_length:
+                grow(pattern, occurrences)
+
+    # Length-1 prefixes: every position of every item
+    initial = defaultdict(dict)
+    for seq_idx, sequence in enumerate(sequences):
+        for pos, item in enumerate(sequence):
+            initial[item].setdefault(seq_idx, set()).add(pos)
+    for item, occurrences in initial.items():
+        pattern = (item,)
+        if len(occurrences) < min_count or (allowed is not None and pattern not in allowed):
+            continue
+        patterns[pattern] = len(occurrences)
+        if max_length > 1:
+            grow(pattern, occurrences)
+    return patterns
+
+
+def mine_local_candidates(sequences, min_support, max_gap, max_length):
+    """Phase 1 (per shard): patterns frequent within this shard of sessions"""
+    min_count = max(1, int(np.ceil(min_support * len(sequences))))
+    return set(mine_prefixspan(sequences, min_count, max_gap, max_length))
+
+
+def count_candidate_support(sequences, candidates, max_gap, max_length):
+    """Phase 2 (per shard): exact support of every global candidate in this shard"""
+    return mine_prefixspan(sequences, 1, max_gap, max_length, allowed=candidates)
+
+
+def mine_frequent_workflows(sequences_by_group, min_support, max_gap, max_length, n_jobs):
+    """
+    Partition-based (SON) mining: shards of sessions are mined in parallel with the
+    support fraction applied locally, the union of local results forms the
+    candidate set, and a second parallel pass counts exact global support.
+    Any globally frequent pattern is locally frequent in at least one shard, so
+    the result is identical to mining all sessions at once.
+    """
+    n_shards = max(1, n_jobs * workflow_shards_per_job)
+    shards = []
+    for group, sequences in sequences_by_group.items():
+        for shard_idx in range(min(n_shards, len(sequences))):
+            shards.append((group, sequences[shard_idx::n_shards]))
+
+    local_results = run_in_pool(
+        mine_local_candidates,
+        [(shard, min_support, max_gap, max_length) for _, shard in shards],
+        n_jobs
+    )
+    candidates = defaultdict(set)
+    for (group, _), local_patterns in zip(shards, local_results):
+        candidates[group] |= local_patterns
+
+    shard_counts = run_in_pool(
+        count_candidate_support,
+        [(shard, candidates[group], max_gap, max_length) for group, shard in shards],
+        n_jobs
+    )
+    supports = defaultdict(lambda: defaultdict(int))
+    for (group, _), counts in zip(shards, shard_counts):
+        for pattern, count in counts.items():
+            supports[group][pattern] += count
+
+    return {
+        group: {
+            pattern: count for pattern, count in supports[group].items()
+            if count >= max(1, int(np.ceil(min_support * len(sequences))))
+        }
+        for group, sequences in sequences_by_group.items()
+    }
+
+
+# Build session-level sequences of workflow categories for every tier
+workflow_events = df_features[['user_id', 'timestamp', 'event', 'session_id']]
+workflow_events = workflow_events.sort_values(['user_id', 'session_id', 'timestamp'], kind='stable')
+
+# Categorize each distinct event name once with categorize_event from event_sequence_patterns
+_unique_events = workflow_events['event'].dropna().unique()
+_event_category_map = {_event_name: categorize_event(_event_name) for _event_name in _unique_events}
+workflow_events['event_category'] = workflow_events['event'].map(_event_category_map)
+workflow_events = workflow_events[workflow_events['event_category'].notna() & (workflow_events['event_category'] != 'other')]
+
+workflow_category_vocab = list(workflow_keywords)
+_category_codes = pd.Categorical(workflow_events['event_category'], categories=workflow_category_vocab).codes
+_session_codes = pd.factorize(pd.MultiIndex.from_arrays([workflow_events['user_id'], workflow_events['session_id']]))[0]
+
+# Collapse immediate repeats (load, load, load → load) so gaps count workflow steps
+_keep = np.ones(len(_category_codes), dtype=bool)
+_keep[1:] = (_category_codes[1:] != _category_codes[:-1]) | (_session_codes[1:] != _session_codes[:-1])
+_category_codes, _session_codes = _category_codes[_keep], _session_codes[_keep]
+_session_users = workflow_events['user_id'].to_numpy()[_keep]
+
+_boundaries = np.flatnonzero(np.diff(_session_codes)) + 1
+_session_sequences = np.split(_category_codes.astype(np.int16), _boundaries)
+_session_first_rows = np.concatenate([[0], _boundaries]) if len(_category_codes) else np.empty(0, dtype=int)
+_session_tiers = user_segments.set_index('user_id')['success_tier'].reindex(_session_users[_session_first_rows]).to_numpy()
+
+workflow_sequences_by_tier = {}
+for _tier in ['Power Users', 'Active Users', 'Regular Users', 'Casual Users', 'Trial Users']:
+    workflow_sequences_by_tier[_tier] = [
+        tuple(_seq.tolist()) for _seq, _seq_tier in zip(_session_sequences, _session_tiers)
+        if _seq_tier == _tier and len(_seq) >= workflow_min_session_length
+    ]
+
+print(f"Sessions with workflow events: {sum(len(v) for v in workflow_sequences_by_tier.values()):,}")
+print(f"Min support: {workflow_min_support:.0%} of tier sessions | Max gap: {workflow_max_gap} steps | "
+      f"Max length: {workflow_max_length} | Workers: {workflow_jobs}")
+
+frequent_workflows = mine_frequent_workflows(
+    workflow_sequences_by_tier, workflow_min_support, workflow_max_gap, workflow_max_length, workflow_jobs
+)
+
+workflow_patterns = []
+for _tier, _patterns in frequent_workflows.items():
+    _n_sessions = len(workflow_sequences_by_tier[_tier])
+    for _pattern, _support in _patterns.items():
+        if len(_pattern) < 2:
+            continue
+        workflow_patterns.append({
+            'success_tier': _tier,
+            'workflow': tuple(workflow_category_vocab[_code] for _code in _pattern),
+            'length': len(_pattern),
+            'support_sessions': _support,
+            'support_pct': _support / _n_sessions * 100,
+        })
+workflow_patterns_df = pd.DataFrame(
+    workflow_patterns, columns=['success_tier', 'workflow', 'length', 'support_sessions', 'support_pct']
+).sort_values(['success_tier', 'length', 'support_sessions'], ascending=[True, False, False])
+
+print(f"\n🔗 LONGEST FREQUENT WORKFLOWS BY SUCCESS TIER:")
+print("=" * 80)
+for _tier in ['Power Users', 'Active Users', 'Regular Users', 'Casual Users', 'Trial Users']:
+    _tier_patterns = workflow_patterns_df[workflow_patterns_df['success_tier'] == _tier].head(5)
+    print(f"\n{_tier} ({len(workflow_sequences_by_tier[_tier]):,} sessions):")
+    if len(_tier_patterns) == 0:
+        print("  No frequent multi-step workflows")
+    for _, _row in _tier_patterns.iterrows():
+        print(f"  {' → '.join(_row['workflow']):60s} {_row['support_sessions']:6,} sessions ({_row['support_pct']:5.1f}%)")
+
+print(f"\n💾 Output: workflow_patterns_df with {len(workflow_patterns_df):,} frequent workflows across success tiers")
@@ -0,0 +1,145 @@
+import pandas as pd
+import numpy as np
+
+# Time-to-milestone and onboarding funnel analysis
+print("🚦 ONBOARDING MILESTONES & FUNNEL ANALYSIS")
+print("=" * 80)
+
+execution_keywords = ['run', 'execute', 'block_', 'agent_']
+
+
+def event_name_mask(events, keywords):
+    """Keyword match evaluated once per distinct event name, then broadcast to every event"""
+    codes, names = pd.factorize(events['event'])
+    name_matches = names.str.contains('|'.join(keywords), case=False, na=False)
+    return np.append(np.asarray(name_matches, dtype=bool), False)[codes]
+
+
+# Configurable milestone predicates: each maps the sorted event frame to a boolean mask
+milestone_predicates = {
+    'first_event': lambda events: np.ones(len(events), dtype=bool),
+    'first_tool_invocation': lambda events: events['prop_tool_name'].notna().to_numpy(),
+    'first_execution': lambda events: event_name_mask(events, execution_keywords),
+    'first_message': lambda events: events['prop_message_id'].notna().to_numpy(),
+    'first_credit_use': lambda events: (events['prop_credits_used'].fillna(0) > 0).to_numpy(),
+}
+
+# Ordered funnel steps (each step must happen no earlier than the previous one)
+funnel_steps = ['first_event', 'first_tool_invocation', 'first_execution', 'first_credit_use']
+funnel_window_days = 7
+conversion_curve_hours = np.array([0, 1, 2, 4, 8, 12, 24, 48, 72, 96, 120, 144, 168, 336, 720])
+
+
+def user_event_bounds(events):
+    """Seconds since the data start and the first row of every user in a (user_id, timestamp)-sorted frame"""
+    seconds = (events['timestamp'] - events['timestamp'].min()).dt.total_seconds().to_numpy()
+    user_ids = events['user_id'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, user_ids[1:] != user_ids[:-1]]) if len(events) else np.empty(0, dtype=int)
+    return seconds, starts
+
+
+def compute_milestones(events, predicates):
+    """
+    First-occurrence time of every predicate for every user in one sorted pass.
+
+    `events` must be sorted by (user_id, timestamp). Each predicate's timestamps
+    are masked to +inf where it does not hold and reduced with a segment-min over
+    the user boundaries (np.minimum.reduceat). Returns one row per user with the
+    seconds since the data start of each milestone (NaN when never reached).
+    """
+    seconds, starts = user_event_bounds(events)
+    milestones = pd.DataFrame({'user_id': events['user_id'].to_numpy()[starts]})
+    for name, predicate in predicates.items():
+        first_seen = np.minimum.reduceat(np.where(predicate(events), seconds, np.inf), starts) if len(starts) else []
+        milestones[name] = np.where(np.isfinite(first_seen), first_seen, np.nan)
+    return milestones
+
+
+def build_funnel(events, predicates, steps, window_days):
+    """
+    Ordered multi-step funnel with per-step conversion and median step time.
+
+    A step is reached at the user's first qualifying event no earlier than the
+    previous step (a segment-min over the sorted events, as in compute_milestones),
+    so an early execution before the first tool call does not block a later one.
+    The window check is applied to that time, not to the first-ever occurrence.
+    """
+    seconds, starts = user_event_bounds(events)
+    lengths = np.diff(np.r_[starts, len(events)])
+    start = np.minimum.reduceat(np.where(predicates[steps[0]](events), seconds, np.inf), starts) if len(starts) else np.empty(0)
+    reached = np.isfinite(start)
+    n_start = max(int(reached.sum()), 1)
+    previous = start
+    rows = [{'step': steps[0], 'users': int(reached.sum()), 'conversion_from_previous': 100.0,
+             'conversion_from_start': 100.0, 'median_hours_from_previous': 0.0}]
+    for step in steps[1:]:
+        qualifying = predicates[step](events) & (seconds >= np.repeat(previous, lengths))
+        current = np.minimum.reduceat(np.where(qualifying, seconds, np.inf), starts) if len(starts) else np.empty(0)
+        with np.errstate(invalid='ignore'):
+            step_reached = reached & np.isfinite(current) & (current - start <= window_days * 86400)
+        rows.append({
+            'step': step,
+            'users': int(step_reached.sum()),
+            'conversion_from_previous': step_reached.sum() / max(reached.sum(), 1) * 100,
+            'conversion_from_start': step_reached.sum() / n_start * 100,
+            'median_hours_from_previous': float(np.median((current - previous)[step_reached]) / 3600) if step_reached.any() else np.nan,
+        })
+        reached = step_reached
+        previous = np.where(step_reached, current, np.inf)
+    return pd.DataFrame(rows)
+
+
+def build_conversion_curves(time_to_hours, hours_grid):
+    """Share of users reaching each milestone within every horizon (sorted times + searchsorted)"""
+    curves = {}
+    for name in time_to_hours.columns:
+        reached_hours = np.sort(time_to_hours[name].dropna().to_numpy())
+        curves[name] = np.searchsorted(reached_hours, hours_grid, side='right') / max(len(time_to_hours), 1) * 100
+    return pd.DataFrame(curves, index=pd.Index(hours_grid, name='hours_since_first_event'))
+
+
+# df_features is sorted by (user_id, timestamp) during session reconstruction
+milestones_df = compute_milestones(df_features, milestone_predicates)
+
+# Hours from the first event to every other milestone
+milestone_names = [name for name in milestone_predicates if name != 'first_event']
+time_to_milestone_df = pd.DataFrame({
+    f'hours_to_{name}': (milestones_df[name] - milestones_df['first_event']) / 3600 for name in milestone_names
+})
+time_to_milestone_df.insert(0, 'user_id', milestones_df['user_id'])
+time_to_milestone_df = time_to_milestone_df.merge(user_segments[['user_id', 'success_tier']], on='user_id', how='left')
+
+funnel_df = build_funnel(df_features, milestone_predicates, funnel_steps, funnel_window_days)
+conversion_curves = build_conversion_curves(
+    time_to_milestone_df[[f'hours_to_{name}' for name in milestone_names]], conversion_curve_hours
+)
+
+print(f"Users: {len(milestones_df):,} | Events scanned: {len(df_features):,}")
+
+print(f"\n⏱️ TIME TO MILESTONE (hours from first event, users who reached it):")
+print("-" * 80)
+for _name in milestone_names:
+    _hours = time_to_milestone_df[f'hours_to_{_name}'].dropna()
+    if len(_hours) == 0:
+        print(f"  {_name:25s}: never reached")
+        continue
+    print(f"  {_name:25s}: {len(_hours) / len(time_to_milestone_df) * 100:5.1f}% reached | "
+          f"median {_hours.median():7.1f}h | p75 {_hours.quantile(0.75):7.1f}h")
+
+print(f"\n🪜 ONBOARDING FUNNEL (ordered, within {funnel_window_days} days):")
+print("-" * 80)
+for _, _row in funnel_df.iterrows():
+    print(f"  {_row['step']:25s}: {_row['users']:6,} users | {_row['conversion_from_previous']:5.1f}% of previous | "
+          f"{_row['conversion_from_start']:5.1f}% of start | median step {_row['median_hours_from_previous']:6.1f}h")
+
+print(f"\n🏅 MEDIAN HOURS TO MILESTONE BY SUCCESS TIER:")
+print("-" * 80)
+_tier_medians = time_to_milestone_df.groupby('success_tier')[[f'hours_to_{name}' for name in milestone_names]].median()
+_tier_medians = _tier_medians.reindex(['Power Users', 'Active Users', 'Regular Users', 'Casual Users', 'Trial Users'])
+print(_tier_medians.round(1).to_string())
+
+print(f"\n📈 CONVERSION CURVES (% of users reaching milestone within N hours):")
+print(conversion_curves.round(1).to_string())
+
+print(f"\n💾 Output: milestones_df / time_to_milestone_df with {len(milestones_df):,} users")
+print(f"   Output: funnel_df with {len(funnel_df)} steps, conversion_curves over {len(conversion_curve_hours)} horizons")
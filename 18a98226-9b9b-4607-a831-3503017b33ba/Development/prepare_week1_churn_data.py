@@ -1,79 +1,124 @@
+import os
 import pandas as pd
 import numpy as np
 
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
 # Create week-1 only features for early churn detection
 # Filter df_features to only include events from first 7 days for each user
 
 print("🎯 PREPARING EARLY CHURN DETECTION DATASET")
 print("=" * 80)
 
-# Sort by user and timestamp
-df_sorted = df_features.sort_values(['user_id', 'timestamp']).copy()
+# Week-1 features are grouped aggregations over each user's events in the 7 days
+# after their first event. FEATURE_BACKEND=polars builds the same features as one
+# lazy Polars query; the pandas implementation below is the reference
+feature_backend = os.environ.get('FEATURE_BACKEND', 'pandas')
+if feature_backend == 'polars' and pl is None:
+    print("⚠️ FEATURE_BACKEND=polars but polars is not installed; using pandas")
+    feature_backend = 'pandas'
+week1_order = ['w1_total_events', 'w1_days_active', 'w1_unique_sessions', 'w1_unique_event_types',
+               'w1_event_diversity', 'w1_execution_count', 'w1_execution_rate', 'w1_unique_canvases',
+               'w1_avg_events_per_canvas', 'w1_credits_used', 'w1_tool_invocations', 'w1_messages',
+               'w1_avg_events_per_session', 'w1_max_events_per_session', 'w1_time_span_days',
+               'w1_avg_events_per_day']
+
+
+def polars_week1_features(events):
+    """compute_week1_features as a lazy Polars query"""
+    events = pl.from_pandas(events[['user_id', 'timestamp', 'session_id', 'event', 'prop_$pathname',
+                                    'prop_credits_used', 'prop_tool_name', 'prop_message_id']]).lazy()
+    since_first = pl.col('timestamp') - pl.col('timestamp').min().over('user_id')
+    week1 = events.filter(since_first.dt.total_nanoseconds() / 1e9 / 86400 <= 7)
+    is_execution = pl.col('event').str.contains('(?i)run|execute|block_|agent_').fill_null(False)
+    per_user = week1.group_by('user_id').agg(
+        w1_total_events=pl.len(),
+        w1_days_active=pl.col('timestamp').dt.date().n_unique(),
+        w1_unique_sessions=pl.col('session_id').drop_nulls().n_unique(),
+        w1_unique_event_types=pl.col('event').drop_nulls().n_unique(),
+        w1_execution_count=is_execution.sum(),
+        w1_unique_canvases=pl.col('prop_$pathname').drop_nulls().n_unique(),
+        w1_credits_used=pl.col('prop_credits_used').sum(),
+        w1_tool_invocations=pl.col('prop_tool_name').is_not_null().sum(),
+        w1_messages=pl.col('prop_message_id').is_not_null().sum(),
+        w1_time_span_days=(pl.col('timestamp').max() - pl.col('timestamp').min()).dt.total_nanoseconds() / 1e9 / 86400,
+    )
+    event_share = (week1.drop_nulls('event').group_by('user_id', 'event').len()
+                   .with_columns(share=pl.col('len') / pl.col('len').sum().over('user_id')))
+    diversity = event_share.group_by('user_id').agg(
+        w1_event_diversity=-(pl.col('share') * (pl.col('share') + 1e-10).log(2)).sum()
+    )
+    sessions = (week1.drop_nulls('session_id').group_by('user_id', 'session_id').len()
+                .group_by('user_id').agg(w1_avg_events_per_session=pl.col('len').mean(),
+                                         w1_max_events_per_session=pl.col('len').max()))
+    features = (
+        per_user.join(diversity, on='user_id', how='left')
+        .join(sessions, on='user_id', how='left')
+        .with_columns(
+            w1_execution_rate=pl.col('w1_execution_count') / pl.max_horizontal(pl.col('w1_total_events'), 1),
+            w1_avg_events_per_canvas=pl.col('w1_total_events') / pl.max_horizontal(pl.col('w1_unique_canvases'), 1),
+            w1_avg_events_per_day=pl.col('w1_total_events') / pl.max_horizontal(pl.col('w1_days_active'), 1),
+        )
+        .select('user_id', *week1_order)
+        .sort('user_id')
+        .collect()
+    )
+    return features.with_columns(pl.col(pl.UInt32, pl.UInt64).cast(pl.Int64)).to_pandas()
+
+
+def compute_week1_features(events):
+    """Week-1 features of every user in `events` (all of each user's events), one row per user"""
+    since_first = events['timestamp'] - events.groupby('user_id')['timestamp'].transform('min')
+    week1 = events[since_first.dt.total_seconds() / 86400 <= 7]
+    keyed = week1.assign(
+        day=week1['timestamp'].dt.floor('D'),
+        is_execution=week1['event'].str.contains('run|execute|block_|agent_', case=False, na=False),
+    )
+    features = keyed.groupby('user_id').agg(
+        w1_total_events=('event', 'size'),
+        w1_days_active=('day', 'nunique'),
+        w1_unique_sessions=('session_id', 'nunique'),
+        w1_unique_event_types=('event', 'nunique'),
+        w1_execution_count=('is_execution', 'sum'),
+        w1_unique_canvases=('prop_$pathname', 'nunique'),
+        w1_credits_used=('prop_credits_used', 'sum'),
+        w1_tool_invocations=('prop_tool_name', 'count'),
+        w1_messages=('prop_message_id', 'count'),
+        first_event=('timestamp', 'min'),
+        last_event=('timestamp', 'max'),
+    )
+    # Shannon entropy of each user's week-1 event mix (log2 with a 1e-10 guard)
+    event_counts = week1.groupby(['user_id', 'event']).size()
+    event_probs = event_counts / event_counts.groupby(level='user_id').transform('sum')
+    features['w1_event_diversity'] = (-(event_probs * np.log2(event_probs + 1e-10))).groupby(level='user_id').sum()
+    features['w1_execution_rate'] = features['w1_execution_count'] / features['w1_total_events'].clip(lower=1)
+    features['w1_avg_events_per_canvas'] = features['w1_total_events'] / features['w1_unique_canvases'].clip(lower=1)
 
-# Get first event timestamp for each user
-user_first_event = df_sorted.groupby('user_id')['timestamp'].min().to_dict()
+    # Session depth
+    session_counts = week1.groupby(['user_id', 'session_id']).size().groupby(level='user_id')
+    features['w1_avg_events_per_session'] = session_counts.mean()
+    features['w1_max_events_per_session'] = session_counts.max()
 
-# Add days_since_first_event column
-df_sorted['days_since_first'] = df_sorted.apply(
-    lambda row: (row['timestamp'] - user_first_event[row['user_id']]).total_seconds() / 86400,
-    axis=1
-)
+    # Time-based patterns
+    features['w1_time_span_days'] = (features.pop('last_event') - features.pop('first_event')).dt.total_seconds() / 86400
+    features['w1_avg_events_per_day'] = features['w1_total_events'] / features['w1_days_active'].clip(lower=1)
+    return features[week1_order].reset_index()
 
-# Filter to week 1 only (first 7 days)
-week1_events = df_sorted[df_sorted['days_since_first'] <= 7].copy()
+
+if feature_backend == 'polars':
+    week1_df = polars_week1_features(df_features)
+else:
+    week1_df = compute_week1_features(df_features)
+_week1_event_count = int(week1_df['w1_total_events'].sum())
 
 print(f"\n📊 DATA SCOPE:")
-print(f"  Total events: {len(df_sorted):,}")
-print(f"  Week-1 events: {len(week1_events):,}")
-print(f"  Total users: {df_sorted['user_id'].nunique():,}")
-print(f"  Users with week-1 activity: {week1_events['user_id'].nunique():,}")
-
-# Engineer week-1 features
-week1_features = []
-
-for user_id, user_df in week1_events.groupby('user_id'):
-    features = {'user_id': user_id}
-    
-    # Activity volume
-    features['w1_total_events'] = len(user_df)
-    features['w1_days_active'] = user_df['timestamp'].dt.date.nunique()
-    features['w1_unique_sessions'] = user_df['prop_$session_id'].fillna(user_df['prop_session_id']).nunique()
-    
-    # Event diversity
-    features['w1_unique_event_types'] = user_df['event'].nunique()
-    event_counts = user_df['event'].value_counts()
-    event_probs = event_counts / event_counts.sum()
-    features['w1_event_diversity'] = -np.sum(event_probs * np.log2(event_probs + 1e-10))
-    
-    # Execution behavior
-    execution_keywords = ['run', 'execute', 'block_', 'agent_']
-    execution_events = user_df[user_df['event'].str.contains('|'.join(execution_keywords), case=False, na=False)]
-    features['w1_execution_count'] = len(execution_events)
-    features['w1_execution_rate'] = len(execution_events) / max(len(user_df), 1)
-    
-    # Canvas engagement
-    features['w1_unique_canvases'] = user_df['prop_$pathname'].nunique()
-    features['w1_avg_events_per_canvas'] = len(user_df) / max(features['w1_unique_canvases'], 1)
-    
-    # Tool usage (serious engagement indicator)
-    features['w1_credits_used'] = user_df['prop_credits_used'].sum()
-    features['w1_tool_invocations'] = user_df['prop_tool_name'].notna().sum()
-    features['w1_messages'] = user_df['prop_message_id'].notna().sum()
-    
-    # Session depth
-    session_counts = user_df[user_df['prop_$session_id'].notna()].groupby('prop_$session_id').size()
-    features['w1_avg_events_per_session'] = session_counts.mean() if len(session_counts) > 0 else 0
-    features['w1_max_events_per_session'] = session_counts.max() if len(session_counts) > 0 else 0
-    
-    # Time-based patterns
-    first_event = user_df['timestamp'].min()
-    last_event = user_df['timestamp'].max()
-    features['w1_time_span_days'] = (last_event - first_event).total_seconds() / 86400
-    features['w1_avg_events_per_day'] = len(user_df) / max(features['w1_days_active'], 1)
-    
-    week1_features.append(features)
-
-week1_df = pd.DataFrame(week1_features)
+print(f"  Total events: {len(df_features):,}")
+print(f"  Week-1 events: {_week1_event_count:,}")
+print(f"  Total users: {df_features['user_id'].nunique():,}")
+print(f"  Users with week-1 activity: {len(week1_df):,}")
 
 # Replace inf/nan
 week1_df = week1_df.replace([np.inf, -np.inf], np.nan).fillna(0)
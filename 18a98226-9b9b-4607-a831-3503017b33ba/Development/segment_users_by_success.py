@@ -1,59 +1,162 @@
+import os
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.metrics import silhouette_score
 import matplotlib.pyplot as plt
 
-# Define composite success score based on key metrics
-# Weights based on domain knowledge of what indicates platform success
+try:
+    import numexpr as ne
+except ImportError:
+    ne = None
+
+# Declarative scoring configuration
+# Each sub-score is a weighted sum of (feature, transform, weight) terms and the
+# composite score is a weighted sum of sub-scores. Weights are based on domain
+# knowledge of what indicates platform success.
+scoring_config = {
+    'sub_scores': {
+        'sustained_usage_score': [
+            ('days_active', 'identity', 0.4),
+            ('weeks_active', 'identity', 0.3),
+            ('time_span_days', 'max_scaled', 0.3),
+        ],
+        'workflow_depth_score': [
+            ('unique_event_types', 'identity', 0.5),
+            ('event_diversity_score', 'identity', 2.0),
+            ('sessions_with_diverse_events', 'max_scaled', 0.5),
+        ],
+        'serious_usage_score': [
+            ('total_credits_used', 'log1p', 2.0),
+            ('tool_invocation_count', 'identity', 0.1),
+            ('execution_event_count', 'identity', 0.1),
+        ],
+    },
+    'composite_weights': {
+        'sustained_usage_score': 0.35,
+        'workflow_depth_score': 0.35,
+        'serious_usage_score': 0.30,
+    },
+}
+
+# Alternative composite weightings, re-scored alongside the baseline for what-if analysis
+scoring_scenarios = {
+    'sustained_heavy': {'sustained_usage_score': 0.50, 'workflow_depth_score': 0.25, 'serious_usage_score': 0.25},
+    'depth_heavy': {'sustained_usage_score': 0.25, 'workflow_depth_score': 0.50, 'serious_usage_score': 0.25},
+    'serious_heavy': {'sustained_usage_score': 0.25, 'workflow_depth_score': 0.25, 'serious_usage_score': 0.50},
+    'equal_weights': {'sustained_usage_score': 1 / 3, 'workflow_depth_score': 1 / 3, 'serious_usage_score': 1 / 3},
+}
+
+# Term transforms (max_scaled rescales a feature to a 0-10 range)
+score_transforms = {
+    'identity': lambda x: x,
+    'log1p': np.log1p,
+    'max_scaled': lambda x: x / (x.max() if x.max() > 0 else 1) * 10,
+}
+
+
+def compile_scoring_config(config, scenarios):
+    """
+    Compile the scoring config into a feature-term list, a coefficient matrix
+    (terms x sub-scores), a scenario matrix (terms x scenarios) and one
+    flat expression string per output column.
+    """
+    sub_names = list(config['sub_scores'])
+    terms = []
+    for sub_terms in config['sub_scores'].values():
+        for column, transform, _ in sub_terms:
+            if (column, transform) not in terms:
+                terms.append((column, transform))
+
+    coefficients = np.zeros((len(terms), len(sub_names)), dtype=np.float32)
+    for j, sub_name in enumerate(sub_names):
+        for column, transform, weight in config['sub_scores'][sub_name]:
+            coefficients[terms.index((column, transform)), j] += weight
+
+    # Every weighting collapses to one coefficient per term, so all scenarios
+    # are scored together by a single matrix product
+    weightings = {'baseline': config['composite_weights'], **scenarios}
+    weight_matrix = np.array(
+        [[weights.get(sub_name, 0.0) for weights in weightings.values()] for sub_name in sub_names],
+        dtype=np.float32
+    )
+    scenario_matrix = coefficients @ weight_matrix
+
+    def to_expression(column_coefficients):
+        return ' + '.join(f'{c:.6g} * t{i}' for i, c in enumerate(column_coefficients.tolist()) if c != 0)
+
+    expressions = {sub_name: to_expression(coefficients[:, j]) for j, sub_name in enumerate(sub_names)}
+    expressions['composite_success_score'] = to_expression(scenario_matrix[:, 0])
+
+    return {
+        'terms': terms,
+        'sub_names': sub_names,
+        'coefficients': coefficients,
+        'scenario_names': list(weightings),
+        'scenario_matrix': scenario_matrix,
+        'expressions': expressions,
+    }
+
+
+def build_term_matrix(frame, terms):
+    """Evaluate every (feature, transform) term into one float32 matrix (users x terms)"""
+    term_matrix = np.empty((len(frame), len(terms)), dtype=np.float32)
+    for i, (column, transform) in enumerate(terms):
+        term_matrix[:, i] = score_transforms[transform](frame[column].to_numpy(dtype=np.float32))
+    return term_matrix
+
+
+def evaluate_scores(compiled, term_matrix):
+    """Evaluate sub-scores and composite score, via numexpr when it is installed"""
+    if ne is not None:
+        term_columns = {f't{i}': np.ascontiguousarray(term_matrix[:, i]) for i in range(term_matrix.shape[1])}
+        return {name: ne.evaluate(expr, local_dict=term_columns) for name, expr in compiled['expressions'].items()}
+    sub_scores = term_matrix @ compiled['coefficients']
+    scores = {name: sub_scores[:, j] for j, name in enumerate(compiled['sub_names'])}
+    scores['composite_success_score'] = term_matrix @ compiled['scenario_matrix'][:, 0]
+    return scores
+
+
 success_metrics = user_success_df.copy()
 
-# Create normalized composite score (0-100 scale)
+# Create composite score from the compiled config
 # Key success indicators: sustained usage, workflow depth, serious engagement
-success_metrics['sustained_usage_score'] = (
-    success_metrics['days_active'] * 0.4 + 
-    success_metrics['weeks_active'] * 0.3 + 
-    (success_metrics['time_span_days'] / success_metrics['time_span_days'].max() * 10) * 0.3
-)
+compiled_scoring = compile_scoring_config(scoring_config, scoring_scenarios)
+score_term_matrix = build_term_matrix(success_metrics, compiled_scoring['terms'])
+for _score_name, _score_values in evaluate_scores(compiled_scoring, score_term_matrix).items():
+    success_metrics[_score_name] = _score_values.astype(np.float64)
 
-success_metrics['workflow_depth_score'] = (
-    success_metrics['unique_event_types'] * 0.5 + 
-    success_metrics['event_diversity_score'] * 2 +
-    (success_metrics['sessions_with_diverse_events'] / success_metrics['sessions_with_diverse_events'].max() * 10) * 0.5
-)
+# Re-score all users under every weighting in one pass (users x scenarios)
+scenario_score_matrix = score_term_matrix @ compiled_scoring['scenario_matrix']
 
-success_metrics['serious_usage_score'] = (
-    np.log1p(success_metrics['total_credits_used']) * 2 +
-    success_metrics['tool_invocation_count'] / 10 +
-    success_metrics['execution_event_count'] / 10
-)
+# Define success tiers using percentiles
+tier_percentiles = [0.20, 0.50, 0.80, 0.95]
+tier_labels = ['Trial Users', 'Casual Users', 'Regular Users', 'Active Users', 'Power Users']
+
+
+def assign_success_tiers(score_matrix):
+    """Assign percentile tiers column-wise to a (users x scenarios) score matrix"""
+    thresholds = np.quantile(score_matrix, tier_percentiles, axis=0)
+    tier_codes = (score_matrix[None, :, :] >= thresholds[:, None, :]).sum(axis=0)
+    return np.asarray(tier_labels, dtype=object)[tier_codes], thresholds
 
-# Composite success score
-success_metrics['composite_success_score'] = (
-    success_metrics['sustained_usage_score'] * 0.35 +
-    success_metrics['workflow_depth_score'] * 0.35 +
-    success_metrics['serious_usage_score'] * 0.30
+
+_baseline_tiers, _baseline_thresholds = assign_success_tiers(
+    success_metrics[['composite_success_score']].to_numpy(dtype=np.float64)
 )
+percentile_20, percentile_50, percentile_80, percentile_95 = _baseline_thresholds[:, 0]
+success_metrics['success_tier'] = _baseline_tiers[:, 0]
 
-# Define success tiers using percentiles
-percentile_20 = success_metrics['composite_success_score'].quantile(0.20)
-percentile_50 = success_metrics['composite_success_score'].quantile(0.50)
-percentile_80 = success_metrics['composite_success_score'].quantile(0.80)
-percentile_95 = success_metrics['composite_success_score'].quantile(0.95)
-
-def categorize_success(score):
-    if score >= percentile_95:
-        return 'Power Users'
-    elif score >= percentile_80:
-        return 'Active Users'
-    elif score >= percentile_50:
-        return 'Regular Users'
-    elif score >= percentile_20:
-        return 'Casual Users'
-    else:
-        return 'Trial Users'
+scenario_tiers, scenario_thresholds = assign_success_tiers(scenario_score_matrix.astype(np.float64))
 
-success_metrics['success_tier'] = success_metrics['composite_success_score'].apply(categorize_success)
+# What-if scores and tiers per scenario
+scenario_scores = pd.DataFrame(
+    scenario_score_matrix.astype(np.float64), columns=[f'{name}_score' for name in compiled_scoring['scenario_names']]
+)
+for _j, _scenario in enumerate(compiled_scoring['scenario_names']):
+    scenario_scores[f'{_scenario}_tier'] = scenario_tiers[:, _j]
+scenario_scores.insert(0, 'user_id', success_metrics['user_id'].to_numpy())
 
 # Calculate tier statistics
 tier_stats = success_metrics.groupby('success_tier').agg({
@@ -93,7 +196,127 @@ for tier, count in tier_distribution.items():
     pct = (count / len(success_metrics)) * 100
     print(f"  {tier:20s}: {count:5,} users ({pct:5.1f}%)")
 
+# What-if comparison against the baseline weighting
+print(f"\n🔀 WHAT-IF SCORING SCENARIOS (vs baseline tiers):")
+_baseline_tier_col = scenario_scores['baseline_tier']
+_baseline_power = set(scenario_scores.loc[_baseline_tier_col == 'Power Users', 'user_id'])
+for _scenario in compiled_scoring['scenario_names'][1:]:
+    _tier_changes = (scenario_scores[f'{_scenario}_tier'] != _baseline_tier_col).sum()
+    _rank_corr = scenario_scores[f'{_scenario}_score'].corr(scenario_scores['baseline_score'], method='spearman')
+    _scenario_power = set(scenario_scores.loc[scenario_scores[f'{_scenario}_tier'] == 'Power Users', 'user_id'])
+    _power_overlap = len(_scenario_power & _baseline_power) / max(len(_baseline_power), 1) * 100
+    print(f"  {_scenario:20s}: {_tier_changes:5,} users change tier ({_tier_changes / len(scenario_scores) * 100:5.1f}%), "
+          f"rank corr {_rank_corr:.3f}, Power User overlap {_power_overlap:5.1f}%")
+
+# ==================== OPTIONAL BEHAVIOURAL CLUSTERING ====================
+# 'percentile' keeps the fixed tiers only; 'cluster' additionally segments users
+# with MiniBatchKMeans over the scaled feature matrix
+segmentation_mode = os.environ.get('SEGMENTATION_MODE', 'percentile')
+
+cluster_feature_cols = [
+    'days_active', 'weeks_active', 'time_span_days', 'avg_events_per_day',
+    'unique_event_types', 'event_diversity_score', 'execution_event_rate',
+    'unique_canvases', 'avg_events_per_session', 'sessions_with_diverse_events',
+    'total_credits_used', 'tool_invocation_count'
+]
+cluster_k_candidates = range(3, 9)
+cluster_batch_size = 4096
+cluster_fit_sample_size = 200_000     # users used to compare candidate k values
+silhouette_sample_size = 10_000       # silhouette is O(n^2), so it is always sampled
+cluster_streaming_threshold = 1_000_000  # above this, fit with partial_fit over chunks
+cluster_streaming_epochs = 3
+
+
+def iter_row_chunks(n_rows, chunk_size, rng=None):
+    """Yield index slices (shuffled chunk order when rng is given) covering n_rows"""
+    starts = np.arange(0, n_rows, chunk_size)
+    if rng is not None:
+        rng.shuffle(starts)
+    for start in starts:
+        yield slice(start, min(start + chunk_size, n_rows))
+
+
+def fit_behavior_clusters(features, random_state=42):
+    """
+    Scale log-transformed features, pick k by sampled silhouette score and fit
+    MiniBatchKMeans (streaming partial_fit for very large user counts).
+    Returns (labels, fitted model, {k: silhouette}).
+    """
+    rng = np.random.default_rng(random_state)
+    matrix = np.log1p(np.clip(features.to_numpy(dtype=np.float32), 0, None))
+    n_rows = len(matrix)
+    streaming = n_rows > cluster_streaming_threshold
+
+    scaler = StandardScaler()
+    if streaming:
+        for rows in iter_row_chunks(n_rows, cluster_batch_size * 64):
+            scaler.partial_fit(matrix[rows])
+    else:
+        scaler.fit(matrix)
+
+    # Select k on a sample so candidate fits and silhouettes stay cheap
+    fit_idx = rng.choice(n_rows, size=min(n_rows, cluster_fit_sample_size), replace=False)
+    fit_sample = scaler.transform(matrix[fit_idx]).astype(np.float32)
+    selection = {}
+    for k in cluster_k_candidates:
+        if k >= len(fit_sample):
+            break
+        candidate = MiniBatchKMeans(n_clusters=k, batch_size=cluster_batch_size, n_init=3, random_state=random_state)
+        candidate_labels = candidate.fit_predict(fit_sample)
+        if len(np.unique(candidate_labels)) < 2:
+            continue
+        selection[k] = silhouette_score(
+            fit_sample, candidate_labels,
+            sample_size=min(len(fit_sample), silhouette_sample_size), random_state=random_state
+        )
+    best_k = max(selection, key=selection.get) if selection else min(cluster_k_candidates)
+
+    model = MiniBatchKMeans(n_clusters=best_k, batch_size=cluster_batch_size, n_init=3, random_state=random_state)
+    if streaming:
+        for _ in range(cluster_streaming_epochs):
+            for rows in iter_row_chunks(n_rows, cluster_batch_size, rng):
+                model.partial_fit(scaler.transform(matrix[rows]))
+    else:
+        model.fit(scaler.transform(matrix))
+
+    labels = np.empty(n_rows, dtype=np.int32)
+    for rows in iter_row_chunks(n_rows, cluster_batch_size * 64):
+        labels[rows] = model.predict(scaler.transform(matrix[rows]).astype(np.float32))
+    return labels, model, selection
+
+
+cluster_profiles = None
+cluster_selection = {}
+if segmentation_mode == 'cluster':
+    _cluster_labels, cluster_model, cluster_selection = fit_behavior_clusters(success_metrics[cluster_feature_cols])
+
+    # Number clusters by mean composite score so cluster 1 is the most successful
+    _cluster_rank = (
+        pd.Series(success_metrics['composite_success_score'].to_numpy()).groupby(_cluster_labels).mean()
+        .rank(ascending=False, method='first').astype(int)
+    )
+    success_metrics['behavior_cluster'] = _cluster_rank.reindex(_cluster_labels).to_numpy()
+
+    cluster_profiles = success_metrics.groupby('behavior_cluster').agg(
+        user_count=('user_id', 'count'),
+        composite_success_score_mean=('composite_success_score', 'mean'),
+        **{f'{col}_mean': (col, 'mean') for col in cluster_feature_cols}
+    ).round(2)
+    cluster_tier_crosstab = pd.crosstab(
+        success_metrics['behavior_cluster'], success_metrics['success_tier'], normalize='index'
+    ).reindex(columns=tier_order, fill_value=0) * 100
+
+    print(f"\n🧩 BEHAVIOURAL CLUSTERS (MiniBatchKMeans, k={len(cluster_profiles)}):")
+    print("  Silhouette by k (sampled): " + ', '.join(f"k={k}: {v:.3f}" for k, v in cluster_selection.items()))
+    print(cluster_profiles[['user_count', 'composite_success_score_mean', 'days_active_mean',
+                            'unique_event_types_mean', 'total_credits_used_mean']].to_string())
+    print(f"\n  Tier mix per cluster (%):")
+    print(cluster_tier_crosstab.round(1).to_string())
+
 print(f"\n💾 Output: success_metrics DataFrame with {len(success_metrics):,} users segmented into 5 tiers")
+print(f"   Output: scenario_scores with {len(compiled_scoring['scenario_names'])} what-if weightings")
+if cluster_profiles is not None:
+    print(f"   Output: cluster_profiles with {len(cluster_profiles)} behavioural clusters")
 
 # Store segmented data
 user_segments = success_metrics
\ No newline at end of file
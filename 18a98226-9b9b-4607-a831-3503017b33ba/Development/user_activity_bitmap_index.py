@@ -0,0 +1,156 @@
+import time
+import pandas as pd
+import numpy as np
+
+try:
+    from pyroaring import BitMap
+except ImportError:
+    BitMap = None
+
+# Compressed bitmap index over integer user codes for fast segment queries
+print("🗂️ USER ACTIVITY BITMAP INDEX")
+print("=" * 80)
+
+
+class UserBitmapIndex:
+    """
+    One bitmap of user codes per (dimension, value), e.g. ('day', '2025-09-01'),
+    ('event_category', 'execution'), ('tool_name', 'run_block'), ('tier', 'Power Users'),
+    ('credit_band', 'Medium (1-10)').
+
+    Bitmaps are Roaring bitmaps when pyroaring is installed (`pip install
+    pyroaring`), otherwise packed numpy bit arrays; both support & and |
+    directly, so segment membership is answered by bitmap AND/OR instead of
+    DataFrame filters. The numpy fallback is uncompressed: every bitmap costs
+    n_users / 8 bytes however sparse it is, so the index grows with
+    (days + other dimension values) x users.
+    """
+
+    def __init__(self, user_ids):
+        self.users = pd.Index(user_ids)
+        self.n_users = len(self.users)
+        self.backend = 'roaring' if BitMap is not None else 'numpy'
+        self.bitmaps = {}
+
+    def _from_codes(self, codes):
+        if self.backend == 'roaring':
+            return BitMap(np.unique(codes).astype(np.uint32))
+        mask = np.zeros(self.n_users, dtype=bool)
+        mask[codes] = True
+        return np.packbits(mask)
+
+    def empty(self):
+        return self._from_codes(np.empty(0, dtype=np.int64))
+
+    def all_users(self):
+        return self._from_codes(np.arange(self.n_users))
+
+    def add_dimension(self, dimension, user_codes, values):
+        """Index (user code, value) pairs: one bitmap per distinct value"""
+        value_codes, value_names = pd.factorize(pd.Series(values), use_na_sentinel=True)
+        keep = value_codes >= 0
+        user_codes, value_codes = np.asarray(user_codes)[keep], value_codes[keep]
+        order = np.argsort(value_codes, kind='stable')
+        boundaries = np.flatnonzero(np.diff(value_codes[order])) + 1
+        for group in np.split(order, boundaries) if len(order) else []:
+            self.bitmaps[(dimension, value_names[value_codes[group[0]]])] = self._from_codes(user_codes[group])
+        return self
+
+    def get(self, dimension, value):
+        return self.bitmaps.get((dimension, value), self.empty())
+
+    def values(self, dimension):
+        return [value for dim, value in self.bitmaps if dim == dimension]
+
+    def any_of(self, dimension, values=None):
+        """OR of the bitmaps for the given values (all values when None)"""
+        result = self.empty()
+        for value in (self.values(dimension) if values is None else values):
+            result = result | self.get(dimension, value)
+        return result
+
+    def at_least(self, dimension, k, values=None):
+        """Users present in at least k of the value bitmaps (layered OR/AND counting)"""
+        reached = [self.all_users()] + [self.empty() for _ in range(k)]
+        for value in (self.values(dimension) if values is None else values):
+            bitmap = self.get(dimension, value)
+            for j in range(k, 0, -1):
+                reached[j] = reached[j] | (reached[j - 1] & bitmap)
+        return reached[k]
+
+    def difference(self, left, right):
+        return left - right if self.backend == 'roaring' else left & ~right
+
+    def count(self, bitmap):
+        if self.backend == 'roaring':
+            return len(bitmap)
+        return int(np.unpackbits(bitmap, count=self.n_users).sum())
+
+    def to_user_ids(self, bitmap):
+        codes = np.fromiter(bitmap, dtype=np.int64) if self.backend == 'roaring' else np.flatnonzero(
+            np.unpackbits(bitmap, count=self.n_users)
+        )
+        return self.users[codes]
+
+
+# Integer user codes shared by every dimension
+_index_events = df_features[['user_id', 'timestamp', 'event', 'prop_tool_name', 'prop_credits_used']]
+_user_codes, _user_ids = pd.factorize(_index_events['user_id'])
+activity_index = UserBitmapIndex(_user_ids)
+
+# (day): calendar day (formatted once per distinct day) and day since the user's first event (0-6 = week 1)
+_first_seen = _index_events.groupby(_user_codes)['timestamp'].transform('min')
+_day_codes, _days = pd.factorize(_index_events['timestamp'].dt.floor('D'))
+activity_index.add_dimension('day', _user_codes, pd.Categorical.from_codes(_day_codes, _days.strftime('%Y-%m-%d')))
+activity_index.add_dimension(
+    'day_since_first', _user_codes, ((_index_events['timestamp'] - _first_seen).dt.total_seconds() // 86400).astype(int)
+)
+
+# (event category): categorize_event from event_sequence_patterns, mapped once per event name
+_event_category_map = {_event_name: categorize_event(_event_name) for _event_name in _index_events['event'].dropna().unique()}
+activity_index.add_dimension('event_category', _user_codes, _index_events['event'].map(_event_category_map))
+
+# (tool name) and usage flags
+activity_index.add_dimension('tool_name', _user_codes, _index_events['prop_tool_name'])
+_flags = pd.Series(np.where(_index_events['prop_credits_used'].fillna(0) > 0, 'used_credits', None))
+activity_index.add_dimension('flag', _user_codes, _flags)
+activity_index.bitmaps[('flag', 'invoked_tool')] = activity_index.any_of('tool_name')
+
+# (tier): one bitmap per success tier
+_tier_user_codes = activity_index.users.get_indexer(user_segments['user_id'])
+_known_tier_users = _tier_user_codes >= 0
+activity_index.add_dimension(
+    'tier', _tier_user_codes[_known_tier_users], user_segments['success_tier'].to_numpy()[_known_tier_users]
+)
+
+# (credit band): total credits per user, so credit thresholds become unions of bands
+credit_band_labels = ['Zero Credits', 'Low (<1)', 'Medium (1-10)', 'High (10-50)', 'Very High (50+)']
+_credit_totals = user_segments['total_credits_used'].fillna(0).to_numpy()[_known_tier_users]
+activity_index.add_dimension(
+    'credit_band', _tier_user_codes[_known_tier_users],
+    np.select([_credit_totals == 0, _credit_totals < 1, _credit_totals < 10, _credit_totals < 50],
+              credit_band_labels[:4], credit_band_labels[4])
+)
+
+_dimension_sizes = pd.Series([dim for dim, _ in activity_index.bitmaps]).value_counts()
+print(f"Backend: {activity_index.backend} | Users: {activity_index.n_users:,} | Bitmaps: {len(activity_index.bitmaps):,}")
+for _dim, _n in _dimension_sizes.items():
+    print(f"  {_dim:18s}: {_n:6,} bitmaps")
+if activity_index.backend == 'numpy':
+    _fallback_mb = len(activity_index.bitmaps) * -(-activity_index.n_users // 8) / 1024 ** 2
+    print(f"⚠️ pyroaring is not installed; bitmaps are uncompressed numpy bit arrays "
+          f"({_fallback_mb:,.1f} MB, n_users / 8 bytes each). Install pyroaring for compressed bitmaps.")
+
+# Example query: active on ≥3 distinct days in week 1, invoked a tool and used credits
+_t0 = time.perf_counter()
+_example_segment = (
+    activity_index.at_least('day_since_first', 3, values=range(7))
+    & activity_index.get('flag', 'invoked_tool')
+    & activity_index.get('flag', 'used_credits')
+)
+_example_count = activity_index.count(_example_segment)
+_query_us = (time.perf_counter() - _t0) * 1e6
+print(f"\n🔎 Example: ≥3 days active in week 1 AND invoked a tool AND used credits")
+print(f"  Users: {_example_count:,} (evaluated in {_query_us:,.0f} µs)")
+
+print(f"\n💾 Output: activity_index with {len(activity_index.bitmaps):,} bitmaps over {activity_index.n_users:,} users")
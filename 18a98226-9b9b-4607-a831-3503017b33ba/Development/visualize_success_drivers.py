@@ -1,3 +1,4 @@
+import os
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -22,6 +23,25 @@ plt.rcParams['xtick.color'] = _text_primary
 plt.rcParams['ytick.color'] = _text_primary
 plt.rcParams['axes.edgecolor'] = _text_secondary
 
+# Per-user distributions are pre-aggregated (fixed bins / hexbin grid) and dense
+# artists rasterised, so render time and PDF size stay flat as the user count grows
+distribution_bins = int(os.environ.get('DISTRIBUTION_BINS', 40))
+density_gridsize = int(os.environ.get('DENSITY_GRIDSIZE', 40))
+
+
+def binned_histogram(ax, values, bins, **step_kwargs):
+    """Draw a histogram from np.histogram counts as a single step artist (one path, whatever the N)"""
+    counts, edges = np.histogram(np.asarray(values, dtype=np.float64), bins=bins)
+    ax.stairs(counts, edges, **step_kwargs)
+    return counts, edges
+
+
+def density_hexbin(ax, x, y, gridsize, **hexbin_kwargs):
+    """Hexbin density of two per-user columns, rasterised and on a log colour scale"""
+    return ax.hexbin(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64), gridsize=gridsize,
+                     bins='log', mincnt=1, rasterized=True, **hexbin_kwargs)
+
+
 # 1. Success Tier Distribution
 tier_dist_fig = plt.figure(figsize=(10, 6))
 tier_counts = user_segments['success_tier'].value_counts().reindex(['Power Users', 'Active Users', 'Regular Users', 'Casual Users', 'Trial Users'])
@@ -43,7 +63,7 @@ success_metrics_list = ['composite_success_score', 'days_active', 'total_credits
 corr_matrix = user_segments[early_metrics_list + success_metrics_list].corr().loc[early_metrics_list, success_metrics_list]
 
 # Plot heatmap
-viz_im = plt.imshow(corr_matrix.values, cmap='RdYlGn', aspect='auto', vmin=-0.5, vmax=1.0)
+viz_im = plt.imshow(corr_matrix.values, cmap='RdYlGn', aspect='auto', vmin=-0.5, vmax=1.0, rasterized=True)
 plt.xticks(range(len(success_metrics_list)), ['Success Score', 'Days Active', 'Credits Used'], rotation=0, fontsize=11)
 plt.yticks(range(len(early_metrics_list)), 
            ['Activity Intensity', 'Event Types', 'Execution Rate', 'Tool Usage', 'Complete Sessions', 'Canvas Exploration'], 
@@ -140,5 +160,54 @@ plt.grid(axis='y', alpha=0.2, color=_text_secondary)
 plt.tight_layout()
 print("✓ Created score components breakdown")
 
-print(f"\n✅ Generated 6 comprehensive visualizations of success drivers")
+# 7. Cohort Retention Heatmap
+retention_heatmap_fig = plt.figure(figsize=(12, 7))
+retention_weeks_viz = [f'week_{k}' for k in range(12)]
+retention_values_viz = cohort_retention_df[retention_weeks_viz].to_numpy()
+retention_im = plt.imshow(np.ma.masked_invalid(retention_values_viz), cmap='viridis', aspect='auto', vmin=0, vmax=100,
+                          rasterized=True)
+plt.xticks(range(len(retention_weeks_viz)), [str(_k) for _k in range(len(retention_weeks_viz))], fontsize=10)
+plt.yticks(range(len(cohort_retention_df)),
+           [f"{_week:%Y-%m-%d} (n={_size:,})" for _week, _size in zip(cohort_retention_df.index, cohort_retention_df['cohort_size'])],
+           fontsize=9)
+plt.xlabel('Weeks Since Signup', fontsize=12, color=_text_primary)
+plt.ylabel('Signup Week Cohort', fontsize=12, color=_text_primary)
+plt.title('Cohort Retention by Signup Week', fontsize=14, fontweight='bold', color=_text_primary, pad=20)
+retention_cbar = plt.colorbar(retention_im, label='Active Users (% of Cohort)')
+retention_cbar.ax.yaxis.label.set_color(_text_primary)
+retention_cbar.ax.tick_params(colors=_text_primary)
+if retention_values_viz.size <= 400:
+    for _i in range(retention_values_viz.shape[0]):
+        for _j in range(retention_values_viz.shape[1]):
+            if not np.isnan(retention_values_viz[_i, _j]):
+                plt.text(_j, _i, f'{retention_values_viz[_i, _j]:.0f}', ha='center', va='center',
+                         color='black' if retention_values_viz[_i, _j] > 60 else _text_primary, fontsize=8)
+plt.tight_layout()
+print("✓ Created cohort retention heatmap")
+
+# 8. Per-User Success Score Distribution
+score_distribution_fig, (score_hist_ax, score_density_ax) = plt.subplots(1, 2, figsize=(14, 6))
+score_bin_edges = np.linspace(0, user_segments['composite_success_score'].max(), distribution_bins + 1)
+for _k, _tier in enumerate(tier_order_viz):
+    binned_histogram(score_hist_ax,
+                     user_segments.loc[user_segments['success_tier'] == _tier, 'composite_success_score'],
+                     score_bin_edges, color=_colors[_k], linewidth=2, label=_tier)
+score_hist_ax.set_yscale('log')
+score_hist_ax.set_xlabel('Composite Success Score', fontsize=12)
+score_hist_ax.set_ylabel('Users (log scale)', fontsize=12)
+score_hist_ax.set_title('Success Score by Tier', fontsize=14, fontweight='bold', pad=20)
+score_hist_ax.grid(axis='y', alpha=0.2, color=_text_secondary)
+score_hist_ax.legend(facecolor=_bg_color, edgecolor=_text_secondary, labelcolor=_text_primary, fontsize=9)
+score_density = density_hexbin(score_density_ax, user_segments['days_active'], user_segments['composite_success_score'],
+                               density_gridsize, cmap='viridis')
+score_density_ax.set_xlabel('Days Active', fontsize=12)
+score_density_ax.set_ylabel('Composite Success Score', fontsize=12)
+score_density_ax.set_title('Days Active vs Success Score', fontsize=14, fontweight='bold', pad=20)
+score_density_cbar = score_distribution_fig.colorbar(score_density, ax=score_density_ax, label='Users')
+score_density_cbar.ax.yaxis.label.set_color(_text_primary)
+score_density_cbar.ax.tick_params(colors=_text_primary)
+score_distribution_fig.tight_layout()
+print(f"✓ Created success score distribution ({len(user_segments):,} users in {distribution_bins} bins)")
+
+print(f"\n✅ Generated 8 comprehensive visualizations of success drivers")
 print(f"   All charts use Zerve design system and are presentation-ready")
\ No newline at end of file
@@ -244,6 +244,40 @@ for _idx, _row in recommendations_df.iterrows():
         if _line.strip():
             print(f"   {_line}")
 
+# Measured onboarding milestones backing the first-tool-invocation recommendation
+print("\n" + "=" * 100)
+print("MEASURED ONBOARDING MILESTONES")
+print("=" * 100)
+
+for _, _step in funnel_df.iterrows():
+    print(f"\n   • {_step['step']}: {_step['conversion_from_start']:.1f}% of new users "
+          f"(median {_step['median_hours_from_previous']:.1f}h after previous step)")
+_first_tool_hours = time_to_milestone_df['hours_to_first_tool_invocation'].dropna()
+if len(_first_tool_hours) > 0:
+    print(f"\n   • Median time to first tool invocation: {_first_tool_hours.median():.1f}h "
+          f"({(_first_tool_hours <= 24).mean() * 100:.1f}% of tool users within 24h)")
+
+# Target segment sizes evaluated by bitmap AND/OR over the activity index
+print("\n" + "=" * 100)
+print("MEASURED TARGET SEGMENTS")
+print("=" * 100)
+
+_invoked_tool = activity_index.get('flag', 'invoked_tool')
+_zero_credits = activity_index.get('credit_band', 'Zero Credits')
+target_segment_bitmaps = {
+    'Explorers (invoked a tool, 2+ days active)': _invoked_tool & activity_index.at_least('day', 2),
+    'Explorers without credits (credit conversion target)': (
+        _invoked_tool & activity_index.at_least('day', 2) & _zero_credits
+    ),
+    'Week 1 users active on 1-2 days only (nudge target)': activity_index.difference(
+        activity_index.any_of('day_since_first', range(7)), activity_index.at_least('day_since_first', 3, values=range(7))
+    ),
+    'Multi-tool users (2+ distinct tools)': activity_index.at_least('tool_name', 2),
+}
+for _segment, _bitmap in target_segment_bitmaps.items():
+    _count = activity_index.count(_bitmap)
+    print(f"\n   • {_segment}: {_count:,} users ({_count / max(activity_index.n_users, 1) * 100:.1f}%)")
+
 # Key insights summary
 print("\n" + "=" * 100)
 print("KEY INSIGHTS SUMMARY")
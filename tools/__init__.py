@@ -0,0 +1 @@
+"""Local tooling for running and caching the exported Zerve canvas outside the platform."""
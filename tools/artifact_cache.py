@@ -0,0 +1,229 @@
+"""
+Content-addressed cache of canvas block outputs.
+
+A block's key hashes its source, the keys of its parent blocks (so any upstream
+change invalidates everything below it), the contents of data files it names
+and the environment variables it reads. The artifact holds every public
+variable the block produced; functions, classes and lambda tables are not
+stored but rebuilt on load by executing only the block's definition statements,
+so cached objects of block-defined classes unpickle against the same definitions.
+"""
+import ast
+import hashlib
+import os
+import pickle
+import sys
+import types
+
+import numpy as np
+import pandas as pd
+
+from tools.canvas import produced_names
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = '.zerve_cache'
+DEFINITION_NODES = (ast.Import, ast.ImportFrom, ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+_file_fingerprints = {}
+
+
+def fingerprint_file(path):
+    """sha256 of a file's contents (memoized per path, size and mtime)"""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if memo_key not in _file_fingerprints:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as handle:
+            for chunk in iter(lambda: handle.read(1 << 20), b''):
+                digest.update(chunk)
+        _file_fingerprints[memo_key] = digest.hexdigest()
+    return _file_fingerprints[memo_key]
+
+
+def referenced_files(tree, workdir):
+    """String literals in the block that name existing files under the working directory"""
+    paths = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str) and 0 < len(node.value) < 512:
+            candidate = os.path.join(workdir, node.value)
+            if '\n' not in node.value and os.path.isfile(candidate):
+                paths.add(node.value)
+    return sorted(paths)
+
+
+def referenced_env_vars(tree):
+    """Names read through os.environ.get(...), os.environ[...] or os.getenv(...)"""
+    names = set()
+    for node in ast.walk(tree):
+        target, key = None, None
+        if isinstance(node, ast.Call) and node.args and isinstance(node.func, ast.Attribute):
+            target, key = node.func, node.args[0]
+            if not (target.attr in ('get', 'getenv') and ast.unparse(target.value) in ('os.environ', 'os')):
+                continue
+        elif isinstance(node, ast.Subscript) and ast.unparse(node.value) == 'os.environ':
+            key = node.slice
+        if isinstance(key, ast.Constant) and isinstance(key.value, str):
+            names.add(key.value)
+    return sorted(names)
+
+
+def block_key(source, parent_keys, workdir='.'):
+    """Content address of one block run: source + parent keys + data files + env vars + runtime"""
+    tree = ast.parse(source)
+    digest = hashlib.sha256()
+    for part in [
+        f'v{CACHE_VERSION}', sys.version.split()[0], np.__version__, pd.__version__,
+        hashlib.sha256(source.encode('utf-8')).hexdigest(),
+        *(f'parent:{name}={key}' for name, key in sorted(parent_keys.items())),
+        *(f'file:{path}={fingerprint_file(os.path.join(workdir, path))}' for path in referenced_files(tree, workdir)),
+        *(f'env:{name}={os.environ.get(name)}' for name in referenced_env_vars(tree)),
+    ]:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def input_fingerprint(sources, workdir='.'):
+    """Content address of the data files (e.g. the CSV export) referenced by any of the block sources"""
+    paths = sorted({path for source in sources for path in referenced_files(ast.parse(source), workdir)})
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(f'{path}={fingerprint_file(os.path.join(workdir, path))}\0'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def block_module(name):
+    """Fresh module registered in sys.modules, so block-defined functions and classes pickle by reference"""
+    module = types.ModuleType(f'canvas_block_{name}')
+    sys.modules[module.__name__] = module
+    return module
+
+
+def block_outputs(module, inherited, source):
+    """Public variables a block produced: new or rebound names, plus names it assigned into"""
+    assigned = produced_names(ast.parse(source))
+    outputs = {}
+    for name, value in module.__dict__.items():
+        if name.startswith('_') or isinstance(value, types.ModuleType):
+            continue
+        if name not in inherited or inherited[name] is not value or name in assigned:
+            outputs[name] = value
+    return outputs
+
+
+def is_definition(value):
+    return isinstance(value, (types.FunctionType, type))
+
+
+def is_definition_statement(node):
+    """
+    Imports, defs and classes, `try: import x / except ImportError: x = None` guards,
+    and assignments of lambda tables (e.g. a dict of scoring transforms), which
+    cannot be pickled and are rebuilt like functions.
+    """
+    if isinstance(node, ast.Try):
+        return all(isinstance(stmt, (ast.Import, ast.ImportFrom)) for stmt in node.body)
+    if isinstance(node, ast.Assign):
+        return is_lambda_table(node.value)
+    return isinstance(node, DEFINITION_NODES)
+
+
+def is_lambda_table(node):
+    """A lambda, or a dict/list/tuple literal with (nested tables of) lambdas among its entries"""
+    if isinstance(node, ast.Lambda):
+        return True
+    if isinstance(node, ast.Dict):
+        return any(is_lambda_table(value) for value in node.values)
+    if isinstance(node, (ast.List, ast.Tuple)):
+        return any(is_lambda_table(element) for element in node.elts)
+    return False
+
+
+def definition_names(source):
+    """Names bound by the block's definition statements"""
+    names = set()
+    for node in ast.parse(source).body:
+        if isinstance(node, ast.Assign) and is_definition_statement(node):
+            names |= {target.id for target in node.targets if isinstance(target, ast.Name)}
+    return names
+
+
+def definitions_code(source, filename):
+    """Code object with only the block's definition statements"""
+    tree = ast.parse(source)
+    tree.body = [node for node in tree.body if is_definition_statement(node)]
+    return compile(tree, filename, 'exec')
+
+
+def pack_outputs(module, outputs, source):
+    """
+    Pickle a block's outputs into an artifact; returns (artifact, unpicklable names).
+
+    Definitions are left out (they are rebuilt on unpack). Values whose pickle
+    references the block's own module are marked `bound` and unpickled only
+    after the definitions exist again.
+    """
+    values, bound, skipped = {}, [], []
+    rebuilt = definition_names(source)
+    for name, value in outputs.items():
+        if is_definition(value) or name in rebuilt:
+            continue
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            skipped.append(name)
+            continue
+        values[name] = data
+        if module.__name__.encode('utf-8') in data:
+            bound.append(name)
+    return {'values': values, 'bound': bound}, skipped
+
+
+def unpack_outputs(artifact, module, source, filename):
+    """
+    Restore an artifact into `module` and return the block's outputs.
+
+    Plain values are restored first, then the block's definitions are executed,
+    then values that reference block-defined functions or classes are unpickled.
+    """
+    outputs = {}
+    for name, data in artifact['values'].items():
+        if name not in artifact['bound']:
+            outputs[name] = module.__dict__[name] = pickle.loads(data)
+    exec(definitions_code(source, filename), module.__dict__)
+    for name in artifact['bound']:
+        outputs[name] = module.__dict__[name] = pickle.loads(artifact['values'][name])
+    rebuilt = definition_names(source)
+    for name, value in module.__dict__.items():
+        if name in rebuilt or (is_definition(value) and getattr(value, '__module__', None) == module.__name__):
+            outputs[name] = value
+    return outputs
+
+
+class ArtifactCache:
+    """Pickled block artifacts stored under `<root>/<key[:2]>/<key>.pkl`"""
+
+    def __init__(self, root=DEFAULT_CACHE_DIR):
+        self.root = root
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], f'{key}.pkl')
+
+    def store(self, key, artifact):
+        """Write an artifact atomically (only complete artifacts should be stored)"""
+        os.makedirs(os.path.dirname(self.path(key)), exist_ok=True)
+        tmp_path = f'{self.path(key)}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as handle:
+            pickle.dump(artifact, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path(key))
+
+    def load(self, key):
+        """The stored artifact, or None on a miss"""
+        if not os.path.exists(self.path(key)):
+            return None
+        try:
+            with open(self.path(key), 'rb') as handle:
+                return pickle.load(handle)
+        except Exception as exc:
+            print(f"  cache entry {key[:12]} unreadable ({exc}); recomputing")
+            return None
@@ -0,0 +1,99 @@
+"""
+Output parity and timing of the pandas and Polars feature backends on identical inputs.
+
+engineer_user_success_features, prepare_week1_churn_data and
+event_sequence_patterns read FEATURE_BACKEND ('pandas', the reference, or
+'polars'). This runs those blocks, with their dependencies, once per backend
+on the same export, compares every table they hand downstream and prints the
+block times side by side. Upstream blocks are shared through a throwaway
+artifact cache, so only the backend-dependent part runs twice. Exits non-zero
+when any table differs.
+
+    python -m tools.backend_parity --workdir data/
+    python -m tools.backend_parity --rows 1M
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+from tools.artifact_cache import ArtifactCache
+from tools.benchmark_pipeline import DEFAULT_BENCH_DIR, dataset_dir
+from tools.run_canvas import CanvasRun, execute_waves, plan_run
+from tools.synthetic_events import parse_row_count
+
+BACKENDS = ['pandas', 'polars']
+# Backend-dependent block -> tables it hands to downstream blocks
+BACKEND_OUTPUTS = {
+    'engineer_user_success_features': ['user_success_df'],
+    'prepare_week1_churn_data': ['week1_df', 'churn_data'],
+    'event_sequence_patterns': ['workflow_df', 'session_event_patterns'],
+}
+
+
+def run_backend(backend, workdir, cache_dir):
+    """(outputs by block, wall seconds by block) for one backend"""
+    previous = os.environ.get('FEATURE_BACKEND')
+    os.environ['FEATURE_BACKEND'] = backend
+    try:
+        blocks, dependencies, imports, waves, _ = plan_run(until=list(BACKEND_OUTPUTS))
+        run = CanvasRun(blocks, dependencies, imports, workdir, cache=ArtifactCache(cache_dir), quiet=True)
+        execute_waves(run, waves)
+    finally:
+        if previous is None:
+            os.environ.pop('FEATURE_BACKEND', None)
+        else:
+            os.environ['FEATURE_BACKEND'] = previous
+    seconds = {profile.name: profile.wall_seconds for profile in run.profiles}
+    return run.outputs, seconds
+
+
+def compare_tables(reference, candidate, rtol=1e-9, atol=1e-9):
+    """None when the tables match (values, columns and row order), otherwise the first difference"""
+    try:
+        pd.testing.assert_frame_equal(reference.reset_index(drop=True), candidate.reset_index(drop=True),
+                                      check_dtype=False, rtol=rtol, atol=atol)
+    except AssertionError as error:
+        return str(error).strip().splitlines()[0]
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workdir', default=None, help='directory holding the CSV export')
+    parser.add_argument('--rows', type=parse_row_count, default=None,
+                        help='use a synthetic export of this size instead (e.g. 100K, 1M)')
+    parser.add_argument('--bench-dir', default=DEFAULT_BENCH_DIR, help='where synthetic exports are kept')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    workdir = os.path.abspath(dataset_dir(args.bench_dir, args.rows, args.seed) if args.rows else args.workdir or '.')
+    print(f"⚖️ FEATURE BACKEND PARITY ({workdir})")
+    print("=" * 80)
+    outputs, seconds = {}, {}
+    with tempfile.TemporaryDirectory(prefix='backend_parity_') as cache_dir:
+        for backend in BACKENDS:
+            outputs[backend], seconds[backend] = run_backend(backend, workdir, cache_dir)
+
+    mismatches = 0
+    print(f"{'block':34s} {'table':24s} {'pandas s':>9s} {'polars s':>9s} {'speedup':>8s}  parity")
+    print("-" * 96)
+    for block, tables in BACKEND_OUTPUTS.items():
+        pandas_seconds, polars_seconds = seconds['pandas'][block], seconds['polars'][block]
+        for i, table in enumerate(tables):
+            difference = compare_tables(outputs['pandas'][block][table], outputs['polars'][block][table])
+            mismatches += difference is not None
+            timing = (f"{pandas_seconds:9.2f} {polars_seconds:9.2f} {pandas_seconds / polars_seconds:7.1f}x"
+                      if i == 0 else f"{'':9s} {'':9s} {'':8s}")
+            print(f"{block if i == 0 else '':34s} {table:24s} {timing}  {'✓' if difference is None else '✗ ' + difference}")
+    if mismatches:
+        print(f"\n❌ {mismatches} table(s) differ between backends", file=sys.stderr)
+        raise SystemExit(1)
+    print("\n✅ Polars backend matches the pandas reference")
+    return seconds
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Scaling benchmark: time pipeline stages on synthetic exports of growing size.
+
+For every size a synthetic export is generated once (reused across runs while
+the size, seed and generator version match), the selected stages run headlessly
+together with the blocks they depend on, and one record per size is appended to
+a JSON-lines results file keyed by git commit. The summary compares each stage
+with the latest result of a different commit, and `--history` prints stage
+times per commit.
+
+    python -m tools.benchmark_pipeline --sizes 100K 1M
+    python -m tools.benchmark_pipeline --sizes 10M 100M --stages event_sequence_patterns
+    python -m tools.benchmark_pipeline --history
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+from dataclasses import asdict
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from tools.instrumentation import BlockProfile, git_revision
+from tools.run_canvas import CanvasRun, execute_waves, plan_run
+from tools.synthetic_events import EXPORT_FILE_NAME, GENERATOR_VERSION, parse_row_count, write_synthetic_export
+
+DEFAULT_BENCH_DIR = '.zerve_bench'
+DEFAULT_STAGES = ['engineer_user_success_features', 'prepare_week1_churn_data', 'event_sequence_patterns']
+
+
+def dataset_dir(bench_dir, rows, seed):
+    """Working directory holding the synthetic export for one size, generated on first use"""
+    directory = os.path.join(bench_dir, 'data', f'{rows}-seed{seed}-gen{GENERATOR_VERSION}')
+    path = os.path.join(directory, EXPORT_FILE_NAME)
+    if not os.path.exists(path):
+        print(f"  generating {rows:,} synthetic events ...", flush=True)
+        write_synthetic_export(path, rows, seed)
+    return directory
+
+
+def benchmark_size(rows, stages, bench_dir, seed=0, jobs=1, trace_memory=False):
+    """Run the stages (and their dependencies) on one synthetic export; returns the result record"""
+    workdir = os.path.abspath(dataset_dir(bench_dir, rows, seed))
+    blocks, dependencies, imports, waves, warnings = plan_run(until=stages)
+    run = CanvasRun(blocks, dependencies, imports, workdir, cache=None, jobs=jobs, quiet=True,
+                    trace_memory=trace_memory)
+    wall = execute_waves(run, waves)
+    return {
+        'git_commit': git_revision(),
+        'recorded_at': datetime.now(timezone.utc).isoformat(),
+        'rows': rows,
+        'seed': seed,
+        'generator_version': GENERATOR_VERSION,
+        'jobs': jobs,
+        'wall_seconds': wall,
+        'environment': {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+                        'machine': platform.machine(), 'cpus': os.cpu_count()},
+        'blocks': [asdict(profile) for profile in run.profiles],
+    }
+
+
+def load_results(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def append_result(path, record):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as handle:
+        handle.write(json.dumps(record) + '\n')
+
+
+def baseline_for(results, record):
+    """Latest earlier result for the same size and seed from a different commit, or None"""
+    for earlier in reversed(results):
+        if (earlier['rows'], earlier['seed'], earlier['generator_version']) == \
+                (record['rows'], record['seed'], record['generator_version']) \
+                and earlier['git_commit'] != record['git_commit']:
+            return earlier
+    return None
+
+
+def summarize(record, baseline, stages):
+    """Per-stage table for one size: seconds, rows/s, peak memory and change against the baseline"""
+    before = {block['name']: BlockProfile.from_dict(block) for block in baseline['blocks']} if baseline else {}
+    print(f"\n📏 {record['rows']:,} ROWS @ {record['git_commit']}"
+          + (f" (vs {baseline['git_commit']})" if baseline else ''))
+    print(f"{'stage':40s} {'seconds':>9s} {'rows/s':>12s} {'peak MB':>8s} {'baseline':>9s} {'change':>8s}")
+    print("-" * 91)
+    for block in record['blocks']:
+        profile = BlockProfile.from_dict(block)
+        marker = '' if profile.name in stages else '  (dependency)'
+        previous = before.get(profile.name)
+        change = (f'{(profile.wall_seconds - previous.wall_seconds) / previous.wall_seconds * 100:+.0f}%'
+                  if previous and previous.wall_seconds > 0 else '')
+        rate = record['rows'] / profile.wall_seconds if profile.wall_seconds > 0 else float('inf')
+        peak = f'{profile.peak_rss_mb:8.0f}' if profile.peak_rss_mb is not None else f"{'-':>8s}"
+        baseline_seconds = f'{previous.wall_seconds:9.2f}' if previous else f"{'':9s}"
+        print(f"{profile.name:40s} {profile.wall_seconds:9.2f} {rate:12,.0f} {peak} {baseline_seconds} "
+              f"{change:>8s}{marker}")
+    print(f"{'wall clock':40s} {record['wall_seconds']:9.2f}")
+
+
+def print_history(results, stages):
+    """Stage seconds per commit (columns) for every benchmarked size"""
+    if not results:
+        print("No benchmark results recorded yet.")
+        return
+    rows = [
+        {'rows': record['rows'], 'commit': record['git_commit'], 'stage': block['name'],
+         'seconds': block['wall_seconds'], 'recorded_at': record['recorded_at']}
+        for record in results for block in record['blocks'] if not stages or block['name'] in stages
+    ]
+    history = pd.DataFrame(rows)
+    commit_order = history.groupby('commit')['recorded_at'].min().sort_values().index
+    table = history.pivot_table(index=['rows', 'stage'], columns='commit', values='seconds', aggfunc='last')
+    print(table[[commit for commit in commit_order if commit in table.columns]].round(2).to_string())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', type=parse_row_count, default=[100_000, 1_000_000],
+                        help='rows per synthetic export, e.g. 100K 1M 10M 100M')
+    parser.add_argument('--stages', nargs='+', default=DEFAULT_STAGES, help='blocks to time (with dependencies)')
+    parser.add_argument('--bench-dir', default=DEFAULT_BENCH_DIR, help='synthetic data and results location')
+    parser.add_argument('--results', default=None, help='results file (default: <bench-dir>/results.jsonl)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--jobs', type=int, default=1, help='worker processes per wave (1 times stages in isolation)')
+    parser.add_argument('--trace-memory', action='store_true', help='also record tracemalloc peaks (slower)')
+    parser.add_argument('--history', action='store_true', help='print recorded stage times per commit and exit')
+    args = parser.parse_args(argv)
+
+    results_path = args.results or os.path.join(args.bench_dir, 'results.jsonl')
+    results = load_results(results_path)
+    if args.history:
+        print_history(results, args.stages)
+        return None
+
+    print(f"🏁 PIPELINE SCALING BENCHMARK ({', '.join(f'{rows:,}' for rows in args.sizes)} rows)")
+    print("=" * 80)
+    for rows in args.sizes:
+        try:
+            record = benchmark_size(rows, args.stages, args.bench_dir, args.seed, args.jobs, args.trace_memory)
+        except MemoryError:
+            print(f"  {rows:,} rows: out of memory, skipping larger sizes", file=sys.stderr)
+            break
+        summarize(record, baseline_for(results, record), args.stages)
+        append_result(results_path, record)
+        results.append(record)
+    print(f"\n💾 Results: {results_path}")
+    return results
+
+
+if __name__ == '__main__':
+    main()
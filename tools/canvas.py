@@ -0,0 +1,258 @@
+"""
+Load an exported Zerve canvas: its code blocks, their source files and the dependency edges.
+
+Besides the edges recorded in layer.yaml, dependencies can be inferred from the
+code: every block consumes the free global names it reads and produces the
+public top-level names it assigns, and a consumer depends on the block that
+produces each name it reads (yaml ancestry decides between several producers).
+"""
+import ast
+import builtins
+import os
+import symtable
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+import yaml
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CODE_BLOCK_TYPE = 1
+
+
+@dataclass
+class CanvasBlock:
+    """One code block of a canvas layer and its neighbours in the layer's edge list."""
+    id: str
+    name: str
+    path: str
+    x: int = 0
+    y: int = 0
+    parents: list = field(default_factory=list)
+    children: list = field(default_factory=list)
+
+    def source(self):
+        with open(self.path, encoding='utf-8') as handle:
+            return handle.read()
+
+
+def find_canvas_dir(root=REPO_ROOT):
+    """The single exported canvas directory (the one holding canvas.yaml) under `root`"""
+    candidates = sorted(
+        entry.path for entry in os.scandir(root)
+        if entry.is_dir() and os.path.exists(os.path.join(entry.path, 'canvas.yaml'))
+    )
+    if len(candidates) != 1:
+        raise FileNotFoundError(f"Expected one canvas directory under {root}, found {len(candidates)}")
+    return candidates[0]
+
+
+def load_layer(canvas_dir, layer_name='Development'):
+    """{block name: CanvasBlock} for the code blocks of a layer, edges resolved to names"""
+    with open(os.path.join(canvas_dir, layer_name, 'layer.yaml'), encoding='utf-8') as handle:
+        layer = yaml.safe_load(handle)
+
+    blocks = {}
+    names_by_id = {}
+    for spec in layer['blocks']:
+        path = os.path.join(canvas_dir, layer_name, f"{spec['name']}.py")
+        if spec['type'] != CODE_BLOCK_TYPE or not os.path.exists(path):
+            continue
+        blocks[spec['name']] = CanvasBlock(id=spec['id'], name=spec['name'], path=path, x=spec['x'], y=spec['y'])
+        names_by_id[spec['id']] = spec['name']
+
+    for edge in layer['edges']:
+        source, target = names_by_id.get(edge['source']), names_by_id.get(edge['target'])
+        if source is not None and target is not None:
+            blocks[source].children.append(target)
+            blocks[target].parents.append(source)
+    return blocks
+
+
+def topological_order(blocks):
+    """Kahn's algorithm over parent edges; ties broken left-to-right, top-to-bottom on the canvas"""
+    remaining = {name: len(set(block.parents)) for name, block in blocks.items()}
+    ready = sorted((name for name, count in remaining.items() if count == 0), key=lambda n: (blocks[n].x, blocks[n].y, n))
+    order = []
+    while ready:
+        name = ready.pop(0)
+        order.append(name)
+        for child in sorted(set(blocks[name].children)):
+            remaining[child] -= 1
+            if remaining[child] == 0:
+                ready.append(child)
+        ready.sort(key=lambda n: (blocks[n].x, blocks[n].y, n))
+    if len(order) != len(blocks):
+        raise ValueError(f"Canvas has a dependency cycle among: {sorted(set(blocks) - set(order))}")
+    return order
+
+
+def ancestors(blocks, name):
+    """Every block upstream of `name`"""
+    seen, stack = set(), list(blocks[name].parents)
+    while stack:
+        parent = stack.pop()
+        if parent not in seen:
+            seen.add(parent)
+            stack.extend(blocks[parent].parents)
+    return seen
+
+
+NESTED_SCOPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda,
+                 ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)
+
+
+def produced_names(tree):
+    """Public top-level names a block binds (including `x[...] = ...` and `x.attr = ...` targets)"""
+    names = set()
+    stack = list(tree.body)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+            continue
+        if isinstance(node, NESTED_SCOPES):
+            continue
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+            names.add(node.id)
+        elif isinstance(node, (ast.Subscript, ast.Attribute)) and isinstance(node.ctx, ast.Store):
+            base = node.value
+            while isinstance(base, (ast.Subscript, ast.Attribute)):
+                base = base.value
+            if isinstance(base, ast.Name):
+                names.add(base.id)
+        stack.extend(ast.iter_child_nodes(node))
+    return {name for name in names if not name.startswith('_')} - set(imported_names(tree))
+
+
+def imported_names(tree):
+    """{bound name: import statement} for the block's top-level imports"""
+    imports = {}
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                bound = alias.asname or alias.name.split('.')[0]
+                imports[bound] = ast.unparse(type(node)(**{**node.__dict__, 'names': [alias]}))
+    return imports
+
+
+def _module_level_accesses(tree):
+    """(position, is_store, name) for module-scope names; assignment targets are ordered after their value"""
+    accesses = []
+
+    def visit(node, store_position=None):
+        # Parts of nested scopes evaluated in the enclosing (module) scope
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+            for child in node.args.defaults + [d for d in node.args.kw_defaults if d is not None]:
+                visit(child)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            for child in node.decorator_list + getattr(node, 'bases', []) + [k.value for k in getattr(node, 'keywords', [])]:
+                visit(child)
+            accesses.append(((node.lineno, node.col_offset), True, node.name))
+            return
+        if isinstance(node, (ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)):
+            visit(node.generators[0].iter)
+            return
+        if isinstance(node, NESTED_SCOPES):
+            return
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                accesses.append(((node.lineno, node.col_offset), True, alias.asname or alias.name.split('.')[0]))
+            return
+        if isinstance(node, ast.Name):
+            position = store_position if isinstance(node.ctx, ast.Store) and store_position else (node.lineno, node.col_offset)
+            accesses.append((position, isinstance(node.ctx, ast.Store), node.id))
+        if isinstance(node, (ast.Assign, ast.AugAssign, ast.AnnAssign, ast.For, ast.With)):
+            end = (node.end_lineno, node.end_col_offset) if not isinstance(node, (ast.For, ast.With)) else None
+            for child in ast.iter_child_nodes(node):
+                visit(child, end or store_position)
+            return
+        for child in ast.iter_child_nodes(node):
+            visit(child, store_position)
+
+    for statement in tree.body:
+        visit(statement)
+    return accesses
+
+
+def consumed_names(source, filename='<block>'):
+    """Free global names a block reads before (or without) binding them itself"""
+    tree = ast.parse(source)
+    table = symtable.symtable(source, filename, 'exec')
+    builtin_names = set(dir(builtins))
+    module_bound = {symbol.get_name() for symbol in table.get_symbols()
+                    if symbol.is_assigned() or symbol.is_imported() or symbol.is_namespace()}
+
+    consumed = set()
+    first_store, first_load = {}, {}
+    for position, is_store, name in _module_level_accesses(tree):
+        (first_store if is_store else first_load).setdefault(name, position)
+    for name, position in first_load.items():
+        if name not in first_store or position < first_store[name]:
+            consumed.add(name)
+
+    # Globals read inside functions, classes, lambdas and comprehensions
+    stack = list(table.get_children())
+    while stack:
+        scope = stack.pop()
+        stack.extend(scope.get_children())
+        for symbol in scope.get_symbols():
+            if symbol.is_global() and symbol.is_referenced() and symbol.get_name() not in module_bound:
+                consumed.add(symbol.get_name())
+    return {name for name in consumed if name not in builtin_names and not name.startswith('__')}
+
+
+def infer_dependencies(blocks, order):
+    """
+    ({block: {producer: [names]}}, {block: [import statements]}, warnings).
+
+    Producers that are yaml ancestors win (the nearest one in run order); a
+    name with a single producer elsewhere is accepted with a missing-edge
+    warning. Modules a block uses without importing (the canvas shares upstream
+    imports) are returned as import statements to run in that block's globals.
+    """
+    symbols, imports = {}, {}
+    for name in order:
+        source = blocks[name].source()
+        tree = ast.parse(source)
+        symbols[name] = (consumed_names(source, blocks[name].path), produced_names(tree))
+        for bound, statement in imported_names(tree).items():
+            imports.setdefault(bound, statement)
+    producers = defaultdict(list)
+    for name in order:
+        for produced in symbols[name][1]:
+            producers[produced].append(name)
+
+    dependencies, shared_imports, warnings = {}, {}, []
+    for name in order:
+        upstream = ancestors(blocks, name)
+        dependencies[name], shared_imports[name] = defaultdict(list), []
+        for variable in sorted(symbols[name][0]):
+            candidates = [producer for producer in producers.get(variable, []) if producer != name]
+            from_yaml = [producer for producer in candidates if producer in upstream]
+            if from_yaml:
+                chosen = from_yaml[-1]
+            elif len(candidates) == 1:
+                chosen = candidates[0]
+                warnings.append(f"{name} reads `{variable}` from {chosen}, which is not connected upstream in the canvas")
+            elif candidates:
+                raise ValueError(f"{name} reads `{variable}`, produced by {candidates}; add a canvas edge to disambiguate")
+            elif variable in imports:
+                shared_imports[name].append(imports[variable])
+                continue
+            else:
+                warnings.append(f"{name} reads `{variable}`, which no block produces")
+                continue
+            dependencies[name][chosen].append(variable)
+        dependencies[name] = dict(dependencies[name])
+    return dependencies, shared_imports, warnings
+
+
+def dependency_waves(dependencies, order):
+    """Groups of blocks that can run concurrently: each wave depends only on earlier waves"""
+    level = {}
+    for name in order:
+        level[name] = 1 + max((level[producer] for producer in dependencies[name] if producer in level), default=-1)
+    waves = defaultdict(list)
+    for name in order:
+        waves[level[name]].append(name)
+    return [waves[index] for index in sorted(waves)]
@@ -0,0 +1,397 @@
+"""
+Per-user feature, week-1 feature and n-gram stages as partition-wise map/reduce on a local, Dask or Ray cluster.
+
+Every aggregation in these stages stays within one user, so users are
+hash-partitioned and each partition is a map task that calls the canvas's own
+functions (loaded from the block sources; nothing is reimplemented):
+
+1. shuffle: each task parses one byte range of the export like the canvas
+   (user_id = person_id, parsed timestamps, rows without either dropped) and
+   writes its rows to one file per user partition (stable hash of user_id).
+2. features: each task reconstructs the sessions of one partition and computes
+   its user features (engineer_user_success_features) and week-1 features
+   (prepare_week1_churn_data), plus the event names it saw. The partials cover
+   disjoint users, so they merge by concatenation; the names merge by union.
+3. segmentation runs segment_users_by_success on the driver over the merged
+   user_success_df (one row per user), and the success tiers are broadcast.
+4. n-grams: each task counts every n-gram of its partition per tier and size
+   against the sorted global vocabulary (event_sequence_patterns). Windows never
+   span users, so counts of a key merge by summing; partials are reduced in a
+   tree and the top-k is taken once at the end.
+
+A partition holds each user's events whole, in export order, and runs the same
+functions as the canvas, so the results are identical to the single-node run;
+--verify runs the canvas (through the artifact cache) and compares the tables.
+
+Engines: `local` (spawned worker processes; the stand-in when neither Dask nor
+Ray is installed), `dask` (a dask.distributed LocalCluster, or the scheduler at
+--address) and `ray` (ray.init locally, or the cluster at --address). On a real
+cluster the repository must be importable on every worker and --scratch-dir
+must be storage they all share.
+
+    python -m tools.distributed_features --workdir data/ --verify
+    python -m tools.distributed_features --workdir data/ --engine dask --jobs 8 --partitions 64
+    python -m tools.distributed_features --rows 1M --engine ray --address auto
+"""
+import argparse
+import ast
+import io
+import multiprocessing as mp
+import os
+import shutil
+import sys
+import tempfile
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+try:
+    from dask import distributed as dask_distributed
+except ImportError:
+    dask_distributed = None
+
+try:
+    import ray
+except ImportError:
+    ray = None
+
+from tools.artifact_cache import DEFAULT_CACHE_DIR, definitions_code
+from tools.backend_parity import compare_tables, run_backend
+from tools.benchmark_pipeline import DEFAULT_BENCH_DIR, dataset_dir
+from tools.canvas import REPO_ROOT, find_canvas_dir
+from tools.run_canvas import execute_block, plan_run
+from tools.sql_layer import EXPORT_NUMERIC_COLUMNS, EXPORT_TEXT_COLUMNS
+from tools.synthetic_events import EXPORT_FILE_NAME, parse_row_count
+
+ENGINES = ['local', 'dask', 'ray']
+DEFAULT_BLOCK_BYTES = 64 * 1024 * 1024
+REDUCE_FAN_IN = 8
+# Export columns the three stages read
+PARTITION_COLUMNS = ['person_id', 'timestamp', 'event', 'prop_$session_id', 'prop_session_id', 'prop_$pathname',
+                     'prop_credits_used', 'prop_credit_amount', 'prop_tool_name', 'prop_message_id']
+# Distributed table -> canvas block that produces it on a single node
+VERIFIED_TABLES = {
+    'user_success_df': 'engineer_user_success_features',
+    'user_segments': 'segment_users_by_success',
+    'week1_df': 'prepare_week1_churn_data',
+    'ngram_df': 'event_sequence_patterns',
+}
+CONSTANT_NODES = (ast.Constant, ast.List, ast.Tuple, ast.Set, ast.Dict, ast.BinOp, ast.UnaryOp,
+                  ast.operator, ast.unaryop, ast.Load)
+
+# Block namespaces already loaded in this process (workers load each block once)
+_block_namespaces = {}
+
+
+def is_constant_statement(node):
+    """`name = <literal>`: numbers, strings, containers and arithmetic on them, without names or calls"""
+    return (isinstance(node, ast.Assign) and all(isinstance(target, ast.Name) for target in node.targets)
+            and all(isinstance(child, CONSTANT_NODES) for child in ast.walk(node.value)))
+
+
+def block_functions(name, canvas_dir=None, layer='Development'):
+    """A canvas block's literal constants and definitions, without running the block"""
+    key = (name, canvas_dir, layer)
+    if key not in _block_namespaces:
+        path = os.path.join(canvas_dir or find_canvas_dir(), layer, f'{name}.py')
+        with open(path, encoding='utf-8') as handle:
+            source = handle.read()
+        tree = ast.parse(source)
+        tree.body = [node for node in tree.body if is_constant_statement(node)]
+        namespace = types.ModuleType(f'canvas_functions_{name}')
+        exec(compile(tree, path, 'exec'), namespace.__dict__)
+        exec(definitions_code(source, path), namespace.__dict__)
+        _block_namespaces[key] = namespace
+    return _block_namespaces[key]
+
+
+# ==================== ENGINES ====================
+
+class LocalEngine:
+    """Process pool with spawned workers, which share nothing with the driver, as on a cluster"""
+    name = 'local'
+
+    def __init__(self, jobs, address=None):
+        self.pool = ProcessPoolExecutor(max_workers=jobs, mp_context=mp.get_context('spawn')) if jobs > 1 else None
+
+    def map(self, fn, *iterables):
+        return list(self.pool.map(fn, *iterables) if self.pool else map(fn, *iterables))
+
+    def close(self):
+        if self.pool:
+            self.pool.shutdown()
+
+
+class DaskEngine:
+    """dask.distributed client of a LocalCluster (one single-threaded worker process per job) or of `address`"""
+    name = 'dask'
+
+    def __init__(self, jobs, address=None):
+        self.cluster = None if address else dask_distributed.LocalCluster(
+            n_workers=jobs, threads_per_worker=1, processes=True, dashboard_address=None)
+        self.client = dask_distributed.Client(address or self.cluster)
+
+    def map(self, fn, *iterables):
+        return self.client.gather(self.client.map(fn, *iterables, pure=False))
+
+    def close(self):
+        self.client.close()
+        if self.cluster:
+            self.cluster.close()
+
+
+class RayEngine:
+    """Ray tasks on a local instance with `jobs` CPUs, or on the cluster at `address`"""
+    name = 'ray'
+
+    def __init__(self, jobs, address=None):
+        ray.init(address=address, num_cpus=None if address else jobs, log_to_driver=False,
+                 runtime_env={'env_vars': {'PYTHONPATH': REPO_ROOT}})
+
+    def map(self, fn, *iterables):
+        remote = ray.remote(fn)
+        return ray.get([remote.remote(*args) for args in zip(*iterables)])
+
+    def close(self):
+        ray.shutdown()
+
+
+def make_engine(name, jobs, address=None):
+    available = {'local': True, 'dask': dask_distributed is not None, 'ray': ray is not None}
+    if not available[name]:
+        print(f"⚠️ {name} is not installed; using the local engine")
+        name = 'local'
+    return {'local': LocalEngine, 'dask': DaskEngine, 'ray': RayEngine}[name](jobs, address)
+
+
+def tree_reduce(engine, fn, partials, canvas_dir, fan_in=REDUCE_FAN_IN):
+    """Merge partials with `fn(list of partials, canvas_dir)` in rounds of `fan_in`-way reduce tasks"""
+    while len(partials) > 1:
+        groups = [partials[i:i + fan_in] for i in range(0, len(partials), fan_in)]
+        partials = engine.map(fn, groups, [canvas_dir] * len(groups))
+    return partials[0]
+
+
+# ==================== SHUFFLE ====================
+
+def export_byte_ranges(path, block_bytes):
+    """(header line, [(start, stop)]): the export split at row boundaries about `block_bytes` apart"""
+    ranges = []
+    with open(path, 'rb') as handle:
+        header = handle.readline()
+        start = position = handle.tell()
+        quoted = 0  # parity of the quotes read so far; a newline inside quotes is not a row boundary
+        while buffer := handle.read(max(block_bytes, 1 << 20)):
+            scanned = 0
+            search = start + block_bytes - position
+            while search < len(buffer):
+                newline = buffer.find(b'\n', max(search, scanned))
+                if newline < 0:
+                    break
+                quoted ^= buffer.count(b'"', scanned, newline) & 1
+                scanned = newline
+                if quoted:
+                    search = newline + 1
+                    continue
+                ranges.append((start, position + newline + 1))
+                start = position + newline + 1
+                search = start + block_bytes - position
+            quoted ^= buffer.count(b'"', scanned) & 1
+            position += len(buffer)
+        if position > start:
+            ranges.append((start, position))
+    return header, ranges
+
+
+def shuffle_task(export_path, header, byte_range, chunk, n_partitions, scratch_dir, canvas_dir):
+    """Map task: parse one byte range of the export and write its rows to their user partitions"""
+    engineer = block_functions('engineer_user_success_features', canvas_dir)
+    with open(export_path, 'rb') as handle:
+        handle.seek(byte_range[0])
+        data = handle.read(byte_range[1] - byte_range[0])
+    dtypes = {**{column: str for column in EXPORT_TEXT_COLUMNS}, **{column: float for column in EXPORT_NUMERIC_COLUMNS}}
+    events = pd.read_csv(io.BytesIO(header + data), usecols=lambda column: column in PARTITION_COLUMNS,
+                         dtype={column: dtypes[column] for column in PARTITION_COLUMNS})
+    events['timestamp'] = pd.to_datetime(events['timestamp'], errors='coerce')
+    events['user_id'] = events.pop('person_id')
+    events = events[events['user_id'].notna() & events['timestamp'].notna()]
+
+    partition = pd.util.hash_pandas_object(events['user_id'], index=False).to_numpy() % np.uint64(n_partitions)
+    written = []
+    for part, rows in events.groupby(partition, sort=True).indices.items():
+        part_dir = os.path.join(scratch_dir, 'events', f'part-{part:04d}')
+        os.makedirs(part_dir, exist_ok=True)
+        written.append((int(part), engineer.write_frame(events.iloc[rows], os.path.join(part_dir, f'chunk-{chunk:06d}.parquet'))))
+    return written
+
+
+def read_partition(paths, canvas_dir):
+    """A partition's events in export order (chunk files are listed in chunk order)"""
+    engineer = block_functions('engineer_user_success_features', canvas_dir)
+    return pd.concat([engineer.read_frame(path) for path in paths], ignore_index=True)
+
+
+# ==================== STAGES ====================
+
+def feature_task(paths, gap_minutes, canvas_dir):
+    """Map task: (user features, week-1 features, event names) of one user partition"""
+    engineer = block_functions('engineer_user_success_features', canvas_dir)
+    week1 = block_functions('prepare_week1_churn_data', canvas_dir)
+    events, sessions = engineer.reconstruct_sessions(read_partition(paths, canvas_dir), gap_minutes)
+    user_features = engineer.compute_user_features(events[engineer.feature_columns]).join(
+        engineer.summarize_sessions(sessions))[engineer.feature_order]
+    return user_features, week1.compute_week1_features(events), events['event'].dropna().unique()
+
+
+def ngram_task(paths, scratch_dir, canvas_dir):
+    """Map task: exact counts of every n-gram of one user partition, by (success tier, n)"""
+    patterns = block_functions('event_sequence_patterns', canvas_dir)
+    events = read_partition(paths, canvas_dir)[['user_id', 'timestamp', 'event']]
+    events = events.sort_values(['user_id', 'timestamp'], kind='stable')
+    vocab = pd.read_pickle(os.path.join(scratch_dir, 'ngram_vocab.pkl'))
+    user_tiers = pd.read_pickle(os.path.join(scratch_dir, 'user_tiers.pkl'))
+
+    event_codes = pd.Categorical(events['event'], categories=vocab).codes.astype(np.int64)
+    user_codes, users = pd.factorize(events['user_id'])
+    event_tiers = pd.Categorical(user_tiers.reindex(users), categories=patterns.success_tiers).codes[user_codes]
+    eligible = np.bincount(user_codes)[user_codes] >= patterns.ngram_min_user_events
+    return {
+        (tier, n): patterns.ngram_counts(event_codes, user_codes, eligible & (event_tiers == tier_code), n, len(vocab))
+        for tier_code, tier in enumerate(patterns.success_tiers)
+        for n in patterns.ngram_sizes
+    }
+
+
+def merge_ngram_task(partials, canvas_dir):
+    """Reduce task: sum the counts of several n-gram partials"""
+    patterns = block_functions('event_sequence_patterns', canvas_dir)
+    groups = sorted({group for partial in partials for group in partial}, key=str)
+    return {group: patterns.merge_ngram_counts([partial[group] for partial in partials if group in partial])
+            for group in groups}
+
+
+def segment_users(user_success_df, canvas_dir):
+    """user_segments from segment_users_by_success, run on the driver over the merged user features"""
+    blocks, _, imports, _, _ = plan_run(canvas_dir, until=['segment_users_by_success'])
+    name = 'segment_users_by_success'
+    _, outputs, _, _ = execute_block(blocks[name], {'user_success_df': user_success_df.copy()}, imports[name])
+    return outputs['user_segments']
+
+
+def run_distributed(export_path, engine, n_partitions, scratch_dir, block_bytes=DEFAULT_BLOCK_BYTES,
+                    canvas_dir=None, gap_minutes=None):
+    """({table name: DataFrame}, {stage: wall seconds}) of the distributed stages over one export"""
+    canvas_dir = canvas_dir or find_canvas_dir()
+    gap_minutes = float(os.environ.get('SESSION_GAP_MINUTES', '30')) if gap_minutes is None else gap_minutes
+    engineer = block_functions('engineer_user_success_features', canvas_dir)
+    patterns = block_functions('event_sequence_patterns', canvas_dir)
+    seconds = {}
+
+    started = time.perf_counter()
+    header, byte_ranges = export_byte_ranges(export_path, block_bytes)
+    written = engine.map(shuffle_task, [export_path] * len(byte_ranges), [header] * len(byte_ranges), byte_ranges,
+                         list(range(len(byte_ranges))), [n_partitions] * len(byte_ranges),
+                         [scratch_dir] * len(byte_ranges), [canvas_dir] * len(byte_ranges))
+    partitions = {}
+    for chunk_files in written:
+        for part, path in chunk_files:
+            partitions.setdefault(part, []).append(path)
+    partition_paths = [sorted(partitions[part]) for part in sorted(partitions)]
+    seconds['shuffle'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    partials = engine.map(feature_task, partition_paths, [gap_minutes] * len(partition_paths),
+                          [canvas_dir] * len(partition_paths))
+    user_success_df = pd.concat([features for features, _, _ in partials]).sort_index()
+    user_success_df = user_success_df.rename_axis('user_id').reset_index()
+    user_success_df = user_success_df.replace([np.inf, -np.inf], np.nan).fillna(0)
+    user_success_df['engagement_score'] = user_success_df['total_events'] * user_success_df['days_active']
+    week1_df = pd.concat([week1 for _, week1, _ in partials]).sort_values('user_id', kind='stable')
+    week1_df = week1_df.reset_index(drop=True).replace([np.inf, -np.inf], np.nan).fillna(0)
+    vocab = sorted(set().union(*(names for _, _, names in partials)))
+    seconds['features'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    user_segments = segment_users(user_success_df, canvas_dir)
+    seconds['segmentation'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    pd.to_pickle(vocab, os.path.join(scratch_dir, 'ngram_vocab.pkl'))
+    pd.to_pickle(user_segments.set_index('user_id')['success_tier'], os.path.join(scratch_dir, 'user_tiers.pkl'))
+    partials = engine.map(ngram_task, partition_paths, [scratch_dir] * len(partition_paths),
+                          [canvas_dir] * len(partition_paths))
+    ngram_totals = tree_reduce(engine, merge_ngram_task, partials, canvas_dir)
+    ngram_results = []
+    for tier in patterns.success_tiers:
+        for n in patterns.ngram_sizes:
+            keys, counts = patterns.top_ngrams(*ngram_totals[(tier, n)], patterns.ngram_top_k)
+            for rank, (key, count) in enumerate(zip(keys, counts), 1):
+                ngram_results.append({'success_tier': tier, 'n': n, 'rank': rank,
+                                      'pattern': patterns.decode_ngram(key, n, vocab), 'count': int(count)})
+    ngram_df = pd.DataFrame(ngram_results, columns=['success_tier', 'n', 'rank', 'pattern', 'count'])
+    seconds['ngrams'] = time.perf_counter() - started
+
+    tables = {'user_success_df': user_success_df[['user_id', *engineer.feature_order, 'engagement_score']],
+              'user_segments': user_segments, 'week1_df': week1_df, 'ngram_df': ngram_df}
+    return tables, seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workdir', default=None, help='directory holding the CSV export')
+    parser.add_argument('--rows', type=parse_row_count, default=None,
+                        help='use a synthetic export of this size instead (e.g. 100K, 1M)')
+    parser.add_argument('--bench-dir', default=DEFAULT_BENCH_DIR, help='where synthetic exports are kept')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--engine', choices=ENGINES, default='local')
+    parser.add_argument('--address', default=None, help='scheduler (dask) or cluster (ray) address; default: local')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='local worker processes')
+    parser.add_argument('--partitions', type=int, default=None, help='user partitions (default: --jobs)')
+    parser.add_argument('--block-size', type=parse_row_count, default=DEFAULT_BLOCK_BYTES,
+                        help='bytes of the export per shuffle task (e.g. 64M)')
+    parser.add_argument('--scratch-dir', default=None, help='partition files (default: a temporary directory)')
+    parser.add_argument('--verify', action='store_true', help='compare every table with the single-node canvas run')
+    args = parser.parse_args(argv)
+
+    workdir = os.path.abspath(dataset_dir(args.bench_dir, args.rows, args.seed) if args.rows else args.workdir or '.')
+    n_partitions = args.partitions or args.jobs
+    print(f"🌐 DISTRIBUTED PER-USER STAGES ({workdir})")
+    print("=" * 80)
+    engine = make_engine(args.engine, args.jobs, args.address)
+    scratch_dir = tempfile.mkdtemp(prefix='distributed_', dir=args.scratch_dir)
+    try:
+        tables, seconds = run_distributed(os.path.join(workdir, EXPORT_FILE_NAME), engine, n_partitions,
+                                          scratch_dir, args.block_size)
+    finally:
+        engine.close()
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    print(f"Engine: {engine.name}, {n_partitions} user partitions")
+    for stage, stage_seconds in seconds.items():
+        print(f"  {stage:14s} {stage_seconds:8.2f}s")
+    for table, frame in tables.items():
+        print(f"  {table:18s} {len(frame):>10,} rows")
+    if not args.verify:
+        return tables
+
+    print("\n⚖️ SINGLE-NODE PARITY")
+    print("-" * 80)
+    reference, _ = run_backend('pandas', workdir, os.path.join(workdir, DEFAULT_CACHE_DIR))
+    mismatches = 0
+    for table, block in VERIFIED_TABLES.items():
+        expected = reference[block][table][tables[table].columns]
+        difference = compare_tables(expected, tables[table], rtol=0, atol=0)
+        mismatches += difference is not None
+        print(f"  {table:18s} {'✓' if difference is None else '✗ ' + difference}")
+    if mismatches:
+        print(f"\n❌ {mismatches} table(s) differ from the single-node run", file=sys.stderr)
+        raise SystemExit(1)
+    print("\n✅ Distributed stages match the single-node canvas")
+    return tables
+
+
+if __name__ == '__main__':
+    main()
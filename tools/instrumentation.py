@@ -0,0 +1,304 @@
+"""
+Per-block timing and memory instrumentation for headless canvas runs.
+
+Every block run is measured for wall time, CPU time, its peak RSS (and how far
+that is above the RSS the block started from) and, optionally, the tracemalloc
+peak.
+
+The OS only keeps a lifetime high-water mark per process (ru_maxrss), which a
+block run in-process or in a reused pool worker would inherit from earlier
+blocks. The block's own peak is therefore that mark only when the block raised
+it; otherwise it is the highest RSS sampled every RSS_SAMPLE_SECONDS while the
+block ran (from /proc, so Linux only), which can miss a spike shorter than the
+interval. Without /proc the lifetime mark is reported, with that limitation.
+Blocks can time sub-stages without depending on this module:
+
+    _profile_stage = globals().get('profile_stage', contextlib.nullcontext)
+    with _profile_stage('per_user_loop'):
+        ...
+
+Inside Zerve the name is missing and the stage is a no-op; the runner injects
+`profile_stage` so stages are recorded under the running block. Runs are
+appended to a JSON-lines log (plus a flat CSV, one row per block and stage)
+and summarised as a flame-style text chart with each block's wall time compared
+against its most recent earlier run on the same input (see RunLog.previous).
+"""
+import contextlib
+import csv
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+from tools.canvas import REPO_ROOT
+
+DEFAULT_RUN_LOG_DIR = '.zerve_runs'
+RUN_LOG_FILE = 'runs.jsonl'
+RUN_CSV_FILE = 'block_timings.csv'
+RSS_SAMPLE_SECONDS = 0.01
+CSV_FIELDS = ['run_id', 'git_commit', 'block', 'stage', 'status', 'wall_seconds', 'cpu_seconds',
+              'peak_rss_mb', 'rss_growth_mb', 'tracemalloc_peak_mb']
+
+
+@dataclass
+class StageProfile:
+    """One `profile_stage` section; nested stages are named `outer/inner`"""
+    name: str
+    wall_seconds: float
+    cpu_seconds: float
+
+
+@dataclass
+class BlockProfile:
+    """Measurements of one block run (or cache restore)"""
+    name: str
+    status: str = 'ran'
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_rss_mb: float = None
+    rss_growth_mb: float = None
+    tracemalloc_peak_mb: float = None
+    stages: list = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, record):
+        return cls(**{**record, 'stages': [StageProfile(**stage) for stage in record.get('stages', [])]})
+
+
+# Block being measured in this process and its currently open stages
+_active_profile = None
+_open_stages = []
+
+
+def peak_rss_mb():
+    """High-water mark of this process' resident set size in MB (None where unsupported)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def current_rss_mb():
+    """Current resident set size of this process in MB (None without /proc)"""
+    try:
+        with open('/proc/self/statm') as handle:
+            resident_pages = int(handle.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+
+class RssSampler:
+    """Background thread recording the highest current RSS between start() and stop()"""
+
+    def __init__(self, interval=RSS_SAMPLE_SECONDS):
+        self.interval = interval
+        self.baseline = self.peak = current_rss_mb()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stopped.wait(self.interval):
+            self.peak = max(self.peak, current_rss_mb())
+
+    def start(self):
+        if self.baseline is not None:
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self.baseline is not None:
+            self._stopped.set()
+            self._thread.join()
+            self.peak = max(self.peak, current_rss_mb())
+        return self.peak
+
+
+@contextlib.contextmanager
+def profile_stage(name):
+    """Record a named sub-stage of the block being measured (no-op outside `measure_block`)"""
+    if _active_profile is None:
+        yield
+        return
+    _open_stages.append(name)
+    path = '/'.join(_open_stages)
+    wall_started, cpu_started = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        _open_stages.pop()
+        _active_profile.stages.append(StageProfile(
+            name=path, wall_seconds=time.perf_counter() - wall_started, cpu_seconds=time.process_time() - cpu_started
+        ))
+
+
+@contextlib.contextmanager
+def measure_block(name, trace_memory=False):
+    """Measure the enclosed block run; yields the BlockProfile filled in on exit"""
+    global _active_profile
+    profile = BlockProfile(name=name)
+    high_water_before = peak_rss_mb()
+    sampler = RssSampler().start()
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    elif trace_memory:
+        tracemalloc.reset_peak()
+    previous_profile, _active_profile = _active_profile, profile
+    wall_started, cpu_started = time.perf_counter(), time.process_time()
+    try:
+        yield profile
+    finally:
+        profile.wall_seconds = time.perf_counter() - wall_started
+        profile.cpu_seconds = time.process_time() - cpu_started
+        _active_profile = previous_profile
+        if trace_memory:
+            profile.tracemalloc_peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        if started_tracing:
+            tracemalloc.stop()
+        sampled_peak = sampler.stop()
+        high_water = peak_rss_mb()
+        if sampled_peak is None or (high_water is not None and high_water > high_water_before):
+            # The block raised the process' high-water mark, so that mark is its exact peak
+            profile.peak_rss_mb = high_water
+        else:
+            profile.peak_rss_mb = sampled_peak
+        baseline = sampler.baseline if sampler.baseline is not None else high_water_before
+        if profile.peak_rss_mb is not None and baseline is not None:
+            profile.rss_growth_mb = profile.peak_rss_mb - baseline
+
+
+def git_revision(root=REPO_ROOT):
+    """Short commit hash of the checkout (suffixed `-dirty` with local changes), or None outside git"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=root, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=root,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f'{commit}-dirty' if dirty else commit
+
+
+class RunLog:
+    """Append-only log of instrumented runs: `runs.jsonl` (one run per line) and a flat CSV"""
+
+    def __init__(self, directory=DEFAULT_RUN_LOG_DIR):
+        self.directory = directory
+
+    def runs(self):
+        path = os.path.join(self.directory, RUN_LOG_FILE)
+        if not os.path.exists(path):
+            return []
+        with open(path, encoding='utf-8') as handle:
+            return [json.loads(line) for line in handle if line.strip()]
+
+    def previous(self, input_fingerprint=None):
+        """
+        Baseline for every block as {name: BlockProfile}: the block's most recent
+        logged run that actually executed it (not a cache restore or failure) on
+        the same input, i.e. a run whose `input` metadata equals `input_fingerprint`.
+        """
+        baseline = {}
+        for run in reversed(self.runs()):
+            if run.get('input') != input_fingerprint:
+                continue
+            for block in run['blocks']:
+                if block['name'] not in baseline and block.get('status', '').startswith('ran'):
+                    baseline[block['name']] = BlockProfile.from_dict(block)
+        return baseline
+
+    def append(self, profiles, wall_seconds, **metadata):
+        """Log one run; returns its record"""
+        os.makedirs(self.directory, exist_ok=True)
+        started_at = datetime.now(timezone.utc)
+        record = {
+            'run_id': started_at.strftime('%Y%m%dT%H%M%S%fZ'),
+            'started_at': started_at.isoformat(),
+            'git_commit': git_revision(),
+            'wall_seconds': wall_seconds,
+            **metadata,
+            'blocks': [asdict(profile) for profile in profiles],
+        }
+        with open(os.path.join(self.directory, RUN_LOG_FILE), 'a', encoding='utf-8') as handle:
+            handle.write(json.dumps(record) + '\n')
+
+        csv_path = os.path.join(self.directory, RUN_CSV_FILE)
+        write_header = not os.path.exists(csv_path)
+        with open(csv_path, 'a', newline='', encoding='utf-8') as handle:
+            writer = csv.DictWriter(handle, fieldnames=CSV_FIELDS)
+            if write_header:
+                writer.writeheader()
+            for profile in profiles:
+                row = {key: value for key, value in asdict(profile).items() if key in CSV_FIELDS}
+                writer.writerow({**row, 'run_id': record['run_id'], 'git_commit': record['git_commit'],
+                                 'block': profile.name, 'stage': ''})
+                for stage in profile.stages:
+                    writer.writerow({'run_id': record['run_id'], 'git_commit': record['git_commit'],
+                                     'block': profile.name, 'stage': stage.name, 'status': profile.status,
+                                     'wall_seconds': stage.wall_seconds, 'cpu_seconds': stage.cpu_seconds})
+        return record
+
+
+def _format_delta(current, before):
+    if before is None or before <= 0:
+        return ''
+    change = (current - before) / before * 100
+    return f'{change:+.0f}%' if abs(change) >= 1 else '±0%'
+
+
+def _format_mb(value):
+    return f'{value:8.0f}' if value is not None else f"{'-':>8s}"
+
+
+def render_flame(profiles, previous=None, wall_seconds=None, width=40):
+    """
+    Flame-style text summary: one bar per block (and indented bars for its
+    stages) scaled to the slowest block, with CPU time, memory and the change in
+    wall time against `previous` ({name: BlockProfile}, see RunLog.previous) for
+    blocks that ran this time.
+    """
+    previous = previous or {}
+    scale = max((profile.wall_seconds for profile in profiles), default=0) or 1
+    label_width = max([len(profile.name) for profile in profiles]
+                      + [len(stage.name) + 4 for profile in profiles for stage in profile.stages] + [10])
+    lines = [f"{'block':{label_width}s}  {'':{width}s} {'wall s':>8s} {'cpu s':>8s} {'peak MB':>8s} "
+             f"{'+rss MB':>8s} {'heap MB':>8s} {'Δ wall':>7s}  status"]
+    lines.append('-' * len(lines[0]))
+    for profile in profiles:
+        before = previous.get(profile.name) if profile.status.startswith('ran') else None
+        bar = '█' * max(1, round(profile.wall_seconds / scale * width)) if profile.wall_seconds > 0 else ''
+        lines.append(
+            f"{profile.name:{label_width}s}  {bar:{width}s} {profile.wall_seconds:8.2f} {profile.cpu_seconds:8.2f} "
+            f"{_format_mb(profile.peak_rss_mb)} {_format_mb(profile.rss_growth_mb)} "
+            f"{_format_mb(profile.tracemalloc_peak_mb)} "
+            f"{_format_delta(profile.wall_seconds, before.wall_seconds if before else None):>7s}  {profile.status}"
+        )
+        previous_stages = {stage.name: stage for stage in before.stages} if before else {}
+        for stage in profile.stages:
+            depth = stage.name.count('/')
+            offset = round(depth * width / 10)
+            stage_bar = ' ' * offset + '▒' * max(1, round(stage.wall_seconds / scale * width))
+            stage_before = previous_stages.get(stage.name)
+            lines.append(
+                f"{'  ' * (depth + 1) + '└ ' + stage.name.split('/')[-1]:{label_width}s}  {stage_bar[:width]:{width}s} "
+                f"{stage.wall_seconds:8.2f} {stage.cpu_seconds:8.2f} {'':8s} {'':8s} {'':8s} "
+                f"{_format_delta(stage.wall_seconds, stage_before.wall_seconds if stage_before else None):>7s}"
+            )
+    lines.append('-' * len(lines[0]))
+    total = sum(profile.wall_seconds for profile in profiles)
+    lines.append(f"{'total block time':{label_width}s}  {'':{width}s} {total:8.2f}")
+    if wall_seconds is not None:
+        lines.append(f"{'wall clock':{label_width}s}  {'':{width}s} {wall_seconds:8.2f}")
+    return '\n'.join(lines)
@@ -0,0 +1,36 @@
+"""
+Process-pool helper shared by the canvas blocks that parallelise their work.
+
+engineer_user_success_features, mine_sequential_workflows,
+bootstrap_confidence_intervals and generate_pdf_report import `run_in_pool`
+from here rather than reading it from another block, so every block also runs
+on its own (e.g. the report rebuilt from a snapshot by tools/rebuild_report.py).
+Inside Zerve, where this package is not importable, the blocks fall back to a
+serial map:
+
+    try:
+        from tools.parallel import run_in_pool
+    except ImportError:  # outside this repository (e.g. inside Zerve): no process pool
+        def run_in_pool(fn, task_args, n_jobs):
+            return [fn(*args) for args in task_args]
+"""
+import multiprocessing as mp
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+
+def run_in_pool(fn, task_args, n_jobs):
+    """
+    Map fn over argument tuples in a fork-based process pool (serially when n_jobs <= 1).
+
+    `fn` is pickled by reference, so it must be importable from the workers: a
+    function defined in a block run by tools/run_canvas.py is (each block gets
+    its own module). Otherwise the pool is skipped and the tasks run serially.
+    """
+    if n_jobs > 1 and len(task_args) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=n_jobs, mp_context=mp.get_context('fork')) as pool:
+                return list(pool.map(fn, *zip(*task_args)))
+        except (pickle.PicklingError, AttributeError) as exc:
+            print(f"  ⚠️ Process pool unavailable ({exc}); running serially")
+    return [fn(*args) for args in task_args]
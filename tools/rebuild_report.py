@@ -0,0 +1,56 @@
+"""
+Rebuild the PDF report from a saved report snapshot, without running any analysis block.
+
+generate_pdf_report saves its inputs (a ReportSnapshot as JSON plus the figures
+built by the visualisation blocks) to `<workdir>/report_snapshot/` on every run;
+with REPORT_FROM_SNAPSHOT set the block reads them back instead of the upstream
+variables, so only the report block itself executes.
+
+    python -m tools.rebuild_report --workdir data/
+    python -m tools.rebuild_report --snapshot archive/report_snapshot --workdir out/
+"""
+import argparse
+import os
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+from tools.canvas import find_canvas_dir, load_layer
+from tools.instrumentation import profile_stage
+from tools.run_canvas import execute_block
+
+REPORT_BLOCK = 'generate_pdf_report'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--canvas-dir', default=None, help='exported canvas directory (default: the one in the repo)')
+    parser.add_argument('--layer', default='Development')
+    parser.add_argument('--workdir', default='.', help='directory the report (and its page cache) is written to')
+    parser.add_argument('--snapshot', default=None, help='snapshot directory (default: <workdir>/report_snapshot)')
+    args = parser.parse_args(argv)
+
+    workdir = os.path.abspath(args.workdir)
+    snapshot_dir = os.path.abspath(args.snapshot or os.path.join(workdir, 'report_snapshot'))
+    if not os.path.exists(os.path.join(snapshot_dir, 'report_snapshot.json')):
+        raise SystemExit(f"No report snapshot in {snapshot_dir}; run the canvas once to create it")
+
+    block = load_layer(args.canvas_dir or find_canvas_dir(), args.layer)[REPORT_BLOCK]
+    previous = os.environ.get('REPORT_FROM_SNAPSHOT')
+    os.environ['REPORT_FROM_SNAPSHOT'] = snapshot_dir
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        _, outputs, log, profile = execute_block(block, {'profile_stage': profile_stage}, [])
+    finally:
+        os.chdir(cwd)
+        if previous is None:
+            os.environ.pop('REPORT_FROM_SNAPSHOT', None)
+        else:
+            os.environ['REPORT_FROM_SNAPSHOT'] = previous
+    print(log, end='')
+    print(f"\n⏱️ Report rebuilt in {profile.wall_seconds:.2f}s: {os.path.join(workdir, outputs['report_filename'])}")
+    return outputs
+
+
+if __name__ == '__main__':
+    main()
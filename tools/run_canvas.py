@@ -0,0 +1,247 @@
+"""
+Run the exported canvas headlessly, executing independent blocks in parallel.
+
+The dependency graph is inferred from the code: each block consumes the free
+global names it reads and produces the public names it assigns (yaml edges
+only decide between several producers of one name). Blocks are grouped into
+waves whose members depend only on earlier waves, and every wave runs in a
+fork-based process pool. A block executes in its own module with exactly the
+variables it consumes as globals, and its outputs come back pickled in the
+same artifact format the cache stores. Blocks whose key (source + producer
+keys + data files + env vars) is unchanged are restored from the artifact
+cache instead of re-running. Every block is measured (wall/CPU time, peak RSS,
+optionally the tracemalloc peak and `profile_stage` sub-stages) and the run is
+appended to `<workdir>/.zerve_runs/` and printed as a flame-style summary.
+
+    python -m tools.run_canvas --workdir data/ --jobs 8
+    python -m tools.run_canvas --until generate_pdf_report --no-cache
+    python -m tools.run_canvas --plan
+    python -m tools.run_canvas --no-cache --trace-memory
+"""
+import argparse
+import contextlib
+import io
+import multiprocessing as mp
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+from tools.artifact_cache import (DEFAULT_CACHE_DIR, ArtifactCache, block_key, block_module, block_outputs,
+                                  input_fingerprint, pack_outputs, unpack_outputs)
+from tools.canvas import dependency_waves, find_canvas_dir, infer_dependencies, load_layer, topological_order
+from tools.instrumentation import DEFAULT_RUN_LOG_DIR, RunLog, measure_block, profile_stage, render_flame
+
+# Inputs of the blocks in the current wave; forked workers inherit it instead of unpickling
+_wave_state = {}
+
+
+def execute_block(block, inherited, imports, trace_memory=False):
+    """Run one block in a fresh module; returns (module, outputs, captured stdout, BlockProfile)"""
+    module = block_module(block.name)
+    inherited = {**inherited, 'profile_stage': profile_stage}
+    module.__dict__.update(inherited)
+    source = block.source()
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log), measure_block(block.name, trace_memory) as profile:
+        for statement in imports:
+            exec(statement, module.__dict__)
+        exec(compile(source, block.path, 'exec'), module.__dict__)
+    return module, block_outputs(module, inherited, source), log.getvalue(), profile
+
+
+def execute_in_worker(name):
+    """Worker entry point: run the block and send back its packed outputs"""
+    block, inherited, imports, trace_memory = _wave_state[name]
+    module, outputs, log, profile = execute_block(block, inherited, imports, trace_memory)
+    artifact, skipped = pack_outputs(module, outputs, block.source())
+    return artifact, skipped, log, profile
+
+
+def select_blocks(blocks, dependencies, until):
+    """Target blocks plus every block they (transitively) read variables from"""
+    if not until:
+        return set(blocks)
+    unknown = set(until) - set(blocks)
+    if unknown:
+        raise SystemExit(f"Unknown block(s): {', '.join(sorted(unknown))}")
+    selected, stack = set(), list(until)
+    while stack:
+        name = stack.pop()
+        if name not in selected:
+            selected.add(name)
+            stack.extend(dependencies[name])
+    return selected
+
+
+class CanvasRun:
+    """State of one headless run: keys, outputs and profiles per block"""
+
+    def __init__(self, blocks, dependencies, imports, workdir, cache=None, jobs=1, quiet=False, trace_memory=False):
+        self.blocks = blocks
+        self.dependencies = dependencies
+        self.imports = imports
+        self.workdir = workdir
+        self.cache = cache
+        self.jobs = jobs
+        self.quiet = quiet
+        self.trace_memory = trace_memory
+        self.keys, self.outputs, self.profiles = {}, {}, []
+        # (producer, name) pairs some selected block reads; unpicklable ones force an in-process run
+        self.consumed = {(producer, variable) for deps in dependencies.values()
+                         for producer, variables in deps.items() for variable in variables}
+
+    def inputs(self, name):
+        return {
+            variable: self.outputs[producer][variable]
+            for producer, variables in self.dependencies[name].items()
+            for variable in variables if variable in self.outputs.get(producer, {})
+        }
+
+    def report(self, profile, status, log=''):
+        profile.status = status
+        self.profiles.append(profile)
+        if log and not self.quiet:
+            print(f"\n{'─' * 30} {profile.name} {'─' * 30}\n{log}", end='')
+
+    def restore(self, name, artifact):
+        block = self.blocks[name]
+        module = block_module(name)
+        module.__dict__.update(self.inputs(name))
+        return unpack_outputs(artifact, module, block.source(), block.path)
+
+    def run_in_process(self, name):
+        module, outputs, log, profile = execute_block(self.blocks[name], self.inputs(name), self.imports[name],
+                                                      self.trace_memory)
+        self.outputs[name] = outputs
+        status = 'ran'
+        if self.cache is not None:
+            artifact, skipped = pack_outputs(module, outputs, self.blocks[name].source())
+            if skipped:
+                status = f"ran (not cached: {', '.join(skipped)})"
+            else:
+                self.cache.store(self.keys[name], artifact)
+        self.report(profile, status, log)
+
+    def run_wave(self, wave):
+        pending = []
+        for name in wave:
+            block = self.blocks[name]
+            self.keys[name] = block_key(
+                block.source(), {producer: self.keys[producer] for producer in self.dependencies[name]}, self.workdir
+            )
+            with measure_block(name) as profile:
+                artifact = self.cache.load(self.keys[name]) if self.cache is not None else None
+                if artifact is not None:
+                    self.outputs[name] = self.restore(name, artifact)
+            if artifact is not None:
+                self.report(profile, 'cached')
+            else:
+                pending.append(name)
+
+        # With several jobs even a lone block runs in a worker: the parent never executes block code, so
+        # thread pools a block starts (e.g. Polars) are never inherited half-initialised by a later fork
+        if self.jobs <= 1 or not pending:
+            for name in pending:
+                self.run_in_process(name)
+            return
+
+        _wave_state.clear()
+        _wave_state.update({name: (self.blocks[name], self.inputs(name), self.imports[name], self.trace_memory)
+                            for name in pending})
+        try:
+            with ProcessPoolExecutor(max_workers=min(self.jobs, len(pending)), mp_context=mp.get_context('fork')) as pool:
+                results = dict(zip(pending, pool.map(execute_in_worker, pending)))
+        finally:
+            _wave_state.clear()
+
+        for name, (artifact, skipped, log, profile) in results.items():
+            if any((name, variable) in self.consumed for variable in skipped):
+                # A downstream block needs a value that cannot cross processes: run it here
+                self.run_in_process(name)
+                continue
+            self.outputs[name] = self.restore(name, artifact)
+            status = 'ran'
+            if skipped:
+                status = f"ran (not cached: {', '.join(skipped)})"
+            elif self.cache is not None:
+                self.cache.store(self.keys[name], artifact)
+            self.report(profile, status, log)
+
+
+def plan_run(canvas_dir=None, layer='Development', until=None):
+    """(blocks, dependencies, shared imports, waves, warnings) for the selected part of a canvas layer"""
+    blocks = load_layer(canvas_dir or find_canvas_dir(), layer)
+    order = topological_order(blocks)
+    dependencies, imports, warnings = infer_dependencies(blocks, order)
+    selected = select_blocks(blocks, dependencies, until)
+    order = [name for name in order if name in selected]
+    dependencies = {name: {p: v for p, v in dependencies[name].items() if p in selected} for name in order}
+    return blocks, dependencies, imports, dependency_waves(dependencies, order), warnings
+
+
+def execute_waves(run, waves):
+    """Run every wave inside the run's working directory; returns the wall-clock seconds"""
+    cwd = os.getcwd()
+    os.chdir(run.workdir)
+    wall_started = time.perf_counter()
+    try:
+        for wave in waves:
+            run.run_wave(wave)
+    finally:
+        os.chdir(cwd)
+    return time.perf_counter() - wall_started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--canvas-dir', default=None, help='exported canvas directory (default: the one in the repo)')
+    parser.add_argument('--layer', default='Development')
+    parser.add_argument('--workdir', default='.', help='directory holding the CSV export; outputs are written here')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--no-cache', action='store_true', help='run every block and leave the cache untouched')
+    parser.add_argument('--until', nargs='*', default=None, help='run only these blocks and their dependencies')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='worker processes per wave')
+    parser.add_argument('--plan', action='store_true', help='print the inferred graph and waves, then exit')
+    parser.add_argument('--quiet', action='store_true', help='suppress block output')
+    parser.add_argument('--trace-memory', action='store_true', help='also record the tracemalloc peak (slower)')
+    parser.add_argument('--run-log', default=DEFAULT_RUN_LOG_DIR, help='directory (under workdir) of the run log')
+    parser.add_argument('--no-run-log', action='store_true', help='do not append this run to the run log')
+    args = parser.parse_args(argv)
+
+    workdir = os.path.abspath(args.workdir)
+    blocks, dependencies, imports, waves, warnings = plan_run(args.canvas_dir, args.layer, args.until)
+
+    for warning in warnings:
+        print(f"⚠️ {warning}", file=sys.stderr)
+    if args.plan:
+        for index, wave in enumerate(waves):
+            print(f"wave {index}:")
+            for name in wave:
+                print(f"  {name:40s} <- {', '.join(sorted(dependencies[name])) or '(no inputs)'}")
+        return None
+
+    run = CanvasRun(
+        blocks, dependencies, imports, workdir,
+        cache=None if args.no_cache else ArtifactCache(os.path.join(workdir, args.cache_dir)),
+        jobs=args.jobs, quiet=args.quiet, trace_memory=args.trace_memory,
+    )
+    run_log = RunLog(os.path.join(workdir, args.run_log))
+    # The run's input is what its root blocks (those reading no other block's variables) load, e.g. the CSV export
+    data_fingerprint = input_fingerprint([blocks[name].source() for name in waves[0]], workdir) if waves else None
+    previous = run_log.previous(data_fingerprint)
+    wall = execute_waves(run, waves)
+
+    print(f"\n⏱️ RUN PROFILE ({len(waves)} waves, {args.jobs} jobs)")
+    print(render_flame(run.profiles, previous, wall))
+    if not args.no_run_log:
+        record = run_log.append(run.profiles, wall, jobs=args.jobs, waves=len(waves), cache=not args.no_cache,
+                                trace_memory=args.trace_memory, input=data_fingerprint)
+        print(f"\n💾 Run log: {os.path.join(run_log.directory, 'runs.jsonl')} (run {record['run_id']})")
+    return run.outputs
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,325 @@
+"""
+Offline HTML dashboard over the aggregate cube written by build_dashboard_cube.
+
+The cube (tier x credit band x event week x event category, with `All` rows for
+week and category) is loaded once into a dense array; every filter change is
+answered by summing that array over the selected tiers and credit bands at the
+chosen week and category, so no raw events are read after start-up. Tier and
+credit band accept any combination of values (each user is in exactly one, so
+users add up); week and event category take one value or All, whose
+distinct-user counts are stored exactly in the cube. The page is plain HTML and
+JavaScript served by the standard library, so it works without network access.
+
+    python -m tools.serve_dashboard --cube data/dashboard_cube.parquet
+    python -m tools.serve_dashboard --cube data/dashboard_cube.csv --port 8051
+"""
+import argparse
+import json
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+CUBE_ALL = 'All'
+ADDITIVE_DIMENSIONS = ['success_tier', 'credit_band']
+GROUPING_DIMENSIONS = ['week', 'event_category']
+DIMENSIONS = ADDITIVE_DIMENSIONS + GROUPING_DIMENSIONS
+MEASURES = ['users', 'events', 'credits_used', 'success_score_sum', 'days_active_sum']
+VALUE_ORDER = {
+    'success_tier': ['Power Users', 'Active Users', 'Regular Users', 'Casual Users', 'Trial Users'],
+    'credit_band': ['Zero Credits', 'Low (<1)', 'Medium (1-10)', 'High (10-50)', 'Very High (50+)'],
+}
+
+
+def load_cube(path):
+    """Cube DataFrame from the Parquet (or CSV fallback) file written by the canvas"""
+    if path.endswith('.parquet'):
+        cube = pd.read_parquet(path)
+    else:
+        cube = pd.read_csv(path, dtype={dimension: str for dimension in DIMENSIONS})
+    missing = [column for column in DIMENSIONS + MEASURES if column not in cube.columns]
+    if missing:
+        raise ValueError(f"{path} is not a dashboard cube (missing {', '.join(missing)})")
+    return cube
+
+
+class CubeQuery:
+    """
+    Filter/breakdown queries answered from the cube held as a dense array.
+
+    The array has one axis per dimension (week and event category with a
+    trailing `All` position) plus a measure axis, so a query is a boolean
+    selection on the tier and credit band axes, a sum over them and an index
+    into the week/category axes.
+    """
+
+    def __init__(self, cube):
+        self.values = {}
+        for dimension in DIMENSIONS:
+            present = set(cube[dimension]) - {CUBE_ALL}
+            preferred = [value for value in VALUE_ORDER.get(dimension, []) if value in present]
+            self.values[dimension] = preferred + sorted(present - set(preferred))
+        self.positions = {
+            dimension: {value: i for i, value in enumerate(self.values[dimension]
+                                                           + ([CUBE_ALL] if dimension in GROUPING_DIMENSIONS else []))}
+            for dimension in DIMENSIONS
+        }
+        shape = [len(self.positions[dimension]) for dimension in DIMENSIONS] + [len(MEASURES)]
+        self.array = np.zeros(shape, dtype=np.float64)
+        coordinates = tuple(cube[dimension].map(self.positions[dimension]).to_numpy() for dimension in DIMENSIONS)
+        self.array[coordinates] = cube[MEASURES].to_numpy(dtype=np.float64)
+        self.n_cells = len(cube)
+
+    def _mask(self, dimension, selected):
+        if not selected:
+            return np.ones(len(self.values[dimension]), dtype=bool)
+        return np.isin(self.values[dimension], selected)
+
+    @staticmethod
+    def _summary(measures):
+        totals = dict(zip(MEASURES, measures))
+        users = int(totals['users'])
+        return {
+            'users': users,
+            'events': int(totals['events']),
+            'credits_used': float(totals['credits_used']),
+            'avg_success_score': float(totals['success_score_sum'] / users) if users else None,
+            'avg_days_active': float(totals['days_active_sum'] / users) if users else None,
+        }
+
+    def query(self, filters, by):
+        """
+        Rows of `by` values with summed measures for the selected filters.
+
+        filters maps a dimension to its selected values: any number for tier and
+        credit band (none = all), at most one for week and event category.
+        """
+        for dimension in GROUPING_DIMENSIONS:
+            if len(filters.get(dimension, [])) > 1:
+                raise ValueError(f"{dimension} takes a single value or All")
+        if by not in DIMENSIONS:
+            raise ValueError(f"Unknown breakdown dimension: {by}")
+        tier_mask = self._mask('success_tier', filters.get('success_tier'))
+        band_mask = self._mask('credit_band', filters.get('credit_band'))
+        week, category = (self.positions[dimension].get((filters.get(dimension) or [CUBE_ALL])[0])
+                          for dimension in GROUPING_DIMENSIONS)
+        if week is None or category is None:
+            return {'by': by, 'rows': [], 'totals': self._summary(np.zeros(len(MEASURES)))}
+
+        selected = self.array[tier_mask][:, band_mask]          # (tiers, bands, weeks + All, categories + All, measures)
+        if by == 'success_tier':
+            per_value = selected[:, :, week, category].sum(axis=1)
+            labels = np.asarray(self.values[by])[tier_mask]
+        elif by == 'credit_band':
+            per_value = selected[:, :, week, category].sum(axis=0)
+            labels = np.asarray(self.values[by])[band_mask]
+        else:
+            rolled = selected.sum(axis=(0, 1))
+            per_value = rolled[:-1, category] if by == 'week' else rolled[week, :-1]
+            labels = np.asarray(self.values[by])
+            if filters.get(by):
+                keep = self._mask(by, filters[by])
+                per_value, labels = per_value[keep], labels[keep]
+        rows = [dict(self._summary(measures), value=str(label))
+                for label, measures in zip(labels, per_value) if measures[0] > 0]
+        return {'by': by, 'rows': rows, 'totals': self._summary(selected[:, :, week, category].sum(axis=(0, 1)))}
+
+
+DASHBOARD_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Zerve User Success Dashboard</title>
+<style>
+  body { background: #1D1D20; color: #fbfbff; font-family: -apple-system, Helvetica, Arial, sans-serif; margin: 24px; }
+  h1 { font-size: 22px; margin: 0 0 4px; }
+  .muted { color: #909094; font-size: 13px; }
+  .filters { display: flex; gap: 28px; flex-wrap: wrap; margin: 20px 0; }
+  fieldset { border: 1px solid #3a3a40; border-radius: 6px; padding: 8px 12px; }
+  legend { color: #A1C9F4; font-size: 13px; }
+  label { display: block; font-size: 13px; margin: 2px 0; }
+  select { background: #2a2a2f; color: #fbfbff; border: 1px solid #3a3a40; padding: 4px; }
+  .totals { display: flex; gap: 36px; margin: 12px 0 20px; }
+  .totals div { font-size: 13px; color: #909094; }
+  .totals b { display: block; font-size: 22px; color: #fbfbff; }
+  table { border-collapse: collapse; width: 100%; max-width: 1100px; font-size: 13px; }
+  th, td { padding: 5px 10px; text-align: right; border-bottom: 1px solid #2e2e33; }
+  th:first-child, td:first-child { text-align: left; }
+  th { color: #A1C9F4; font-weight: normal; }
+  .bar { height: 10px; background: #FFB482; border-radius: 2px; }
+</style>
+</head>
+<body>
+<h1>Zerve User Success Dashboard</h1>
+<div class="muted" id="status">Loading cube…</div>
+<div class="filters">
+  <fieldset><legend>Success tier</legend><div id="f-success_tier"></div></fieldset>
+  <fieldset><legend>Credit band</legend><div id="f-credit_band"></div></fieldset>
+  <fieldset><legend>Week</legend><select id="f-week"></select></fieldset>
+  <fieldset><legend>Event category</legend><select id="f-event_category"></select></fieldset>
+  <fieldset><legend>Break down by</legend><select id="by">
+    <option value="success_tier">Success tier</option><option value="credit_band">Credit band</option>
+    <option value="week">Week</option><option value="event_category">Event category</option>
+  </select></fieldset>
+</div>
+<div class="totals" id="totals"></div>
+<table>
+  <thead><tr><th id="by-label"></th><th>Users</th><th></th><th>Events</th><th>Credits</th>
+    <th>Avg success score</th><th>Avg days active</th></tr></thead>
+  <tbody id="rows"></tbody>
+</table>
+<script>
+const ADDITIVE = ['success_tier', 'credit_band'];
+const SINGLE = ['week', 'event_category'];
+const fmt = (v, digits) => v === null ? '–' : v.toLocaleString(undefined, {maximumFractionDigits: digits});
+
+function el(tag, attrs, text) {
+  const node = document.createElement(tag);
+  Object.assign(node, attrs || {});
+  if (text !== undefined) node.textContent = text;
+  return node;
+}
+
+async function init() {
+  const dims = await (await fetch('/api/dimensions')).json();
+  for (const dim of ADDITIVE) {
+    const box = document.getElementById('f-' + dim);
+    for (const value of dims.values[dim]) {
+      const label = el('label');
+      label.append(el('input', {type: 'checkbox', value: value, checked: true, onchange: refresh}), ' ' + value);
+      box.append(label);
+    }
+  }
+  for (const dim of SINGLE) {
+    const select = document.getElementById('f-' + dim);
+    select.append(el('option', {value: ''}, 'All'));
+    for (const value of dims.values[dim]) select.append(el('option', {value: value}, value));
+    select.onchange = refresh;
+  }
+  document.getElementById('by').onchange = refresh;
+  refresh();
+}
+
+async function refresh() {
+  const params = new URLSearchParams();
+  for (const dim of ADDITIVE) {
+    const boxes = [...document.querySelectorAll('#f-' + dim + ' input')];
+    const checked = boxes.filter(b => b.checked).map(b => b.value);
+    if (checked.length === 0) checked.push('__none__');
+    if (checked.length < boxes.length) checked.forEach(v => params.append(dim, v));
+  }
+  for (const dim of SINGLE) {
+    const value = document.getElementById('f-' + dim).value;
+    if (value) params.append(dim, value);
+  }
+  const by = document.getElementById('by');
+  params.set('by', by.value);
+  const started = performance.now();
+  const result = await (await fetch('/api/query?' + params)).json();
+  const roundTrip = performance.now() - started;
+  if (result.error) { document.getElementById('status').textContent = result.error; return; }
+
+  const t = result.totals;
+  const totals = document.getElementById('totals');
+  totals.replaceChildren();
+  for (const [label, value] of [['Users', fmt(t.users, 0)], ['Events', fmt(t.events, 0)],
+                                ['Credits used', fmt(t.credits_used, 1)], ['Avg success score', fmt(t.avg_success_score, 1)],
+                                ['Avg days active', fmt(t.avg_days_active, 1)]]) {
+    const box = el('div', {}, label);
+    box.append(el('b', {}, value));
+    totals.append(box);
+  }
+  document.getElementById('by-label').textContent = by.options[by.selectedIndex].text;
+  const maxUsers = Math.max(1, ...result.rows.map(r => r.users));
+  const body = document.getElementById('rows');
+  body.replaceChildren();
+  for (const r of result.rows) {
+    const tr = el('tr');
+    const bar = el('div', {className: 'bar'});
+    bar.style.width = (100 * r.users / maxUsers) + 'px';
+    const barCell = el('td');
+    barCell.append(bar);
+    tr.append(el('td', {}, r.value), el('td', {}, fmt(r.users, 0)), barCell, el('td', {}, fmt(r.events, 0)),
+              el('td', {}, fmt(r.credits_used, 1)), el('td', {}, fmt(r.avg_success_score, 1)),
+              el('td', {}, fmt(r.avg_days_active, 1)));
+    body.append(tr);
+  }
+  document.getElementById('status').textContent =
+    `Answered from the cube in ${result.elapsed_ms.toFixed(1)} ms (${roundTrip.toFixed(0)} ms round trip)`;
+}
+
+init();
+</script>
+</body>
+</html>
+"""
+
+
+def make_handler(cube_query):
+    """Request handler class bound to one loaded cube"""
+
+    class DashboardHandler(BaseHTTPRequestHandler):
+        def _send(self, status, body, content_type):
+            payload = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _send_json(self, status, data):
+            self._send(status, json.dumps(data), 'application/json')
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path in ('/', '/index.html'):
+                self._send(200, DASHBOARD_HTML, 'text/html; charset=utf-8')
+            elif url.path == '/api/dimensions':
+                self._send_json(200, {'values': cube_query.values, 'cells': cube_query.n_cells})
+            elif url.path == '/api/query':
+                params = parse_qs(url.query)
+                filters = {dimension: params[dimension] for dimension in DIMENSIONS if dimension in params}
+                started = time.perf_counter()
+                try:
+                    result = cube_query.query(filters, params.get('by', ['success_tier'])[0])
+                except ValueError as error:
+                    self._send_json(400, {'error': str(error)})
+                    return
+                result['elapsed_ms'] = (time.perf_counter() - started) * 1000
+                self._send_json(200, result)
+            else:
+                self._send_json(404, {'error': f'Not found: {url.path}'})
+
+        def log_message(self, format, *args):
+            pass
+
+    return DashboardHandler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cube', default='dashboard_cube.parquet', help='cube file written by build_dashboard_cube')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8050)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.cube):
+        raise SystemExit(f"No cube at {args.cube}; run the canvas (build_dashboard_cube) first")
+    started = time.perf_counter()
+    cube_query = CubeQuery(load_cube(args.cube))
+    print(f"🧊 Loaded {cube_query.n_cells:,} cube cells in {(time.perf_counter() - started) * 1000:.0f} ms")
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(cube_query))
+    print(f"📊 Dashboard: http://{args.host}:{server.server_address[1]}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+"""
+Embedded SQL (DuckDB) over the event export and the canvas's derived tables.
+
+The database is a local file (`<workdir>/zerve.duckdb`) holding:
+
+- `events`: a view over the export CSV. DuckDB scans the file directly,
+  multithreaded and streaming, so it is never loaded into pandas; `user_id`
+  and the parsed `timestamp` follow engineer_user_success_features.
+- `user_features`: the per-user aggregations of engineer_user_success_features
+  (activity days and weeks, event diversity, executions, canvases, credits,
+  tools, messages) pushed down into SQL over `events`. Session features need the
+  canvas's session reconstruction and stay in `user_success_df`.
+- `user_success_df`, `user_segments`, `churn_data`, `workflow_df`: the canvas
+  tables, materialised once per block key. They are refreshed through the
+  headless runner and its artifact cache only when the producing block (or
+  anything upstream of it, the export, or an env var it reads) changed.
+
+Aggregations larger than memory spill to `<database>.tmp` (DuckDB's default
+temp directory); `--memory-limit` and `--threads` bound the engine.
+
+    python -m tools.sql_layer --workdir data/ "SELECT success_tier, count(*) FROM user_segments GROUP BY ALL"
+    python -m tools.sql_layer --workdir data/ --no-derived "SELECT event, count(*) FROM events GROUP BY ALL"
+    python -m tools.sql_layer --workdir data/ --verify-pushdown
+    python -m tools.sql_layer --workdir data/          # interactive prompt
+"""
+import argparse
+import os
+import sys
+import time
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+from tools.artifact_cache import DEFAULT_CACHE_DIR, ArtifactCache, block_key
+from tools.run_canvas import CanvasRun, execute_waves, plan_run
+from tools.synthetic_events import EXPORT_FILE_NAME
+
+DEFAULT_DATABASE = 'zerve.duckdb'
+# Derived table -> block that produces it
+DERIVED_TABLES = {
+    'user_success_df': 'engineer_user_success_features',
+    'user_segments': 'segment_users_by_success',
+    'churn_data': 'prepare_week1_churn_data',
+    'workflow_df': 'event_sequence_patterns',
+}
+DERIVED_TABLE_KEYS = 'derived_table_keys'
+# Text columns of the export, typed explicitly so sparse columns are not mis-inferred from a sample
+EXPORT_TEXT_COLUMNS = ['distinct_id', 'person_id', 'prop_$session_id', 'prop_session_id', 'prop_$user_id',
+                       'prop_user_id', 'timestamp', 'created_at', 'event', 'prop_tool_name', 'prop_$pathname',
+                       'prop_message_id']
+EXPORT_NUMERIC_COLUMNS = ['prop_credits_used', 'prop_credit_amount']
+EXECUTION_PATTERN = 'run|execute|block_|agent_'
+
+USER_FEATURES_SQL = f"""
+CREATE OR REPLACE VIEW user_features AS
+WITH canvas_visits AS (
+    SELECT user_id, max(visits) AS max_canvas_revisits
+    FROM (SELECT user_id, "prop_$pathname", count(*) AS visits
+          FROM events WHERE "prop_$pathname" IS NOT NULL GROUP BY ALL)
+    GROUP BY ALL
+)
+SELECT
+    user_id,
+    count(DISTINCT CAST("timestamp" AS DATE)) AS days_active,
+    epoch(max("timestamp")) / 86400 - epoch(min("timestamp")) / 86400 AS time_span_days,
+    count(DISTINCT (year("timestamp"), week("timestamp"))) AS weeks_active,
+    count(*) / greatest(count(DISTINCT CAST("timestamp" AS DATE)), 1) AS avg_events_per_day,
+    count(DISTINCT event) AS unique_event_types,
+    coalesce(entropy(event), 0) AS event_diversity_score,
+    count(*) AS total_events,
+    count(*) FILTER (WHERE regexp_matches(event, '{EXECUTION_PATTERN}', 'i')) AS execution_event_count,
+    count(*) FILTER (WHERE regexp_matches(event, '{EXECUTION_PATTERN}', 'i')) / count(*) AS execution_event_rate,
+    coalesce(any_value(canvas_visits.max_canvas_revisits), 0) AS max_canvas_revisits,
+    count(DISTINCT "prop_$pathname") AS unique_canvases,
+    coalesce(sum(prop_credits_used), 0) AS total_credits_used,
+    coalesce(sum(prop_credit_amount), 0) AS total_credit_amount,
+    count(prop_tool_name) AS tool_invocation_count,
+    count(DISTINCT prop_tool_name) AS unique_tools_used,
+    count(prop_message_id) AS message_count
+FROM events LEFT JOIN canvas_visits USING (user_id)
+GROUP BY user_id
+"""
+
+
+def sql_literal(text):
+    return "'" + text.replace("'", "''") + "'"
+
+
+def register_events(con, export_path):
+    """`events` view over the export CSV, filtered and keyed like engineer_user_success_features"""
+    source = f"read_csv({sql_literal(export_path)}, header=true)"
+    columns = {row[0] for row in con.execute(f"DESCRIBE SELECT * FROM {source}").fetchall()}
+    types = {name: 'VARCHAR' for name in EXPORT_TEXT_COLUMNS if name in columns}
+    types.update({name: 'DOUBLE' for name in EXPORT_NUMERIC_COLUMNS if name in columns})
+    type_spec = ', '.join(f"{sql_literal(name)}: '{kind}'" for name, kind in types.items())
+    con.execute(f"""
+        CREATE OR REPLACE VIEW events AS
+        SELECT * REPLACE (TRY_CAST("timestamp" AS TIMESTAMPTZ) AS "timestamp",
+                          TRY_CAST(created_at AS TIMESTAMPTZ) AS created_at),
+               person_id AS user_id
+        FROM read_csv({sql_literal(export_path)}, header=true, types={{{type_spec}}})
+        WHERE person_id IS NOT NULL AND TRY_CAST("timestamp" AS TIMESTAMPTZ) IS NOT NULL
+    """)
+    con.execute(USER_FEATURES_SQL)
+
+
+def block_keys(blocks, dependencies, waves, workdir):
+    """The artifact cache key of every planned block, computed without running anything"""
+    keys = {}
+    for wave in waves:
+        for name in wave:
+            keys[name] = block_key(blocks[name].source(), {producer: keys[producer] for producer in dependencies[name]},
+                                   workdir)
+    return keys
+
+
+def sql_ready(frame):
+    """Copy of a derived DataFrame DuckDB can scan: set-valued cells become sorted lists"""
+    frame = frame.reset_index(drop=True)
+    for column in frame.columns[frame.dtypes == object]:
+        if frame[column].map(lambda value: isinstance(value, (set, frozenset))).any():
+            frame[column] = frame[column].map(
+                lambda value: sorted(value) if isinstance(value, (set, frozenset)) else value)
+    return frame
+
+
+def refresh_derived_tables(con, workdir, tables, cache_dir=DEFAULT_CACHE_DIR, jobs=1, force=False):
+    """Materialise derived tables whose producing block key changed; returns the refreshed table names"""
+    blocks, dependencies, imports, waves, _ = plan_run(until=sorted({DERIVED_TABLES[table] for table in tables}))
+    keys = block_keys(blocks, dependencies, waves, workdir)
+    con.execute(f"CREATE TABLE IF NOT EXISTS {DERIVED_TABLE_KEYS} "
+                f"(table_name VARCHAR PRIMARY KEY, block_key VARCHAR, loaded_at TIMESTAMPTZ)")
+    stored = dict(con.execute(f"SELECT table_name, block_key FROM {DERIVED_TABLE_KEYS}").fetchall())
+    stale = [table for table in tables if force or stored.get(table) != keys[DERIVED_TABLES[table]]]
+    if not stale:
+        return []
+
+    blocks, dependencies, imports, waves, _ = plan_run(until=sorted({DERIVED_TABLES[table] for table in stale}))
+    run = CanvasRun(blocks, dependencies, imports, workdir, cache=ArtifactCache(os.path.join(workdir, cache_dir)),
+                    jobs=jobs, quiet=True)
+    execute_waves(run, waves)
+    for table in stale:
+        con.register('derived_frame', sql_ready(run.outputs[DERIVED_TABLES[table]][table]))
+        con.execute(f'CREATE OR REPLACE TABLE "{table}" AS SELECT * FROM derived_frame')
+        con.unregister('derived_frame')
+        con.execute(f"INSERT OR REPLACE INTO {DERIVED_TABLE_KEYS} VALUES (?, ?, now())",
+                    [table, keys[DERIVED_TABLES[table]]])
+    return stale
+
+
+def connect(workdir='.', database=None, export=None, tables=tuple(DERIVED_TABLES), refresh=False,
+            threads=None, memory_limit=None, cache_dir=DEFAULT_CACHE_DIR, jobs=1):
+    """DuckDB connection with `events`, `user_features` and the requested derived tables registered"""
+    if duckdb is None:
+        raise SystemExit("The SQL layer needs DuckDB: pip install duckdb")
+    workdir = os.path.abspath(workdir)
+    con = duckdb.connect(database or os.path.join(workdir, DEFAULT_DATABASE))
+    con.execute("SET TimeZone = 'UTC'")
+    if threads:
+        con.execute(f"SET threads = {int(threads)}")
+    if memory_limit:
+        con.execute(f"SET memory_limit = {sql_literal(memory_limit)}")
+    register_events(con, export or os.path.join(workdir, EXPORT_FILE_NAME))
+    if tables:
+        refreshed = refresh_derived_tables(con, workdir, list(tables), cache_dir, jobs, force=refresh)
+        if refreshed:
+            print(f"🔄 Materialised {', '.join(refreshed)}", file=sys.stderr)
+    return con
+
+
+def verify_pushdown(con, tolerance=1e-6):
+    """Compare `user_features` (SQL) with `user_success_df` (pandas) column by column; returns mismatching columns"""
+    sql_columns = [row[0] for row in con.execute("DESCRIBE user_features").fetchall() if row[0] != 'user_id']
+    pandas_columns = {row[0] for row in con.execute("DESCRIBE user_success_df").fetchall()}
+    compared = [column for column in sql_columns if column in pandas_columns]
+    differences = con.execute(
+        "SELECT count(*), " + ', '.join(f'max(abs(s."{column}" - p."{column}"))' for column in compared)
+        + " FROM user_features s FULL JOIN user_success_df p USING (user_id)"
+    ).fetchone()
+    print(f"{'column':28s} {'max |sql - pandas|':>20s}  ({differences[0]:,} users)")
+    mismatched = []
+    for column, difference in zip(compared, differences[1:]):
+        if difference is None or difference > tolerance:
+            mismatched.append(column)
+        print(f"{column:28s} {difference if difference is not None else float('nan'):20.3g}"
+              + ('  ✗' if column in mismatched else ''))
+    return mismatched
+
+
+def run_query(con, query):
+    started = time.perf_counter()
+    relation = con.sql(query)
+    if relation is not None:
+        relation.show(max_rows=50)
+    print(f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+
+
+def interactive(con):
+    """Minimal prompt: statements end with `;`, an empty line or Ctrl+D exits"""
+    print("Tables: " + ', '.join(row[0] for row in con.execute("SHOW TABLES").fetchall()))
+    buffer = []
+    while True:
+        try:
+            line = input('sql> ' if not buffer else '...> ')
+        except EOFError:
+            break
+        if not line.strip() and not buffer:
+            break
+        buffer.append(line)
+        if line.rstrip().endswith(';'):
+            try:
+                run_query(con, '\n'.join(buffer))
+            except duckdb.Error as error:
+                print(f"❌ {error}")
+            buffer = []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('query', nargs='?', help='SQL to run (omit for an interactive prompt)')
+    parser.add_argument('--workdir', default='.', help='directory holding the CSV export and the database')
+    parser.add_argument('--database', default=None, help=f'DuckDB file (default: <workdir>/{DEFAULT_DATABASE})')
+    parser.add_argument('--export', default=None, help=f'export CSV (default: <workdir>/{EXPORT_FILE_NAME})')
+    parser.add_argument('--tables', nargs='+', choices=sorted(DERIVED_TABLES), default=sorted(DERIVED_TABLES),
+                        help='derived tables to materialise')
+    parser.add_argument('--no-derived', action='store_true', help='only register the export views')
+    parser.add_argument('--refresh', action='store_true', help='re-materialise derived tables even if unchanged')
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--memory-limit', default=None, help="e.g. '4GB'; larger aggregations spill to disk")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help='artifact cache used to compute derived tables')
+    parser.add_argument('--jobs', type=int, default=1, help='worker processes when derived tables are recomputed')
+    parser.add_argument('--verify-pushdown', action='store_true', help='compare user_features with user_success_df')
+    args = parser.parse_args(argv)
+
+    tables = [] if args.no_derived else args.tables
+    if args.verify_pushdown and 'user_success_df' not in tables:
+        tables = tables + ['user_success_df']
+    con = connect(args.workdir, args.database, args.export, tables, args.refresh, args.threads, args.memory_limit,
+                  args.cache_dir, args.jobs)
+    try:
+        if args.verify_pushdown:
+            return verify_pushdown(con)
+        if args.query:
+            run_query(con, args.query)
+        else:
+            interactive(con)
+    finally:
+        con.close()
+    return None
+
+
+if __name__ == '__main__':
+    main()
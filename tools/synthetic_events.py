@@ -0,0 +1,179 @@
+"""
+Synthetic Zerve event exports with the schema and heavy-tailed shape of the real one.
+
+Users get a Pareto-distributed number of events (a few power users produce a
+large share of the volume), a start date inside the export window, bursty
+activity (short gaps inside sessions, long log-normal gaps between them,
+compressed to end inside the export window) and a per-user agent affinity that
+drives agent messages, tool calls and credit usage. Client session ids are missing on part of the events, as in the export,
+so session reconstruction is exercised too. Generation is vectorized and
+written user-chunk by user-chunk, so 10M+ row files do not need to fit in memory.
+
+    python -m tools.synthetic_events --rows 1000000 --out data/
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+GENERATOR_VERSION = 1
+EXPORT_FILE_NAME = 'zerve_hackathon_for_reviewc8fa7c7.csv'
+EXPORT_COLUMNS = [
+    'distinct_id', 'person_id', 'prop_$session_id', 'prop_session_id', 'prop_$user_id', 'prop_user_id',
+    'timestamp', 'created_at', 'event', 'prop_credits_used', 'prop_credit_amount', 'prop_tool_name',
+    'prop_$pathname', 'prop_message_id', 'prop_$browser', 'prop_$os',
+]
+
+# Event vocabulary: (name, base weight, agent-driven)
+EVENT_VOCABULARY = [
+    ('$pageview', 20, False), ('canvas_open', 8, False), ('block_run', 18, False), ('run_all_blocks', 3, False),
+    ('execute_cell', 6, False), ('block_create', 5, False), ('load_data', 4, False), ('query_db', 2, False),
+    ('transform_df', 4, False), ('plot_chart', 4, False), ('visualize_output', 2, False), ('train_model', 1, False),
+    ('predict_batch', 0.5, False), ('export_results', 1, False), ('save_canvas', 5, False), ('fetch_api', 1, False),
+    ('agent_message', 8, True), ('agent_tool_call', 6, True), ('agent_block_created', 2, True),
+    ('credits_used', 3, True), ('$autocapture', 10, False), ('sign_in', 1, False),
+]
+TOOL_NAMES = ['run_block', 'create_block', 'edit_block', 'read_file', 'write_file', 'query_data',
+              'search_docs', 'plot', 'install_package', 'deploy_app']
+BROWSERS = ['Chrome', 'Safari', 'Firefox', 'Edge']
+OPERATING_SYSTEMS = ['Mac OS X', 'Windows', 'Linux']
+EXPORT_START = pd.Timestamp('2025-09-01', tz='UTC')
+EXPORT_DAYS = 90
+MEAN_EVENTS_PER_USER = 60
+SESSION_GAP_PROBABILITY = 0.08
+MISSING_SESSION_ID_RATE = 0.25
+
+
+def _zipf_weights(n, exponent=1.1):
+    weights = 1 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def user_event_counts(n_users, rng, mean=MEAN_EVENTS_PER_USER, shape=1.3):
+    """Heavy-tailed events per user: Pareto (Lomax) with the given mean, at least one event each"""
+    scale = mean * (shape - 1)
+    return np.maximum(1, np.round(rng.pareto(shape, n_users) * scale)).astype(np.int64)
+
+
+def generate_users(n_rows, rng, user_offset=0):
+    """Per-user event counts whose total is exactly `n_rows`"""
+    counts = user_event_counts(max(1, int(n_rows / MEAN_EVENTS_PER_USER * 1.05)), rng)
+    counts = counts[:np.searchsorted(np.cumsum(counts), n_rows) + 1]
+    counts[-1] -= counts.sum() - n_rows
+    counts = counts[counts > 0]
+    return np.arange(user_offset, user_offset + len(counts)), counts
+
+
+def generate_events(user_ids, counts, rng):
+    """Event rows (export schema) for the given users and per-user event counts"""
+    n_users, n_rows = len(user_ids), int(counts.sum())
+    user_index = np.repeat(np.arange(n_users), counts)
+    first_row = np.cumsum(counts) - counts
+    position = np.arange(n_rows) - first_row[user_index]
+
+    # Bursty timing: exponential gaps inside a session, log-normal gaps (hours to days) between them
+    new_session = (rng.random(n_rows) < SESSION_GAP_PROBABILITY) | (position == 0)
+    gap_seconds = np.where(
+        new_session,
+        rng.lognormal(mean=np.log(6 * 3600), sigma=1.5, size=n_rows),
+        rng.exponential(90, size=n_rows),
+    )
+    gap_seconds[position == 0] = 0
+    elapsed = np.cumsum(gap_seconds)
+    elapsed -= np.repeat(elapsed[first_row], counts)
+    start_seconds = rng.uniform(0, EXPORT_DAYS * 86400, n_users)
+    # Compress the timelines of users who would run past the end of the export
+    user_span = np.repeat(elapsed[first_row + counts - 1], counts)
+    remaining = (EXPORT_DAYS * 86400 - start_seconds)[user_index]
+    elapsed *= np.minimum(1.0, remaining / np.maximum(user_span, 1.0))
+    timestamp = EXPORT_START + pd.to_timedelta(start_seconds[user_index] + elapsed, unit='s')
+    session_number = np.cumsum(new_session) - np.repeat(np.cumsum(new_session)[first_row], counts)
+
+    # Event mix: agent-driven events are scaled by each user's agent affinity
+    names = np.array([name for name, _, _ in EVENT_VOCABULARY])
+    base = np.array([weight for _, weight, _ in EVENT_VOCABULARY], dtype=np.float64)
+    agent = np.array([is_agent for _, _, is_agent in EVENT_VOCABULARY])
+    affinity = rng.beta(0.6, 1.4, n_users) * 3
+    weights = np.where(agent, base * affinity[:, None], base)
+    cumulative = np.cumsum(weights / weights.sum(axis=1, keepdims=True), axis=1)
+    draws = rng.random(n_rows)
+    event_index = (draws[:, None] > cumulative[user_index]).sum(axis=1)
+    event_index = np.minimum(event_index, len(names) - 1)
+    event = names[event_index]
+
+    is_tool_call = event == 'agent_tool_call'
+    is_credit_event = is_tool_call | (event == 'credits_used')
+    credits = np.where(is_credit_event, rng.lognormal(mean=-1.0, sigma=1.6, size=n_rows), np.nan)
+    tool_name = np.where(is_tool_call, np.array(TOOL_NAMES)[rng.choice(len(TOOL_NAMES), n_rows,
+                                                                        p=_zipf_weights(len(TOOL_NAMES)))], None)
+    message_id = np.where(event == 'agent_message', np.char.mod('msg_%x', rng.integers(0, 2 ** 62, n_rows)), None)
+
+    user_labels = pd.Series(user_ids[user_index]).astype(str)
+    session_labels = 's' + user_labels + '_' + pd.Series(session_number).astype(str)
+    has_session = rng.random(n_rows) >= MISSING_SESSION_ID_RATE
+    # Most client session ids come from posthog's $session_id, the rest from the app's own field
+    posthog_session = has_session & (rng.random(n_rows) < 0.8)
+    canvas_number = np.minimum(rng.geometric(0.5, n_rows) - 1, 9)
+    identified = rng.random(n_users) < 0.6
+
+    return pd.DataFrame({
+        'distinct_id': 'd' + user_labels,
+        'person_id': 'p' + user_labels,
+        'prop_$session_id': session_labels.where(posthog_session),
+        'prop_session_id': session_labels.where(has_session & ~posthog_session),
+        'prop_$user_id': ('u' + user_labels).where(identified[user_index]),
+        'prop_user_id': None,
+        'timestamp': timestamp,
+        'created_at': timestamp + pd.to_timedelta(rng.exponential(2, n_rows), unit='s'),
+        'event': event,
+        'prop_credits_used': credits,
+        'prop_credit_amount': np.where(event == 'credits_used', np.round(credits * 10, 2), np.nan),
+        'prop_tool_name': tool_name,
+        'prop_$pathname': '/canvas/' + user_labels + '-' + pd.Series(canvas_number).astype(str),
+        'prop_message_id': message_id,
+        'prop_$browser': np.array(BROWSERS)[rng.choice(len(BROWSERS), n_users)][user_index],
+        'prop_$os': np.array(OPERATING_SYSTEMS)[rng.choice(len(OPERATING_SYSTEMS), n_users)][user_index],
+    }, columns=EXPORT_COLUMNS)
+
+
+def write_synthetic_export(path, n_rows, seed=0, chunk_rows=1_000_000):
+    """Write an `n_rows` export to `path` in user-aligned chunks; returns the number of users"""
+    rng = np.random.default_rng(seed)
+    user_ids, counts = generate_users(n_rows, rng)
+    chunk_of_user = np.cumsum(counts) // max(chunk_rows, 1)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    for chunk in np.unique(chunk_of_user):
+        mask = chunk_of_user == chunk
+        events = generate_events(user_ids[mask], counts[mask], rng)
+        events.to_csv(tmp_path, mode='w' if chunk == chunk_of_user[0] else 'a', header=chunk == chunk_of_user[0],
+                      index=False, date_format='%Y-%m-%dT%H:%M:%S.%f%z')
+    os.replace(tmp_path, path)
+    return len(user_ids)
+
+
+def parse_row_count(text):
+    """'100K', '1M', '2.5M' or '10000' -> int"""
+    multipliers = {'K': 1_000, 'M': 1_000_000, 'B': 1_000_000_000}
+    text = text.strip().upper()
+    if text[-1] in multipliers:
+        return int(float(text[:-1]) * multipliers[text[-1]])
+    return int(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=parse_row_count, default=parse_row_count('100K'), help='e.g. 100K, 1M, 10M')
+    parser.add_argument('--out', default='.', help='directory to write the export CSV into')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-rows', type=parse_row_count, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    path = os.path.join(args.out, EXPORT_FILE_NAME)
+    n_users = write_synthetic_export(path, args.rows, args.seed, args.chunk_rows)
+    print(f"💾 Output: {path} with {args.rows:,} events from {n_users:,} users")
+
+
+if __name__ == '__main__':
+    main()